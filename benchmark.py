@@ -0,0 +1,260 @@
+"""
+Reproducible offline benchmark
+Serves a synthetic HTML corpus from a local HTTP server and measures
+fetch, parse, extraction and writer throughput
+"""
+
+import argparse
+import functools
+import itertools
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from data_extractor import DataExtractor
+from data_handler import DataHandler
+from file_handler import FileHandler
+from records import peak_rss_bytes
+from scraper import WebScraper
+
+WORDS = (
+    'data scraper market price report table index value growth revenue service '
+    'network system analysis customer product region quarter annual summary'
+).split()
+
+class CorpusGenerator:
+    def __init__(self, num_pages=200, page_size=20000, link_density=0.02, table_count=1, seed=0):
+        """
+        Deterministic synthetic HTML corpus
+        
+        Args:
+            num_pages (int): Number of pages in the corpus
+            page_size (int): Approximate page size in bytes
+            link_density (float): Links per word of body text
+            table_count (int): Tables per page
+            seed (int): Random seed; the same seed always yields the same corpus
+        """
+        self.num_pages = num_pages
+        self.page_size = page_size
+        self.link_density = link_density
+        self.table_count = table_count
+        self.seed = seed
+        # Cache rendered pages so the server measures the scraper, not the generator
+        self.page = functools.lru_cache(maxsize=1024)(self._render)
+    
+    def _render(self, index):
+        """
+        Render one page
+        
+        Args:
+            index (int): Page number
+        
+        Returns:
+            bytes: UTF-8 encoded HTML
+        """
+        rng = random.Random(self.seed * 1000003 + index)
+        parts = [f'<!DOCTYPE html><html><head><meta charset="utf-8"><title>Page {index}</title></head><body>',
+                 f'<h1>Page {index}</h1>']
+        for t in range(self.table_count):
+            parts.append(f'<h2>Table {t}</h2><table><thead><tr><th>Item</th><th>Qty</th><th>Price</th></tr></thead><tbody>')
+            for _ in range(10):
+                parts.append(f'<tr><td>{rng.choice(WORDS)}</td><td>{rng.randint(1, 999)}</td>'
+                             f'<td>${rng.uniform(1, 1000):.2f}</td></tr>')
+            parts.append('</tbody></table>')
+        
+        size = sum(len(p) for p in parts)
+        while size < self.page_size:
+            words = []
+            for _ in range(40):
+                if rng.random() < self.link_density:
+                    target = rng.randrange(self.num_pages)
+                    words.append(f'<a href="/page/{target}">{rng.choice(WORDS)}</a>')
+                else:
+                    words.append(rng.choice(WORDS))
+            if rng.random() < 0.05:
+                words.append(f'contact{rng.randrange(100)}@example.com')
+            paragraph = f"<p>{' '.join(words)}</p>"
+            parts.append(paragraph)
+            size += len(paragraph)
+        parts.append('</body></html>')
+        return ''.join(parts).encode('utf-8')
+
+class BenchmarkServer:
+    def __init__(self, corpus, latency=0.0):
+        """
+        Local HTTP server for a corpus, serving /page/<n>
+        
+        Args:
+            corpus (CorpusGenerator): Pages to serve
+            latency (float): Seconds added before each response
+        """
+        self.corpus = corpus
+        self.latency = latency
+        self._server = None
+    
+    def __enter__(self):
+        corpus, latency = self.corpus, self.latency
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # keep-alive
+            
+            def do_GET(self):
+                try:
+                    index = int(self.path.rsplit('/', 1)[-1])
+                except ValueError:
+                    index = -1
+                if not 0 <= index < corpus.num_pages:
+                    self.send_error(404)
+                    return
+                if latency:
+                    time.sleep(latency)
+                body = corpus.page(index)
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, *args):
+                pass
+        
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._server.shutdown()
+        self._server.server_close()
+    
+    def url(self, index):
+        """
+        URL of a page
+        
+        Args:
+            index (int): Page number
+        
+        Returns:
+            str: Absolute URL
+        """
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/page/{index}"
+
+def run_benchmark(server, num_pages, parser='lxml', workers=8,
+                  fields=('titles', 'paragraphs', 'links', 'tables', 'text')):
+    """
+    Scrape the whole corpus once and time each stage
+    
+    Args:
+        server (BenchmarkServer): Running server
+        num_pages (int): Pages to fetch
+        parser (str): Parser passed to WebScraper
+        workers (int): Concurrent fetches
+        fields (tuple): Fields passed to DataExtractor.extract_fields
+    
+    Returns:
+        dict: Throughput, per-stage seconds, bytes and peak memory (the
+            process-wide peak so far, so run one configuration per process
+            for exact memory comparisons)
+    """
+    scraper = WebScraper(delay=0, max_workers=workers, per_host_limit=workers, parser=parser,
+                         circuit_breaker=False)
+    scraper.logger.setLevel('WARNING')
+    # fetch_wait is time spent blocked on the fetch threads; the other stages
+    # run on the calling thread
+    stages = dict.fromkeys(('fetch_wait', 'parse', 'extract', 'write_jsonl', 'write_csv'), 0.0)
+    pages = errors = total_bytes = 0
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        handler = DataHandler(tmp)
+        with handler.open_jsonl('bench.jsonl') as jsonl, FileHandler.open_csv('bench', tmp) as csv_out:
+            start = time.perf_counter()
+            results = scraper.fetch_many(server.url(i) for i in range(num_pages))
+            while True:
+                t0 = time.perf_counter()
+                item = next(results, None)
+                t1 = time.perf_counter()
+                stages['fetch_wait'] += t1 - t0
+                if item is None:
+                    break
+                url, response = item
+                if isinstance(response, Exception):
+                    errors += 1
+                    continue
+                total_bytes += len(response.content)
+                
+                soup = scraper.parse_response(response)
+                t2 = time.perf_counter()
+                record = {'url': url}
+                record.update(DataExtractor.extract_fields(soup, fields, base_url=url))
+                if 'text' in record:
+                    record['text'] = record['text'][:200]
+                t3 = time.perf_counter()
+                jsonl.write(record)
+                t4 = time.perf_counter()
+                csv_out.write(record)
+                t5 = time.perf_counter()
+                
+                stages['parse'] += t2 - t1
+                stages['extract'] += t3 - t2
+                stages['write_jsonl'] += t4 - t3
+                stages['write_csv'] += t5 - t4
+                pages += 1
+        elapsed = time.perf_counter() - start
+        handler.flush()  # the sink must finish before the directory is removed
+    
+    return {
+        'parser': parser,
+        'workers': workers,
+        'pages': pages,
+        'errors': errors,
+        'bytes': total_bytes,
+        'seconds': round(elapsed, 4),
+        'pages_per_sec': round(pages / elapsed, 2) if elapsed else None,
+        'stage_seconds': {name: round(value, 4) for name, value in stages.items()},
+        'connections': scraper.connection_stats(),
+        'peak_rss_bytes': peak_rss_bytes(),
+    }
+
+def main(argv=None):
+    """
+    Command line entry point; prints a JSON report
+    """
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument('--pages', type=int, default=200, help='pages to fetch')
+    parser.add_argument('--page-size', type=int, default=20000, help='approximate bytes per page')
+    parser.add_argument('--link-density', type=float, default=0.02, help='links per word')
+    parser.add_argument('--tables', type=int, default=1, help='tables per page')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added per response')
+    parser.add_argument('--seed', type=int, default=0, help='corpus random seed')
+    parser.add_argument('--parser', nargs='+', default=['lxml'], help='parsers to compare')
+    parser.add_argument('--workers', type=int, nargs='+', default=[8], help='concurrency levels to compare')
+    parser.add_argument('--output', help='write the report to this file instead of stdout')
+    args = parser.parse_args(argv)
+    
+    corpus = CorpusGenerator(args.pages, args.page_size, args.link_density, args.tables, args.seed)
+    report = {
+        'config': {key: value for key, value in vars(args).items() if key != 'output'},
+        'python': sys.version.split()[0],
+        'cpu_count': os.cpu_count(),
+        'results': [],
+    }
+    with BenchmarkServer(corpus, args.latency) as server:
+        for parser_name, workers in itertools.product(args.parser, args.workers):
+            report['results'].append(run_benchmark(server, args.pages, parser_name, workers))
+    
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+    else:
+        print(output)
+    return report
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+"""
+Fast-path charset detection
+Finds a page's encoding from the BOM, the HTTP Content-Type charset or a
+<meta> declaration near the top, then from what earlier pages of the same
+host used, and only then falls back to statistical detection
+"""
+
+import codecs
+import re
+import threading
+from collections import Counter, OrderedDict
+from urllib.parse import urlsplit
+
+from bs4 import UnicodeDammit
+
+import config
+
+# Checked longest first: the UTF-32 LE BOM starts with the UTF-16 LE one
+BOMS = (
+    (codecs.BOM_UTF32_LE, 'utf-32le'),
+    (codecs.BOM_UTF32_BE, 'utf-32be'),
+    (codecs.BOM_UTF8, 'utf-8'),
+    (codecs.BOM_UTF16_LE, 'utf-16le'),
+    (codecs.BOM_UTF16_BE, 'utf-16be'),
+)
+
+# Labels browsers decode as windows-1252 (WHATWG Encoding Standard)
+WINDOWS_1252_ALIASES = {'ascii', 'latin-1', 'iso8859-1', 'cp1252'}
+
+_HEADER_CHARSET = re.compile(r'charset\s*=\s*["\']?\s*([^\s;"\']+)', re.IGNORECASE)
+# <meta charset="x"> and <meta http-equiv="Content-Type" content="...; charset=x">
+_META_CHARSET = re.compile(rb'<meta\b[^>]*?charset\s*=\s*["\']?\s*([A-Za-z0-9_:.+-]+)', re.IGNORECASE)
+
+def normalize_encoding(label):
+    """
+    Validate an encoding label and return a name Python and lxml both accept
+    
+    Args:
+        label (str or bytes): Label from a header or document
+    
+    Returns:
+        str: Encoding name, or None if the label is unknown
+    """
+    if isinstance(label, bytes):
+        label = label.decode('ascii', errors='ignore')
+    label = label.strip().strip('"\'').lower()
+    try:
+        name = codecs.lookup(label).name
+    except (LookupError, ValueError):
+        return None
+    if name in WINDOWS_1252_ALIASES:
+        return 'windows-1252'
+    if name == 'utf-8':
+        return 'utf-8'
+    return label
+
+def header_charset(content_type):
+    """
+    charset parameter of a Content-Type header
+    
+    Args:
+        content_type (str): Header value (None allowed)
+    
+    Returns:
+        str: Normalized encoding, or None if absent or unknown
+    """
+    if not content_type:
+        return None
+    match = _HEADER_CHARSET.search(content_type)
+    return normalize_encoding(match.group(1)) if match else None
+
+def bom_encoding(content):
+    """
+    Encoding given by a byte order mark
+    
+    Args:
+        content (bytes): Document
+    
+    Returns:
+        str: Encoding, or None without a BOM
+    """
+    for bom, encoding in BOMS:
+        if content.startswith(bom):
+            return encoding
+    return None
+
+def meta_charset(content, sniff_bytes=config.CHARSET_SNIFF_BYTES):
+    """
+    Encoding declared by a <meta> tag in the first sniff_bytes bytes
+    
+    UTF-16/32 declarations are ignored as the HTML standard requires: a
+    document whose meta tag is readable as ASCII cannot be UTF-16.
+    
+    Args:
+        content (bytes): Document
+        sniff_bytes (int): Bytes searched
+    
+    Returns:
+        str: Normalized encoding, or None if absent or unknown
+    """
+    match = _META_CHARSET.search(content, 0, sniff_bytes)
+    if not match:
+        return None
+    encoding = normalize_encoding(match.group(1))
+    if encoding and encoding.startswith(('utf-16', 'utf-32')):
+        return 'utf-8'
+    return encoding
+
+class CharsetDetector:
+    # Paths detect() can take, cheapest first
+    PATHS = ('bom', 'header', 'meta', 'utf-8', 'host', 'detected')
+    
+    def __init__(self, sniff_bytes=config.CHARSET_SNIFF_BYTES, max_hosts=config.CHARSET_MAX_HOSTS, metrics=None):
+        """
+        Initialize the detector
+        
+        Args:
+            sniff_bytes (int): Bytes searched for a <meta> declaration
+            max_hosts (int): Hosts whose last detected encoding is kept
+            metrics (MetricsRegistry): Registry receiving a
+                charset_path_total{path} counter (optional)
+        """
+        self.sniff_bytes = sniff_bytes
+        self.max_hosts = max_hosts
+        self.metrics = metrics
+        self.paths = Counter()
+        self._hosts = OrderedDict()  # host -> encoding, least recently used first
+        self._lock = threading.Lock()
+    
+    def detect(self, content, content_type=None, url=None):
+        """
+        Find a document's encoding as cheaply as possible
+        
+        Order: BOM, HTTP charset, <meta> in the first sniff_bytes bytes,
+        strict UTF-8, the encoding last detected for the URL's host, then
+        UnicodeDammit (which uses chardet or charset_normalizer if installed).
+        Valid UTF-8 is checked before the host cache because single-byte
+        encodings accept any bytes: a host that once served a cp1252 page
+        would otherwise have its UTF-8 pages decoded as mojibake.
+        
+        Args:
+            content (bytes): Document
+            content_type (str): Content-Type header value
+            url (str): Document URL, for the per-host cache
+        
+        Returns:
+            tuple: (encoding, path) where path is one of PATHS; encoding is
+                None if nothing could be determined
+        """
+        encoding = bom_encoding(content)
+        path = 'bom'
+        if encoding is None:
+            encoding, path = header_charset(content_type), 'header'
+        if encoding is None:
+            encoding, path = meta_charset(content, self.sniff_bytes), 'meta'
+        if encoding is None and _is_utf8(content):
+            encoding, path = 'utf-8', 'utf-8'
+        if encoding is None:
+            host = urlsplit(url).netloc.lower() if url else None
+            encoding, path = self._cached(host), 'host'
+            if encoding is None:
+                encoding, path = self._detect(content), 'detected'
+                if host and encoding:
+                    self._remember(host, encoding)
+        self._count(path)
+        return encoding, path
+    
+    def decode(self, content, content_type=None, url=None):
+        """
+        Decode a document with the detected encoding
+        
+        Undecodable bytes are replaced, as browsers do.
+        
+        Args:
+            content (bytes): Document
+            content_type (str): Content-Type header value
+            url (str): Document URL, for the per-host cache
+        
+        Returns:
+            tuple: (text, encoding, path)
+        """
+        encoding, path = self.detect(content, content_type, url)
+        try:
+            text = content.decode(encoding or 'utf-8', errors='replace')
+        except LookupError:
+            encoding = 'windows-1252'
+            text = content.decode(encoding, errors='replace')
+        if path == 'bom' and text.startswith('\ufeff'):
+            text = text[1:]
+        return text, encoding, path
+    
+    def _cached(self, host):
+        """
+        Encoding last detected for a host
+        """
+        if not host:
+            return None
+        with self._lock:
+            encoding = self._hosts.get(host)
+            if encoding is not None:
+                self._hosts.move_to_end(host)
+        return encoding
+    
+    def _remember(self, host, encoding):
+        """
+        Cache a host's detected encoding
+        """
+        with self._lock:
+            self._hosts[host] = encoding
+            self._hosts.move_to_end(host)
+            while len(self._hosts) > self.max_hosts:
+                self._hosts.popitem(last=False)
+    
+    @staticmethod
+    def _detect(content):
+        """
+        Slow path: statistical detection
+        
+        Returns:
+            str: Encoding, or None if nothing could be determined
+        """
+        dammit = UnicodeDammit(content, is_html=True)
+        return normalize_encoding(dammit.original_encoding) if dammit.original_encoding else None
+    
+    def _count(self, path):
+        """
+        Record which path was taken
+        """
+        with self._lock:
+            self.paths[path] += 1
+        if self.metrics is not None:
+            self.metrics.inc('charset_path_total', path=path)
+    
+    def stats(self):
+        """
+        How often each path was taken
+        
+        Returns:
+            dict: Path -> count, for every path in PATHS
+        """
+        with self._lock:
+            return {path: self.paths[path] for path in self.PATHS}
+
+def _is_utf8(content):
+    """
+    Check whether bytes are valid UTF-8
+    """
+    try:
+        content.decode('utf-8')
+    except UnicodeDecodeError:
+        return False
+    return True
@@ -6,14 +6,96 @@ Configuration settings for the web scraper
 DEFAULT_DELAY = 1  # seconds between requests
 DEFAULT_TIMEOUT = 10  # request timeout in seconds
 MAX_RETRIES = 3
+BACKOFF_FACTOR = 0.5  # base retry delay in seconds, doubled per attempt
+MAX_BACKOFF = 60  # cap for a single retry delay, including Retry-After
+
+# Circuit breaker: stop requesting a host after this many consecutive
+# failures, then probe it again after the reset timeout
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_RESET_TIMEOUT = 60  # seconds
+
+# Session settings
+POOL_CONNECTIONS = 100  # per-host connection pools kept alive
+POOL_MAXSIZE = 16  # connections kept per host
+DNS_CACHE_TTL = 300  # seconds, used when WebScraper(dns_cache=True)
+
+# Parser settings ('lxml', 'html.parser' or 'html5lib'); falls back to
+# 'html.parser' when the preferred parser is not installed
+DEFAULT_PARSER = 'lxml'
 
 # Output settings
 OUTPUT_DIRECTORY = 'output'
+GZIP_LEVEL = 6  # several times faster than gzip's default 9 for a few percent in size
+ZSTD_LEVEL = 3
+SHARD_MAX_RECORDS = None  # records per output shard (None: no limit)
+SHARD_MAX_BYTES = 128 * 1024 * 1024  # uncompressed bytes per output shard
 LOG_LEVEL = 'INFO'
 
+# Crawl frontier settings
+DEFAULT_MAX_DEPTH = 3
+FRONTIER_CAPACITY = 10000000  # URLs the seen-set is sized for
+FRONTIER_ERROR_RATE = 0.001  # seen-set false positive rate at capacity
+
+# robots.txt and sitemap settings
+ROBOTS_USER_AGENT = '*'  # product token matched against User-agent lines
+ROBOTS_TTL = 24 * 3600
+ROBOTS_ERROR_TTL = 300  # hosts whose robots.txt failed are retried after this
+ROBOTS_MAX_BYTES = 512 * 1024
+ROBOTS_MAX_HOSTS = 10000
+ROBOTS_MAX_CRAWL_DELAY = 60  # cap for Crawl-delay values
+SITEMAP_MAX_BYTES = 64 * 1024 * 1024  # uncompressed, per sitemap file
+SITEMAP_MAX_DEPTH = 3  # nested sitemap index levels
+
+# Streaming settings (WebScraper(stream=True) and WebScraper.iter_links)
+STREAM_MAX_BYTES = 10 * 1024 * 1024  # decoded body size cap
+STREAM_CHUNK_SIZE = 64 * 1024
+STREAM_CONTENT_TYPES = ('text/html', 'application/xhtml+xml')
+
+# Near-duplicate detection settings
+DEDUP_MAX_DISTANCE = 3  # SimHash bits that may differ between near-duplicates
+DEDUP_SHINGLE_SIZE = 3  # words per shingle
+DEDUP_MIN_TOKENS = 20  # shorter pages are never flagged
+
+# Incremental re-crawl state (pipeline.scrape_iter(state=...))
+STATE_DB_PATH = 'crawl_state.sqlite3'
+RECRAWL_DEFAULT_INTERVAL = 24 * 3600  # seconds until a new page is rechecked
+RECRAWL_MIN_INTERVAL = 3600
+RECRAWL_MAX_INTERVAL = 30 * 24 * 3600
+
+# Shared work queue settings (work_queue.py)
+QUEUE_DB_PATH = 'work_queue.sqlite3'
+QUEUE_PARTITIONS = 64  # host-hash partitions, fixed when the queue is created
+QUEUE_VISIBILITY_TIMEOUT = 300  # seconds before an unrenewed lease is handed to another worker
+QUEUE_MAX_ATTEMPTS = 3
+QUEUE_IDLE_TIMEOUT = 30  # seconds a worker waits for other workers' leases to finish
+
+# Background output sink (output_sink.py)
+SINK_MAX_PENDING_BYTES = 64 * 1024 * 1024  # queued characters before writers block
+SINK_BATCH_BYTES = 1024 * 1024  # characters buffered per file between writes
+SINK_FSYNC_INTERVAL = 5.0  # seconds between fsyncs of open files
+
+# Compiled CSS selectors kept by extraction_plan.compile_selector
+SELECTOR_CACHE_SIZE = 1024
+
+# Bounded-memory scraping (WebScraper.scrape_pages, scrape_iter(low_memory=True))
+MAX_LIVE_TREES = 2  # pages parsed at once; downloads still use every worker
+
+# Charset detection (charset.py)
+CHARSET_SNIFF_BYTES = 4096  # bytes searched for a <meta> charset, as browsers do
+CHARSET_MAX_HOSTS = 10000  # hosts whose detected encoding is remembered
+
+# Link extraction (link_extractor.py)
+LINK_SCHEMES = ('http', 'https')  # other schemes (mailto:, javascript:, ...) are dropped
+TRACKING_PARAMS = ('gclid', 'dclid', 'fbclid', 'msclkid', 'yclid', 'mc_cid', 'mc_eid', '_ga', '_gl', 'igshid')
+TRACKING_PARAM_PREFIXES = ('utm_',)
+
+# Response cache settings (opt-in via WebScraper(cache=...))
+CACHE_DIRECTORY = 'cache'
+CACHE_MAX_BYTES = 512 * 1024 * 1024
+
 # User agent strings (rotate if needed)
 USER_AGENTS = [
     'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
     'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
     'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-]
\ No newline at end of file
+]
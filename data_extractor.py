@@ -2,11 +2,24 @@
 Data extraction utilities for common web scraping patterns
 """
 
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, Tag
 import re
 
+from extraction_plan import select
+from link_extractor import LinkExtractor
+from metrics import timed
+from table_extractor import extract_table
+
 class DataExtractor:
+    # Fields supported by extract_fields
+    FIELDS = ('titles', 'paragraphs', 'images', 'links', 'text', 'emails', 'tables')
+    TITLE_TAGS = ('h1', 'h2', 'h3')
+    EMAIL_PATTERN = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
+    # Resolves and normalizes the 'links' field of extract_fields
+    LINK_EXTRACTOR = LinkExtractor()
+    
     @staticmethod
+    @timed('extract_seconds', extractor='titles')
     def extract_titles(soup, title_selector='h1, h2, h3'):
         """
         Extract titles from HTML
@@ -22,13 +35,14 @@ class DataExtractor:
             return []
             
         titles = []
-        for title in soup.select(title_selector):
+        for title in select(soup, title_selector):
             text = title.get_text(strip=True)
             if text:
                 titles.append(text)
         return titles
     
     @staticmethod
+    @timed('extract_seconds', extractor='paragraphs')
     def extract_paragraphs(soup, paragraph_selector='p'):
         """
         Extract paragraphs from HTML
@@ -44,13 +58,14 @@ class DataExtractor:
             return []
             
         paragraphs = []
-        for p in soup.select(paragraph_selector):
+        for p in select(soup, paragraph_selector):
             text = p.get_text(strip=True)
             if text and len(text) > 10:  # Filter very short paragraphs
                 paragraphs.append(text)
         return paragraphs
     
     @staticmethod
+    @timed('extract_seconds', extractor='images')
     def extract_images(soup, base_url):
         """
         Extract image URLs from HTML
@@ -76,6 +91,7 @@ class DataExtractor:
         return images
     
     @staticmethod
+    @timed('extract_seconds', extractor='emails')
     def extract_emails(text):
         """
         Extract email addresses from text
@@ -86,31 +102,142 @@ class DataExtractor:
         Returns:
             list: List of email addresses
         """
-        email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-        return re.findall(email_pattern, text)
+        return DataExtractor.EMAIL_PATTERN.findall(text)
     
     @staticmethod
-    def extract_table_data(soup, table_selector='table'):
+    @timed('extract_seconds', extractor='table_data')
+    def extract_table_data(soup, table_selector='table', columnar=False):
         """
         Extract data from HTML tables
         
         Args:
             soup (BeautifulSoup): Parsed HTML
             table_selector (str): CSS selector for tables
+            columnar (bool): Return typed ColumnarTable objects, with
+                rowspan/colspan expanded, detected headers and parsed
+                int/float/percent/currency/date columns
             
         Returns:
-            list: List of tables, each table is a list of rows
+            list: List of tables, each table is a list of rows (or a
+                ColumnarTable if columnar)
         """
         if not soup:
             return []
+        
+        if columnar:
+            tables = (extract_table(table) for table in select(soup, table_selector))
+            return [table for table in tables if table is not None]
             
         tables_data = []
-        for table in soup.select(table_selector):
-            table_data = []
-            for row in table.find_all('tr'):
-                row_data = [cell.get_text(strip=True) for cell in row.find_all(['td', 'th'])]
-                if row_data:
-                    table_data.append(row_data)
+        for table in select(soup, table_selector):
+            table_data = DataExtractor._table_rows(table)
             if table_data:
                 tables_data.append(table_data)
-        return tables_data
\ No newline at end of file
+        return tables_data
+    
+    @staticmethod
+    def _table_rows(table):
+        """
+        Extract the cell texts of one table
+        
+        Args:
+            table (Tag): Table element
+        
+        Returns:
+            list: List of rows, each a list of cell texts
+        """
+        table_data = []
+        for row in table.find_all('tr'):
+            row_data = [cell.get_text(strip=True) for cell in row.find_all(['td', 'th'])]
+            if row_data:
+                table_data.append(row_data)
+        return table_data
+    
+    @staticmethod
+    @timed('extract_seconds', extractor='fields')
+    def extract_fields(soup, fields, base_url=None, title_tags=TITLE_TAGS):
+        """
+        Extract several fields in a single traversal of the document
+        
+        Values match the individual extract_* methods with their default
+        selectors: 'titles', 'paragraphs', 'images', 'emails' and 'tables'
+        as in DataExtractor, 'text' as WebScraper.extract_text(soup) and
+        'links' as WebScraper.extract_links(soup, base_url) with the default
+        LinkExtractor, except that a <base href> is not applied.
+        
+        Args:
+            soup (BeautifulSoup): Parsed HTML
+            fields (iterable): Names from DataExtractor.FIELDS
+            base_url (str): Base URL for relative links and images
+            title_tags (tuple): Tag names treated as titles
+        
+        Returns:
+            dict: Field name -> extracted value
+        """
+        from urllib.parse import urljoin
+        
+        fields = set(fields)
+        unknown = fields.difference(DataExtractor.FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown fields: {sorted(unknown)}")
+        
+        titles, paragraphs, images, links, strings, tables = [], [], [], [], [], []
+        want_titles = 'titles' in fields
+        want_paragraphs = 'paragraphs' in fields
+        want_images = 'images' in fields
+        want_links = 'links' in fields
+        want_tables = 'tables' in fields
+        want_text = 'text' in fields or 'emails' in fields
+        
+        if soup:
+            string_types = soup.interesting_string_types
+            for node in soup.descendants:
+                if not isinstance(node, Tag):
+                    # Same strings get_text(strip=True) collects
+                    if want_text and type(node) in string_types:
+                        text = node.strip()
+                        if text:
+                            strings.append(text)
+                    continue
+                
+                name = node.name
+                if want_titles and name in title_tags:
+                    text = node.get_text(strip=True)
+                    if text:
+                        titles.append(text)
+                elif want_paragraphs and name == 'p':
+                    text = node.get_text(strip=True)
+                    if text and len(text) > 10:  # Filter very short paragraphs
+                        paragraphs.append(text)
+                elif want_images and name == 'img':
+                    src = node.get('src')
+                    if src is not None:
+                        if not src.startswith(('http://', 'https://')):
+                            src = urljoin(base_url, src)
+                        images.append(src)
+                elif want_links and name == 'a':
+                    href = node.get('href')
+                    if href is not None:
+                        links.append(href)
+                elif want_tables and name == 'table':
+                    table_data = DataExtractor._table_rows(node)
+                    if table_data:
+                        tables.append(table_data)
+        
+        result = {}
+        text = ' '.join(''.join(strings).split())
+        if want_titles:
+            result['titles'] = titles
+        if want_paragraphs:
+            result['paragraphs'] = paragraphs
+        if want_images:
+            result['images'] = images
+        if want_links:
+            result['links'] = list(DataExtractor.LINK_EXTRACTOR.iter_links(links, base_url))
+        if 'text' in fields:
+            result['text'] = text
+        if 'emails' in fields:
+            result['emails'] = DataExtractor.extract_emails(text)
+        if want_tables:
+            result['tables'] = tables
+        return result
\ No newline at end of file
@@ -2,19 +2,27 @@
 Data handling and storage module
 """
 import json
-import csv
 import os
 from datetime import datetime
 
+from output_sink import default_sink, write_atomic
+from stream_writers import JsonLinesWriter, CsvStreamWriter
+
 class DataHandler:
-    def __init__(self, output_dir='output'):
+    def __init__(self, output_dir='output', sink=None):
         """
         Initialize data handler
         
+        Files are handed to a background writer and published atomically,
+        so saving returns before the data is on disk; call flush() to wait.
+        
         Args:
             output_dir (str): Output directory for saved files
+            sink (OutputSink): Background writer (the shared default if None,
+                False to write on the calling thread)
         """
         self.output_dir = output_dir
+        self.sink = default_sink() if sink is None else sink or None
         os.makedirs(output_dir, exist_ok=True)
     
     def save_json(self, data, filename=None):
@@ -33,10 +41,7 @@ class DataHandler:
             filename = f"scraped_data_{timestamp}.json"
         
         filepath = os.path.join(self.output_dir, filename)
-        
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
-        
+        self._publish(filepath, json.dumps(data, indent=2, ensure_ascii=False))
         return filepath
     
     def save_csv(self, data, filename=None):
@@ -44,33 +49,53 @@ class DataHandler:
         Save data as CSV file
         
         Args:
-            data (list): List of dictionaries to save
+            data (iterable): List or iterator of dictionaries to save
             filename (str): Output filename
             
         Returns:
             str: Path to saved file
         """
-        if not data:
+        if isinstance(data, (list, tuple)) and not data:
             return None
         
+        # Single pass: columns are added as new keys appear
+        with self.open_csv(filename) as writer:
+            writer.write_many(data)
+        
+        return writer.filepath
+    
+    def open_jsonl(self, filename=None):
+        """
+        Open a JSON Lines file for streaming records
+        
+        Args:
+            filename (str): Output filename
+        
+        Returns:
+            JsonLinesWriter: Writer; call write(record) and close()
+        """
         if filename is None:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"scraped_data_{timestamp}.csv"
+            filename = f"scraped_data_{timestamp}.jsonl"
         
-        filepath = os.path.join(self.output_dir, filename)
+        return JsonLinesWriter(os.path.join(self.output_dir, filename), sink=self.sink)
+    
+    def open_csv(self, filename=None, fieldnames=None):
+        """
+        Open a CSV file for streaming dictionaries
         
-        # Get all unique keys from all dictionaries
-        fieldnames = set()
-        for item in data:
-            fieldnames.update(item.keys())
-        fieldnames = list(fieldnames)
+        Args:
+            filename (str): Output filename
+            fieldnames (list): Declared columns, or None to grow them as new keys appear
         
-        with open(filepath, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(data)
+        Returns:
+            CsvStreamWriter: Writer; call write(record) and close()
+        """
+        if filename is None:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            filename = f"scraped_data_{timestamp}.csv"
         
-        return filepath
+        return CsvStreamWriter(os.path.join(self.output_dir, filename), fieldnames, sink=self.sink)
     
     def save_text(self, text, filename=None):
         """
@@ -88,8 +113,21 @@ class DataHandler:
             filename = f"scraped_text_{timestamp}.txt"
         
         filepath = os.path.join(self.output_dir, filename)
+        self._publish(filepath, text)
+        return filepath
         
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(text)
+    def _publish(self, filepath, text):
+        """
+        Write a whole file through the sink, or atomically in place without one
+        """
+        if self.sink is not None:
+            self.sink.publish(filepath, text)
+        else:
+            write_atomic(filepath, text)
         
-        return filepath
\ No newline at end of file
+    def flush(self):
+        """
+        Wait until every file saved so far is on disk
+        """
+        if self.sink is not None:
+            self.sink.flush()
\ No newline at end of file
@@ -0,0 +1,248 @@
+"""
+Near-duplicate page detection with 64-bit SimHash fingerprints and a
+banded fingerprint index
+"""
+
+import hashlib
+import json
+import re
+from array import array
+from collections import Counter
+
+import config
+
+TOKEN_PATTERN = re.compile(r'\w+')
+
+# Vote counters for the 64 fingerprint bits are packed into one big integer,
+# 32 bits per bit position, so a shingle's votes are added with eight table
+# lookups instead of a 64-step loop
+_LANE_BITS = 32
+_LANE_MASK = (1 << _LANE_BITS) - 1
+_SPREAD = [
+    [sum(1 << (_LANE_BITS * (8 * byte_index + bit)) for bit in range(8) if value >> bit & 1)
+     for value in range(256)]
+    for byte_index in range(8)
+]
+
+def tokenize(text):
+    """
+    Split text into lowercase word tokens
+    
+    Args:
+        text (str): Page text
+    
+    Returns:
+        list: Tokens
+    """
+    return TOKEN_PATTERN.findall(text.lower())
+
+def simhash_tokens(tokens, shingle_size=config.DEDUP_SHINGLE_SIZE):
+    """
+    64-bit SimHash of a token list, using word shingles weighted by frequency
+    
+    Args:
+        tokens (list): Word tokens
+        shingle_size (int): Words per shingle
+    
+    Returns:
+        int: Fingerprint (0 for empty input)
+    """
+    if len(tokens) <= shingle_size:
+        shingles = Counter([' '.join(tokens)]) if tokens else Counter()
+    else:
+        shingles = Counter(' '.join(tokens[i:i + shingle_size])
+                           for i in range(len(tokens) - shingle_size + 1))
+    votes = 0
+    total = 0
+    spread = _SPREAD
+    for shingle, weight in shingles.items():
+        h = int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'little')
+        bits = (spread[0][h & 255] + spread[1][h >> 8 & 255] + spread[2][h >> 16 & 255]
+                + spread[3][h >> 24 & 255] + spread[4][h >> 32 & 255] + spread[5][h >> 40 & 255]
+                + spread[6][h >> 48 & 255] + spread[7][h >> 56 & 255])
+        votes += bits * weight
+        total += weight
+    
+    fingerprint = 0
+    for bit in range(64):
+        # A bit is set when most of the weight voted for it
+        if 2 * ((votes >> (_LANE_BITS * bit)) & _LANE_MASK) > total:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+def simhash(text, shingle_size=config.DEDUP_SHINGLE_SIZE):
+    """
+    64-bit SimHash of a text
+    
+    Args:
+        text (str): Page text
+        shingle_size (int): Words per shingle
+    
+    Returns:
+        int: Fingerprint
+    """
+    return simhash_tokens(tokenize(text), shingle_size)
+
+def hamming_distance(a, b):
+    """
+    Number of differing bits between two fingerprints
+    """
+    return (a ^ b).bit_count()
+
+class SimHashIndex:
+    def __init__(self, max_distance=config.DEDUP_MAX_DISTANCE):
+        """
+        Index of fingerprints supporting lookups within a Hamming distance
+        
+        Fingerprints are split into max_distance + 1 bands; any fingerprint
+        within max_distance bits agrees exactly on at least one band, so only
+        the bucket for each band has to be scanned. Buckets are arrays of
+        64-bit integers: about 8 bytes per fingerprint per band, so four bands
+        (max_distance=3) cost roughly 32 MB per million pages.
+        
+        Args:
+            max_distance (int): Largest Hamming distance treated as a match
+        """
+        self.max_distance = max_distance
+        num_bands = max_distance + 1
+        width = 64 // num_bands
+        # (shift, mask) per band; the last band takes any leftover bits
+        self._bands = [(i * width, (1 << (width if i < num_bands - 1 else 64 - i * width)) - 1)
+                       for i in range(num_bands)]
+        self._tables = [{} for _ in range(num_bands)]
+        self.count = 0
+    
+    def find(self, fingerprint):
+        """
+        Find an indexed fingerprint within max_distance
+        
+        Args:
+            fingerprint (int): Fingerprint to look up
+        
+        Returns:
+            int: Matching fingerprint, or None
+        """
+        for (shift, mask), table in zip(self._bands, self._tables):
+            bucket = table.get((fingerprint >> shift) & mask)
+            if bucket is None:
+                continue
+            for candidate in bucket:
+                if (candidate ^ fingerprint).bit_count() <= self.max_distance:
+                    return candidate
+        return None
+    
+    def add(self, fingerprint):
+        """
+        Add a fingerprint
+        
+        Args:
+            fingerprint (int): Fingerprint
+        """
+        for (shift, mask), table in zip(self._bands, self._tables):
+            key = (fingerprint >> shift) & mask
+            bucket = table.get(key)
+            if bucket is None:
+                bucket = table[key] = array('Q')
+            bucket.append(fingerprint)
+        self.count += 1
+    
+    def __contains__(self, fingerprint):
+        return self.find(fingerprint) is not None
+    
+    def __len__(self):
+        return self.count
+    
+    def fingerprints(self):
+        """
+        Iterate over every indexed fingerprint once
+        """
+        for bucket in self._tables[0].values():
+            yield from bucket
+    
+    def save(self, path):
+        """
+        Write the index to a file
+        
+        Args:
+            path (str): Output path
+        """
+        header = json.dumps({'max_distance': self.max_distance, 'count': self.count}).encode('utf-8')
+        with open(path, 'wb') as f:
+            f.write(len(header).to_bytes(4, 'little'))
+            f.write(header)
+            for bucket in self._tables[0].values():
+                bucket.tofile(f)
+    
+    @classmethod
+    def load(cls, path):
+        """
+        Read an index written by save()
+        
+        Args:
+            path (str): Input path
+        
+        Returns:
+            SimHashIndex: Restored index
+        """
+        with open(path, 'rb') as f:
+            header_size = int.from_bytes(f.read(4), 'little')
+            header = json.loads(f.read(header_size).decode('utf-8'))
+            stored = array('Q')
+            stored.frombytes(f.read())
+        index = cls(header['max_distance'])
+        for fingerprint in stored:
+            index.add(fingerprint)
+        return index
+
+class NearDuplicateFilter:
+    def __init__(self, max_distance=config.DEDUP_MAX_DISTANCE, shingle_size=config.DEDUP_SHINGLE_SIZE,
+                 min_tokens=config.DEDUP_MIN_TOKENS, index=None):
+        """
+        Flag pages whose text nearly matches a page seen before
+        
+        Args:
+            max_distance (int): Largest fingerprint Hamming distance counted as a duplicate
+            shingle_size (int): Words per shingle
+            min_tokens (int): Pages with fewer words are never flagged (short
+                texts such as error pages collide too easily)
+            index (SimHashIndex): Index to use (a new one if None)
+        """
+        self.shingle_size = shingle_size
+        self.min_tokens = min_tokens
+        self.index = index if index is not None else SimHashIndex(max_distance)
+        self.checked = 0
+        self.duplicates = 0
+    
+    def check(self, text):
+        """
+        Check a page's text, remembering it if it is new
+        
+        Args:
+            text (str): Page text (e.g. from WebScraper.extract_text)
+        
+        Returns:
+            int: Fingerprint of the earlier page it duplicates, or None if new
+        """
+        self.checked += 1
+        tokens = tokenize(text)
+        if len(tokens) < self.min_tokens:
+            return None
+        fingerprint = simhash_tokens(tokens, self.shingle_size)
+        match = self.index.find(fingerprint)
+        if match is not None:
+            self.duplicates += 1
+            return match
+        self.index.add(fingerprint)
+        return None
+    
+    def is_duplicate(self, text):
+        """
+        Check a page's text, remembering it if it is new
+        
+        Args:
+            text (str): Page text
+        
+        Returns:
+            bool: True if the page nearly matches one seen before
+        """
+        return self.check(text) is not None
@@ -0,0 +1,301 @@
+"""
+Declarative extraction plans
+A plan is a named set of fields (selector, attribute, post-processing,
+type) compiled once and applied to many documents. CSS selectors are
+compiled through a shared cache, so no selector is parsed twice.
+"""
+
+import json
+import re
+from functools import lru_cache
+from urllib.parse import urljoin
+
+import soupsieve
+
+import config
+from link_extractor import LinkExtractor
+
+@lru_cache(maxsize=config.SELECTOR_CACHE_SIZE)
+def compile_selector(selector):
+    """
+    Compile a CSS selector once and reuse it
+    
+    Compiled selectors skip the per-call namespace handling and cache lookup
+    that soup.select(str) does; they are meant for HTML documents, where no
+    namespace prefixes are needed.
+    
+    Args:
+        selector (str): CSS selector
+    
+    Returns:
+        soupsieve.SoupSieve: Compiled selector
+    """
+    return soupsieve.compile(selector)
+
+def select(soup, selector, limit=0):
+    """
+    soup.select() with a cached compiled selector
+    
+    Args:
+        soup (BeautifulSoup or Tag): Document or element to search
+        selector (str): CSS selector
+        limit (int): Max matches (0 for all)
+    
+    Returns:
+        list: Matching elements in document order
+    """
+    return compile_selector(selector).select(soup, limit)
+
+def select_one(soup, selector):
+    """
+    soup.select_one() with a cached compiled selector
+    
+    Args:
+        soup (BeautifulSoup or Tag): Document or element to search
+        selector (str): CSS selector
+    
+    Returns:
+        Tag: First match, or None
+    """
+    return compile_selector(selector).select_one(soup)
+
+def _number(value, kind):
+    """
+    Parse '1,234.5'-style numbers
+    """
+    return kind(value.replace(',', '').strip())
+
+# Post-processing steps usable by name in JSON plans
+PROCESSORS = {
+    'strip': str.strip,
+    'lower': str.lower,
+    'upper': str.upper,
+    'collapse': lambda value: ' '.join(value.split()),
+}
+
+# Resolves and normalizes 'link' typed values
+LINK_EXTRACTOR = LinkExtractor()
+
+@lru_cache(maxsize=64)
+def _link_resolver(base_url):
+    """
+    Shared resolver for a page URL, so the base is parsed once per page
+    """
+    return LINK_EXTRACTOR.resolver(base_url)
+
+# Value types; 'url' resolves relative URLs against the page URL, 'link'
+# also normalizes them like WebScraper.extract_links and drops links with
+# other schemes (mailto:, javascript:, ...)
+TYPES = {
+    'str': lambda value, base_url: value,
+    'int': lambda value, base_url: _number(value, int),
+    'float': lambda value, base_url: _number(value, float),
+    'url': lambda value, base_url: urljoin(base_url, value.strip()) if base_url else value.strip(),
+    'link': lambda value, base_url: _link_resolver(base_url)(value),
+}
+
+class Field:
+    def __init__(self, name, selector=None, attribute=None, many=False, process=None, type='str',
+                 default=None, unique=False, pattern=None):
+        """
+        One value extracted from a page
+        
+        Args:
+            name (str): Key in the extracted record
+            selector (str): CSS selector (None for the whole document)
+            attribute (str): Attribute to read (None for the stripped text)
+            many (bool): Extract every match as a list instead of the first
+            process (callable or str or list): Steps applied to each string
+                value before conversion, as callables or PROCESSORS names
+            type (str or callable): Name from TYPES or callable(value) -> value;
+                values that fail to convert become the default
+            default: Value used when nothing matches (many=True yields [])
+            unique (bool): With many=True, drop repeated values keeping order
+            pattern (str): Regex whose first group (or whole match) is kept;
+                non-matching values are dropped
+        """
+        if isinstance(type, str) and type not in TYPES:
+            raise ValueError(f"Unknown type {type!r} for field {name!r}; expected one of {sorted(TYPES)}")
+        self.name = name
+        self.selector = selector
+        self.attribute = attribute
+        self.many = many
+        self.type = type
+        self.default = default
+        self.unique = unique
+        self.pattern = re.compile(pattern) if pattern else None
+        steps = process if isinstance(process, (list, tuple)) else [process] if process else []
+        self.process = [PROCESSORS[step] if isinstance(step, str) else step for step in steps]
+        self.compiled = compile_selector(selector) if selector else None
+        self._convert = TYPES[type] if isinstance(type, str) else (lambda value, base_url: type(value))
+    
+    def extract(self, soup, base_url=None):
+        """
+        Extract this field from a document
+        
+        Args:
+            soup (BeautifulSoup): Parsed HTML
+            base_url (str): Page URL, for 'url' and 'link' typed fields
+        
+        Returns:
+            The value, a list of values (many=True) or the default
+        """
+        if self.compiled is None:
+            elements = [soup]
+        elif self.many:
+            elements = self.compiled.select(soup)
+        else:
+            element = self.compiled.select_one(soup)
+            elements = [element] if element is not None else []
+        
+        values = []
+        for element in elements:
+            value = self._value(element, base_url)
+            if value is not None:
+                values.append(value)
+                if not self.many:
+                    break
+        if self.many:
+            return list(dict.fromkeys(values)) if self.unique else values
+        return values[0] if values else self.default
+    
+    def _value(self, element, base_url):
+        """
+        Read, post-process and convert one element's value (None to drop it)
+        """
+        if self.attribute is None:
+            value = element.get_text(strip=True)
+        else:
+            value = element.get(self.attribute)
+            if value is None:
+                return None
+            if isinstance(value, list):  # multi-valued attributes such as class
+                value = ' '.join(value)
+        for step in self.process:
+            value = step(value)
+        if self.pattern is not None:
+            match = self.pattern.search(value)
+            if match is None:
+                return None
+            value = match.group(1) if self.pattern.groups else match.group(0)
+        try:
+            return self._convert(value, base_url)
+        except (TypeError, ValueError):
+            return self.default
+    
+    def to_dict(self):
+        """
+        JSON-compatible spec (callables cannot be serialized)
+        
+        Returns:
+            dict: Keyword arguments that rebuild the field
+        """
+        names = {step: name for name, step in PROCESSORS.items()}
+        if any(step not in names for step in self.process) or not isinstance(self.type, str):
+            raise ValueError(f"Field {self.name!r} uses callables and cannot be serialized")
+        spec = {
+            'selector': self.selector,
+            'attribute': self.attribute,
+            'many': self.many,
+            'process': [names[step] for step in self.process],
+            'type': self.type if self.type != 'str' else None,
+            'default': self.default,
+            'unique': self.unique,
+            'pattern': self.pattern.pattern if self.pattern else None,
+        }
+        return {key: value for key, value in spec.items() if value is not None and value is not False and value != []}
+
+class ExtractionPlan:
+    def __init__(self, fields, name=None):
+        """
+        Compile a set of fields into a reusable plan
+        
+        Args:
+            fields (list): Field objects (names must be unique)
+            name (str): Plan name, e.g. the site it targets
+        """
+        names = [field.name for field in fields]
+        duplicates = sorted({name for name in names if names.count(name) > 1})
+        if duplicates:
+            raise ValueError(f"Duplicate field names: {duplicates}")
+        self.fields = list(fields)
+        self.name = name
+    
+    def apply(self, soup, base_url=None):
+        """
+        Extract every field from a document
+        
+        Args:
+            soup (BeautifulSoup): Parsed HTML
+            base_url (str): Page URL, for 'url' and 'link' typed fields
+        
+        Returns:
+            dict: Field name -> value (defaults when soup is None)
+        """
+        if not soup:
+            return {field.name: [] if field.many else field.default for field in self.fields}
+        return {field.name: field.extract(soup, base_url) for field in self.fields}
+    
+    def record(self, scraper, url, soup):
+        """
+        Record extractor for pipeline.scrape_iter and work_queue.run_worker
+        
+        Args:
+            scraper (WebScraper): Scraper that fetched the page (unused)
+            url (str): Page URL
+            soup (BeautifulSoup): Parsed page
+        
+        Returns:
+            dict: {'url': url} followed by the plan's fields
+        """
+        record = {'url': url}
+        record.update(self.apply(soup, url))
+        return record
+    
+    @classmethod
+    def from_dict(cls, spec):
+        """
+        Build a plan from a JSON-style spec
+        
+        Args:
+            spec (dict): {'name': ..., 'fields': {field name: Field keyword
+                arguments}}; process steps are PROCESSORS names
+        
+        Returns:
+            ExtractionPlan: Compiled plan
+        """
+        fields = [Field(name, **options) for name, options in spec['fields'].items()]
+        return cls(fields, spec.get('name'))
+    
+    def to_dict(self):
+        """
+        Spec accepted by from_dict()
+        
+        Returns:
+            dict: JSON-compatible plan
+        """
+        return {'name': self.name, 'fields': {field.name: field.to_dict() for field in self.fields}}
+    
+    @classmethod
+    def load(cls, path):
+        """
+        Load a plan saved as JSON
+        
+        Args:
+            path (str): JSON file path
+        
+        Returns:
+            ExtractionPlan: Compiled plan
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+    
+    def save(self, path):
+        """
+        Save the plan as JSON
+        
+        Args:
+            path (str): JSON file path
+        """
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2)
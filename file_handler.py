@@ -1,12 +1,18 @@
 """
 File handling utilities for saving scraped data
+Saved files go through the shared background output sink (see output_sink.py)
 """
 
+import io
 import json
 import csv
 import os
 from datetime import datetime
 
+from output_sink import default_sink
+from stream_writers import (JsonLinesWriter, CsvStreamWriter, ShardedJsonLinesWriter,
+                            COMPRESSION_SUFFIXES)
+
 class FileHandler:
     @staticmethod
     def ensure_directory(directory):
@@ -20,7 +26,7 @@ class FileHandler:
             os.makedirs(directory)
     
     @staticmethod
-    def save_json(data, filename, directory='output'):
+    def save_json(data, filename, directory='output', indent=2, compression=None):
         """
         Save data as JSON file
         
@@ -28,14 +34,17 @@ class FileHandler:
             data: Data to save
             filename (str): Output filename
             directory (str): Output directory
-        """
-        FileHandler.ensure_directory(directory)
-        filepath = os.path.join(directory, f"{filename}.json")
+            indent (int): Pretty-print indent, or None for compact output
+            compression (str): None, 'gzip' (.json.gz) or 'zstd' (.json.zst)
         
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        Returns:
+            Future: Resolves to the file path once it is written
+        """
+        filepath = os.path.join(directory, f"{filename}.json{COMPRESSION_SUFFIXES.get(compression, '')}")
         
-        print(f"Data saved to: {filepath}")
+        separators = None if indent is not None else (',', ':')
+        text = json.dumps(data, indent=indent, separators=separators, ensure_ascii=False)
+        return default_sink().publish(filepath, text, compression)
     
     @staticmethod
     def save_csv(data, filename, directory='output'):
@@ -46,22 +55,77 @@ class FileHandler:
             data (list): List of dictionaries or lists
             filename (str): Output filename
             directory (str): Output directory
+        
+        Returns:
+            Future: Resolves to the file path once it is written
         """
-        FileHandler.ensure_directory(directory)
         filepath = os.path.join(directory, f"{filename}.csv")
         
-        with open(filepath, 'w', newline='', encoding='utf-8') as f:
-            if data and isinstance(data[0], dict):
-                # List of dictionaries
-                writer = csv.DictWriter(f, fieldnames=data[0].keys())
-                writer.writeheader()
-                writer.writerows(data)
-            else:
-                # List of lists
-                writer = csv.writer(f)
-                writer.writerows(data)
-        
-        print(f"Data saved to: {filepath}")
+        f = io.StringIO(newline='')
+        if data and isinstance(data[0], dict):
+            # List of dictionaries
+            writer = csv.DictWriter(f, fieldnames=data[0].keys())
+            writer.writeheader()
+            writer.writerows(data)
+        else:
+            # List of lists
+            writer = csv.writer(f)
+            writer.writerows(data)
+        
+        return default_sink().publish(filepath, f.getvalue(), newline='')
+    
+    @staticmethod
+    def open_jsonl(filename, directory='output', compression=None):
+        """
+        Open a JSON Lines file for streaming records
+        
+        Args:
+            filename (str): Output filename
+            directory (str): Output directory
+            compression (str): None, 'gzip' (.jsonl.gz) or 'zstd' (.jsonl.zst)
+        
+        Returns:
+            JsonLinesWriter: Writer; call write(record) and close()
+        """
+        filepath = os.path.join(directory, f"{filename}.jsonl{COMPRESSION_SUFFIXES.get(compression, '')}")
+        return JsonLinesWriter(filepath, compression, default_sink())
+    
+    @staticmethod
+    def open_shards(name, directory='output', compression='gzip', max_records=None,
+                    max_bytes=None, partition_by=None):
+        """
+        Open a rotated, optionally partitioned set of JSON Lines shards
+        
+        Args:
+            name (str): Subdirectory holding the shards
+            directory (str): Output directory
+            compression (str): None, 'gzip' or 'zstd'
+            max_records (int): Records per shard (defaults to config.SHARD_MAX_RECORDS)
+            max_bytes (int): Uncompressed bytes per shard (defaults to config.SHARD_MAX_BYTES)
+            partition_by (str or callable): 'host', 'date' or callable(record) -> name
+        
+        Returns:
+            ShardedJsonLinesWriter: Writer; close() returns the shard paths
+        """
+        options = {key: value for key, value in
+                   (('max_records', max_records), ('max_bytes', max_bytes)) if value is not None}
+        return ShardedJsonLinesWriter(os.path.join(directory, name), compression=compression,
+                                      partition_by=partition_by, sink=default_sink(), **options)
+    
+    @staticmethod
+    def open_csv(filename, directory='output', fieldnames=None):
+        """
+        Open a CSV file for streaming dictionaries
+        
+        Args:
+            filename (str): Output filename
+            directory (str): Output directory
+            fieldnames (list): Declared columns, or None to grow them as new keys appear
+        
+        Returns:
+            CsvStreamWriter: Writer; call write(record) and close()
+        """
+        return CsvStreamWriter(os.path.join(directory, f"{filename}.csv"), fieldnames, sink=default_sink())
     
     @staticmethod
     def save_text(text, filename, directory='output'):
@@ -72,14 +136,20 @@ class FileHandler:
             text (str): Text to save
             filename (str): Output filename
             directory (str): Output directory
+        
+        Returns:
+            Future: Resolves to the file path once it is written
         """
-        FileHandler.ensure_directory(directory)
         filepath = os.path.join(directory, f"{filename}.txt")
-        
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(text)
-        
-        print(f"Text saved to: {filepath}")
+        return default_sink().publish(filepath, text)
+    
+    @staticmethod
+    def flush():
+        """
+        Wait until every queued save, and every closed streamed file, has
+        been written and renamed into place
+        """
+        default_sink().flush()
     
     @staticmethod
     def generate_filename(prefix='scraped_data'):
@@ -1,11 +1,15 @@
 """
 File writing utilities for saving scraped data
+Saved files go through the shared background output sink (see output_sink.py)
 """
+import io
 import json
 import csv
 import os
 from datetime import datetime
 
+from output_sink import default_sink
+
 class FileWriter:
     @staticmethod
     def ensure_directory(filepath):
@@ -28,11 +32,11 @@ class FileWriter:
             data: Data to save
             filename (str): Output filename
             indent (int): JSON indentation
+        
+        Returns:
+            Future: Resolves to the file path once it is written
         """
-        FileWriter.ensure_directory(filename)
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=indent, ensure_ascii=False)
-        print(f"Data saved to {filename}")
+        return default_sink().publish(filename, json.dumps(data, indent=indent, ensure_ascii=False))
     
     @staticmethod
     def save_csv(data, filename, headers=None):
@@ -43,23 +47,24 @@ class FileWriter:
             data (list): List of dictionaries or lists
             filename (str): Output filename
             headers (list): Column headers for CSV
-        """
-        FileWriter.ensure_directory(filename)
         
-        with open(filename, 'w', newline='', encoding='utf-8') as f:
-            if data and isinstance(data[0], dict):
-                # Data is list of dictionaries
-                writer = csv.DictWriter(f, fieldnames=headers or data[0].keys())
-                writer.writeheader()
-                writer.writerows(data)
-            else:
-                # Data is list of lists
-                writer = csv.writer(f)
-                if headers:
-                    writer.writerow(headers)
-                writer.writerows(data)
+        Returns:
+            Future: Resolves to the file path once it is written
+        """
+        f = io.StringIO(newline='')
+        if data and isinstance(data[0], dict):
+            # Data is list of dictionaries
+            writer = csv.DictWriter(f, fieldnames=headers or data[0].keys())
+            writer.writeheader()
+            writer.writerows(data)
+        else:
+            # Data is list of lists
+            writer = csv.writer(f)
+            if headers:
+                writer.writerow(headers)
+            writer.writerows(data)
         
-        print(f"Data saved to {filename}")
+        return default_sink().publish(filename, f.getvalue(), newline='')
     
     @staticmethod
     def save_text(text, filename):
@@ -69,11 +74,11 @@ class FileWriter:
         Args:
             text (str): Text content to save
             filename (str): Output filename
+        
+        Returns:
+            Future: Resolves to the file path once it is written
         """
-        FileWriter.ensure_directory(filename)
-        with open(filename, 'w', encoding='utf-8') as f:
-            f.write(text)
-        print(f"Text saved to {filename}")
+        return default_sink().publish(filename, text)
     
     @staticmethod
     def generate_filename(base_name, extension, timestamp=True):
@@ -0,0 +1,318 @@
+"""
+Crawl frontier: URL canonicalization, compact seen-set, depth and domain
+limits, priority ordering and resumable checkpoints
+"""
+
+import hashlib
+import heapq
+import itertools
+import json
+import math
+import os
+from urllib.parse import urlparse
+
+import config
+from url_utils import normalize_url
+
+class BloomFilter:
+    def __init__(self, capacity=config.FRONTIER_CAPACITY, error_rate=config.FRONTIER_ERROR_RATE):
+        """
+        Initialize a Bloom filter
+        
+        Memory is about 1.2 bytes per item at a 0.1% false positive rate,
+        so tens of millions of URLs fit in tens of MB. A false positive means
+        a URL is wrongly treated as seen and skipped.
+        
+        Args:
+            capacity (int): Expected number of items
+            error_rate (float): Target false positive rate at capacity
+        """
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+    
+    def _positions(self, item):
+        """
+        Bit positions for an item, using double hashing over one digest
+        
+        Args:
+            item (str): Item to hash
+        
+        Returns:
+            generator: Bit positions
+        """
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.num_bits for i in range(self.num_hashes))
+    
+    def add(self, item):
+        """
+        Add an item
+        
+        Args:
+            item (str): Item to add
+        
+        Returns:
+            bool: True if the item was not (probably) present before
+        """
+        added = False
+        bits = self.bits
+        for pos in self._positions(item):
+            byte, mask = pos >> 3, 1 << (pos & 7)
+            if not bits[byte] & mask:
+                bits[byte] |= mask
+                added = True
+        if added:
+            self.count += 1
+        return added
+    
+    def __contains__(self, item):
+        bits = self.bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+    
+    def __len__(self):
+        return self.count
+    
+    def save(self, path):
+        """
+        Write the filter to a file
+        
+        Args:
+            path (str): Output path
+        """
+        header = json.dumps({
+            'capacity': self.capacity,
+            'error_rate': self.error_rate,
+            'count': self.count,
+        }).encode('utf-8')
+        with open(path, 'wb') as f:
+            f.write(len(header).to_bytes(4, 'little'))
+            f.write(header)
+            f.write(self.bits)
+    
+    @classmethod
+    def load(cls, path):
+        """
+        Read a filter written by save()
+        
+        Args:
+            path (str): Input path
+        
+        Returns:
+            BloomFilter: Restored filter
+        """
+        with open(path, 'rb') as f:
+            header_size = int.from_bytes(f.read(4), 'little')
+            header = json.loads(f.read(header_size).decode('utf-8'))
+            bloom = cls(header['capacity'], header['error_rate'])
+            bloom.bits = bytearray(f.read())
+        bloom.count = header['count']
+        return bloom
+
+class CrawlFrontier:
+    def __init__(self, max_depth=config.DEFAULT_MAX_DEPTH, allowed_domains=None, priority=None,
+                 seen=None):
+        """
+        Initialize the crawl frontier
+        
+        Args:
+            max_depth (int): Maximum link depth from the seeds (None for no limit)
+            allowed_domains (list): Domains to stay on; subdomains are included
+                (None allows every domain)
+            priority (callable): priority(url, depth) -> number, lower is
+                fetched first (defaults to breadth-first by depth)
+            seen (BloomFilter): Seen-set to use (a default-sized filter if None)
+        """
+        self.max_depth = max_depth
+        self.allowed_domains = [d.lower().lstrip('.') for d in allowed_domains] if allowed_domains else None
+        self.priority = priority
+        self.seen = seen if seen is not None else BloomFilter()
+        self._heap = []
+        self._in_progress = {}  # url -> (priority, depth) popped but not yet done
+        self._counter = itertools.count()
+    
+    def add(self, url, depth=0, priority=None):
+        """
+        Queue a URL unless it was already seen or falls outside the limits
+        
+        Args:
+            url (str): Absolute URL
+            depth (int): Link depth from the seeds
+            priority (float): Explicit priority overriding the priority function
+        
+        Returns:
+            bool: True if the URL was queued
+        """
+        if self.max_depth is not None and depth > self.max_depth:
+            return False
+        parsed = urlparse(url)
+        if parsed.scheme not in ('http', 'https') or not parsed.hostname:
+            return False
+        if not self._domain_allowed(parsed.hostname):
+            return False
+        
+        url = normalize_url(url)
+        if not self.seen.add(url):
+            return False
+        
+        if priority is None:
+            priority = self.priority(url, depth) if self.priority else depth
+        heapq.heappush(self._heap, (priority, next(self._counter), url, depth))
+        return True
+    
+    def add_many(self, urls, depth=0):
+        """
+        Queue several URLs at the same depth
+        
+        Args:
+            urls (iterable): Absolute URLs
+            depth (int): Link depth from the seeds
+        
+        Returns:
+            int: Number of URLs queued
+        """
+        return sum(1 for url in urls if self.add(url, depth))
+    
+    def pop(self):
+        """
+        Take the highest priority URL
+        
+        The URL stays in-progress until done() is called, so a checkpoint taken
+        in between still includes it.
+        
+        Returns:
+            tuple: (url, depth) or None if the frontier is empty
+        """
+        if not self._heap:
+            return None
+        priority, _, url, depth = heapq.heappop(self._heap)
+        self._in_progress[url] = (priority, depth)
+        return url, depth
+    
+    def done(self, url):
+        """
+        Mark a popped URL as finished
+        
+        Args:
+            url (str): URL returned by pop()
+        """
+        self._in_progress.pop(url, None)
+    
+    def __len__(self):
+        return len(self._heap)
+    
+    def _domain_allowed(self, host):
+        """
+        Check a host against the allowed domains
+        
+        Args:
+            host (str): Lowercased host name
+        
+        Returns:
+            bool: True if the host may be crawled
+        """
+        if self.allowed_domains is None:
+            return True
+        return any(host == domain or host.endswith('.' + domain) for domain in self.allowed_domains)
+    
+    def checkpoint(self, path):
+        """
+        Save the frontier to disk so a killed crawl can resume
+        
+        Writes path (queue state as JSON) and path + '.bloom' (seen-set),
+        each through a temporary file and rename. URLs popped but not marked
+        done are saved as queued again.
+        
+        Args:
+            path (str): Checkpoint path
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        queue = [[priority, url, depth] for priority, _, url, depth in sorted(self._heap)]
+        queue.extend([priority, url, depth] for url, (priority, depth) in self._in_progress.items())
+        state = {
+            'max_depth': self.max_depth,
+            'allowed_domains': self.allowed_domains,
+            'queue': queue,
+        }
+        
+        self.seen.save(path + '.bloom.tmp')
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(path + '.bloom.tmp', path + '.bloom')
+        os.replace(path + '.tmp', path)
+    
+    @classmethod
+    def load(cls, path, priority=None):
+        """
+        Restore a frontier saved by checkpoint()
+        
+        Args:
+            path (str): Checkpoint path
+            priority (callable): Priority function for newly added URLs
+        
+        Returns:
+            CrawlFrontier: Restored frontier
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        frontier = cls(
+            max_depth=state['max_depth'],
+            allowed_domains=state['allowed_domains'],
+            priority=priority,
+            seen=BloomFilter.load(path + '.bloom'),
+        )
+        for item_priority, url, depth in state['queue']:
+            heapq.heappush(frontier._heap, (item_priority, next(frontier._counter), url, depth))
+        return frontier
+
+def crawl(scraper, frontier, max_pages=None, filter_pattern=None, checkpoint_path=None,
+          checkpoint_every=100):
+    """
+    Crawl from a frontier, following links found with WebScraper.extract_links
+    
+    Pages are fetched in batches through WebScraper.get_pages, so the
+    scraper's concurrency and politeness settings apply.
+    
+    Args:
+        scraper (WebScraper): Scraper used to fetch and extract links
+        frontier (CrawlFrontier): Frontier holding the seeds
+        max_pages (int): Stop after this many pages (None for no limit)
+        filter_pattern (str): Only follow links containing this pattern
+        checkpoint_path (str): Where to checkpoint the frontier (None to disable)
+        checkpoint_every (int): Pages between checkpoints
+    
+    Yields:
+        tuple: (url, depth, soup) for each successfully fetched page
+    """
+    fetched = 0
+    last_checkpoint = 0
+    batch_size = scraper.max_workers * 4
+    while len(frontier) and (max_pages is None or fetched < max_pages):
+        limit = batch_size if max_pages is None else min(batch_size, max_pages - fetched)
+        batch = {}
+        while len(batch) < limit:
+            item = frontier.pop()
+            if item is None:
+                break
+            batch[item[0]] = item[1]
+        
+        for url, soup in scraper.get_pages(batch):
+            depth = batch[url]
+            if not isinstance(soup, Exception):
+                links = scraper.extract_links(soup, url, filter_pattern)
+                frontier.add_many(links, depth + 1)
+                fetched += 1
+                yield url, depth, soup
+            frontier.done(url)
+            if checkpoint_path and fetched - last_checkpoint >= checkpoint_every:
+                frontier.checkpoint(checkpoint_path)
+                last_checkpoint = fetched
+    
+    if checkpoint_path:
+        frontier.checkpoint(checkpoint_path)
@@ -0,0 +1,349 @@
+"""
+Link extraction for large pages
+Resolves hrefs against a base URL that is parsed once per page, normalizes
+them (fragment, scheme/host case, default port, tracking parameters),
+filters them against include/exclude pattern sets and drops duplicates
+while keeping document order
+"""
+
+import re
+from functools import lru_cache
+from urllib.parse import urljoin, urlsplit
+
+import config
+from url_utils import normalize_netloc
+
+# Above this many prefixes, matching switches from one startswith() call to
+# a set lookup per distinct prefix length
+PREFIX_TUPLE_LIMIT = 8
+
+_SCHEME = re.compile(r'([A-Za-z][A-Za-z0-9+.-]*):')
+# Browsers remove tabs and newlines anywhere in a URL
+_URL_WHITESPACE = re.compile(r'[\t\n\r]')
+
+class PatternSet:
+    def __init__(self, substrings=(), prefixes=(), regexes=()):
+        """
+        URL patterns matched together: a URL matches if any pattern does
+        
+        Substrings are searched with one compiled alternation, prefixes with
+        a single startswith() call (or, for many prefixes, one set lookup per
+        distinct prefix length) and regexes as one combined pattern, so the
+        cost grows with the number of pattern kinds rather than patterns.
+        
+        Args:
+            substrings (iterable): Strings the URL must contain
+            prefixes (iterable): Strings the URL must start with
+            regexes (iterable): Regular expressions searched in the URL
+        """
+        self.substrings = tuple(dict.fromkeys(substrings))
+        self.prefixes = tuple(dict.fromkeys(prefixes))
+        self.regexes = tuple(getattr(regex, 'pattern', regex) for regex in regexes)
+        
+        checks = []
+        if len(self.substrings) == 1:
+            needle = self.substrings[0]
+            checks.append(lambda url: needle in url)
+        elif self.substrings:
+            # Longest first, so a shorter alternative never hides a longer one
+            needles = sorted(self.substrings, key=len, reverse=True)
+            checks.append(re.compile('|'.join(map(re.escape, needles))).search)
+        if len(self.prefixes) > PREFIX_TUPLE_LIMIT:
+            checks.append(self._prefix_lookup(self.prefixes))
+        elif self.prefixes:
+            prefixes = self.prefixes
+            checks.append(lambda url: url.startswith(prefixes))
+        if self.regexes:
+            checks.append(re.compile('|'.join(f'(?:{regex})' for regex in self.regexes)).search)
+        self._checks = tuple(checks)
+    
+    @staticmethod
+    def _prefix_lookup(prefixes):
+        """
+        Build a prefix check doing one set lookup per distinct prefix length
+        """
+        by_length = {}
+        for prefix in prefixes:
+            by_length.setdefault(len(prefix), set()).add(prefix)
+        buckets = tuple(sorted(by_length.items()))
+        
+        def check(url):
+            for length, bucket in buckets:
+                if url[:length] in bucket:
+                    return True
+            return False
+        return check
+    
+    def matches(self, url):
+        """
+        Check a URL against every pattern
+        
+        Args:
+            url (str): URL
+        
+        Returns:
+            bool: True if any pattern matches (False for an empty set)
+        """
+        for check in self._checks:
+            if check(url):
+                return True
+        return False
+    
+    def __bool__(self):
+        return bool(self._checks)
+    
+    def __repr__(self):
+        return f"PatternSet(substrings={len(self.substrings)}, prefixes={len(self.prefixes)}, regexes={len(self.regexes)})"
+    
+    @classmethod
+    def coerce(cls, patterns):
+        """
+        Build a pattern set from the shorthand accepted by LinkExtractor
+        
+        Args:
+            patterns (PatternSet, str or iterable): A PatternSet, one
+                substring or several substrings (None for no patterns)
+        
+        Returns:
+            PatternSet: Pattern set, or None for no patterns
+        """
+        if patterns is None or isinstance(patterns, PatternSet):
+            return patterns
+        if isinstance(patterns, str):
+            return _substrings((patterns,))
+        return _substrings(tuple(patterns))
+
+@lru_cache(maxsize=256)
+def _substrings(substrings):
+    """
+    Shared PatternSet for a tuple of substrings, so per-call filters are
+    compiled once
+    """
+    return PatternSet(substrings=substrings)
+
+class LinkExtractor:
+    def __init__(self, include=None, exclude=None, schemes=config.LINK_SCHEMES, strip_tracking=True,
+                 tracking_params=config.TRACKING_PARAMS, tracking_prefixes=config.TRACKING_PARAM_PREFIXES,
+                 tags=('a',)):
+        """
+        Initialize the extractor
+        
+        Args:
+            include (PatternSet, str or list): Keep only links matching these
+                patterns (None keeps every link); a str or list gives substrings
+            exclude (PatternSet, str or list): Drop links matching these patterns
+            schemes (tuple): Schemes kept, lowercase; other links are dropped
+            strip_tracking (bool): Remove tracking query parameters
+            tracking_params (tuple): Query parameter names removed
+            tracking_prefixes (tuple): Query parameter name prefixes removed
+            tags (tuple): Tag names whose href attribute is read
+        """
+        self.include = PatternSet.coerce(include)
+        self.exclude = PatternSet.coerce(exclude)
+        self.schemes = frozenset(schemes)
+        self.tags = tuple(tags)
+        self._tag_names = frozenset(self.tags) | {'base'}
+        self._tracking = None
+        if strip_tracking and (tracking_params or tracking_prefixes):
+            names = [re.escape(name) for name in tracking_params]
+            names += [re.escape(prefix) + '[^=&]*' for prefix in tracking_prefixes]
+            self._tracking = re.compile(r'(?:^|&)(?:{})(?:=|&|$)'.format('|'.join(names)))
+    
+    def extract(self, soup, base_url, include=None):
+        """
+        Extract the links of a parsed page
+        
+        A <base href> in the page replaces base_url, as in browsers. The tree
+        is walked directly rather than with find_all(), whose per-element
+        filter matching dominates on pages with many links.
+        
+        Args:
+            soup (BeautifulSoup): Parsed HTML
+            base_url (str): Page URL
+            include (PatternSet, str or list): Extra patterns links must also
+                match, e.g. a per-crawl filter
+        
+        Returns:
+            list: Absolute, normalized URLs in document order, without duplicates
+        """
+        if not soup:
+            return []
+        base = None
+        hrefs = []
+        names = self._tag_names
+        for node in soup.descendants:
+            if node.name not in names:  # strings have no name
+                continue
+            href = node.attrs.get('href')
+            if href is None:
+                continue
+            if node.name != 'base':
+                hrefs.append(href)
+            elif base is None:  # only the first <base> counts
+                base = urljoin(base_url or '', href.strip())
+        return list(self.iter_links(hrefs, base or base_url, include))
+    
+    def iter_links(self, hrefs, base_url, include=None, dedupe=True):
+        """
+        Resolve, normalize, filter and dedupe raw href values
+        
+        Args:
+            hrefs (iterable): href attribute values, relative or absolute
+            base_url (str): URL relative hrefs are resolved against (without
+                one, relative hrefs are kept as they are)
+            include (PatternSet, str or list): Extra patterns links must also match
+            dedupe (bool): Drop repeated links
+        
+        Yields:
+            str: Absolute, normalized URLs in document order
+        """
+        resolve = self.resolver(base_url)
+        include = PatternSet.coerce(include)
+        seen_hrefs = set()
+        seen = set()
+        for href in hrefs:
+            if dedupe:
+                # Navigation links repeat the same href many times
+                if href in seen_hrefs:
+                    continue
+                seen_hrefs.add(href)
+            url = resolve(href)
+            if url is None:
+                continue
+            if dedupe:
+                if url in seen:
+                    continue
+                seen.add(url)
+            if self.allows(url, include):
+                yield url
+    
+    def allows(self, url, include=None):
+        """
+        Apply the include/exclude patterns to a normalized URL
+        
+        Args:
+            url (str): Normalized URL
+            include (PatternSet): Extra patterns the URL must also match
+        
+        Returns:
+            bool: True if the URL is kept
+        """
+        if self.exclude is not None and self.exclude.matches(url):
+            return False
+        if self.include is not None and not self.include.matches(url):
+            return False
+        return include is None or include.matches(url)
+    
+    def normalize(self, url):
+        """
+        Normalize an absolute URL
+        
+        Lowercases the scheme and host, drops default ports, the fragment and
+        tracking parameters, and uses '/' for an empty path. Unlike
+        url_utils.normalize_url, query parameters keep their order.
+        
+        Args:
+            url (str): Absolute URL
+        
+        Returns:
+            str: Normalized URL, or None for a scheme that is not kept
+        """
+        parts = urlsplit(url)
+        scheme = parts.scheme.lower()
+        if scheme not in self.schemes or not parts.netloc:
+            return None
+        netloc = parts.netloc
+        if not netloc.islower() or ':' in netloc or '@' in netloc or netloc.endswith('.'):
+            netloc = normalize_netloc(parts, scheme)
+        query = self._strip_tracking(parts.query)
+        url = f"{scheme}://{netloc}{parts.path or '/'}"
+        return f"{url}?{query}" if query else url
+    
+    def _strip_tracking(self, query):
+        """
+        Remove tracking parameters from a query string, keeping the order of
+        the rest
+        """
+        if not query or self._tracking is None or self._tracking.search(query) is None:
+            return query
+        match = self._tracking.match
+        return '&'.join(pair for pair in query.split('&') if pair and match(pair) is None)
+    
+    def _finish(self, url):
+        """
+        Drop the fragment and tracking parameters of a URL built from an
+        already normalized base
+        """
+        url = url.partition('#')[0]
+        if '?' in url:
+            url, _, query = url.partition('?')
+            query = self._strip_tracking(query)
+            if query:
+                url = f"{url}?{query}"
+        return url
+    
+    def resolver(self, base_url):
+        """
+        Build a function resolving one href against base_url
+        
+        The base is parsed and normalized once. Hrefs starting with '/', '?'
+        or '#', and plain relative paths without dot segments, are resolved
+        by string concatenation; anything else goes through urljoin.
+        
+        Returns:
+            callable: resolve(href) -> normalized URL or None
+        """
+        normalize = self.normalize
+        finish = self._finish
+        schemes = self.schemes
+        base = normalize(base_url) if base_url else None
+        
+        if base is None:
+            def resolve(href):
+                href = _clean(href)
+                match = _SCHEME.match(href)
+                if match:
+                    return normalize(href) if match.group(1).lower() in schemes else None
+                if not base_url:
+                    return href.partition('#')[0] or None
+                return None  # base with a scheme that is not kept
+            return resolve
+        
+        scheme, _, rest = base.partition('://')
+        slash = rest.find('/')
+        origin = base[:len(scheme) + 3 + slash]
+        page_path = base[len(origin):].partition('?')[0]
+        directory = origin + page_path[:page_path.rfind('/') + 1]
+        page = origin + page_path
+        
+        def resolve(href):
+            href = _clean(href)
+            if not href or href[0] == '#':
+                return base
+            first = href[0]
+            if first == '/':
+                if href.startswith('//'):
+                    return normalize(f"{scheme}:{href}")
+                if '/.' in href:
+                    return normalize(urljoin(base, href))
+                return finish(origin + href)
+            if first == '?':
+                return finish(page + href)
+            match = _SCHEME.match(href)
+            if match:
+                if match.group(1).lower() not in schemes:
+                    return None
+                return normalize(urljoin(base, href))
+            if first == '.' or '/.' in href:
+                return normalize(urljoin(base, href))
+            return finish(directory + href)
+        return resolve
+
+def _clean(href):
+    """
+    Strip surrounding whitespace and embedded tabs/newlines from an href
+    """
+    href = href.strip()
+    if '\n' in href or '\t' in href or '\r' in href:
+        href = _URL_WHITESPACE.sub('', href)
+    return href
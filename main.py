@@ -4,11 +4,29 @@ Main script demonstrating web scraper usage
 
 from scraper import WebScraper
 from data_extractor import DataExtractor
+from extraction_plan import ExtractionPlan, Field
 from file_handler import FileHandler
+from pipeline import scrape_iter
+from records import PageRecord, release_tree
+from state_store import CrawlStateStore
+
+# Fields scraped by scrape_website_example; per-site jobs define their own
+# plan (or load one with ExtractionPlan.load) instead of extraction code
+EXAMPLE_PLAN = ExtractionPlan([
+    Field('titles', 'h1, h2, h3', many=True),
+    Field('paragraphs', 'p', many=True, pattern=r'(?s)^.{11,}$'),  # skip very short paragraphs
+    Field('images', 'img[src]', attribute='src', many=True, type='url'),
+    Field('links', 'a[href]', attribute='href', many=True, type='link', unique=True),
+    Field('text', process='collapse'),
+], name='example')
 
 def scrape_website_example():
     """
     Example usage of the web scraper
+    
+    Returns:
+        dict: url, titles, paragraphs, images, emails, links and an
+            all_text preview, or None if the page could not be fetched
     """
     # Initialize scraper
     scraper = WebScraper(delay=2)  # 2 second delay between requests
@@ -20,72 +38,90 @@ def scrape_website_example():
     soup = scraper.get_page(url)
     
     if soup:
-        # Extract various types of data
-        titles = DataExtractor.extract_titles(soup)
-        paragraphs = DataExtractor.extract_paragraphs(soup)
-        images = DataExtractor.extract_images(soup, url)
-        
-        # Extract all text for email searching
-        all_text = scraper.extract_text(soup)
-        emails = DataExtractor.extract_emails(all_text)
-        
-        # Extract links
-        links = scraper.extract_links(soup, url)
-        
-        # Prepare data for saving
-        scraped_data = {
-            'url': url,
-            'titles': titles,
-            'paragraphs': paragraphs,
-            'images': images,
-            'emails': emails,
-            'links': links,
-            'all_text': all_text[:500] + '...' if len(all_text) > 500 else all_text  # Preview
-        }
+        # Extract the plan's fields into a compact record, then free the tree
+        fields = EXAMPLE_PLAN.apply(soup, base_url=url)
+        release_tree(soup)
+        record = PageRecord.from_fields(url, fields)
+        record.emails = tuple(DataExtractor.extract_emails(record.text))
+        all_text = record.text
         
         # Save data
+        scraped_data = record.to_dict()
+        del scraped_data['text']
+        scraped_data['all_text'] = all_text[:500] + '...' if len(all_text) > 500 else all_text  # Preview
         filename = FileHandler.generate_filename('example_scrape')
         FileHandler.save_json(scraped_data, filename)
         FileHandler.save_text(all_text, f"{filename}_full_text")
         
         # Print summary
         print(f"\nScraping Summary for {url}:")
-        print(f"Titles found: {len(titles)}")
-        print(f"Paragraphs found: {len(paragraphs)}")
-        print(f"Images found: {len(images)}")
-        print(f"Emails found: {len(emails)}")
-        print(f"Links found: {len(links)}")
+        print(f"Titles found: {len(record.titles)}")
+        print(f"Paragraphs found: {len(record.paragraphs)}")
+        print(f"Images found: {len(record.images)}")
+        print(f"Emails found: {len(record.emails)}")
+        print(f"Links found: {len(record.links)}")
         
         return scraped_data
     else:
         print("Failed to fetch the page")
         return None
 
-def scrape_multiple_pages(urls):
+def scrape_multiple_pages(urls, state_path=None):
     """
     Example of scraping multiple pages
+    
+    Saves the records like stream_multiple_pages and also returns them; use
+    stream_multiple_pages directly to keep memory flat on large crawls.
+    
+    Args:
+        urls (iterable): URLs to scrape
+        state_path (str): Crawl state database, see stream_multiple_pages
+    
+    Returns:
+        list: Records of the scraped pages
     """
-    scraper = WebScraper(delay=1)
-    all_data = []
+    results = []
+    stream_multiple_pages(urls, state_path, on_record=results.append)
+    return results
+
+def stream_multiple_pages(urls, state_path=None, on_record=None):
+    """
+    Scrape multiple pages, streaming the records to disk
     
-    for url in urls:
-        print(f"\nScraping: {url}")
-        soup = scraper.get_page(url)
-        
-        if soup:
-            data = {
-                'url': url,
-                'titles': DataExtractor.extract_titles(soup),
-                'text_preview': scraper.extract_text(soup)[:200] + '...'
-            }
-            all_data.append(data)
+    Records are written as each page completes, so memory stays flat
+    however many URLs are given. The files are renamed into place once
+    complete; after a crash, the records written so far are left in the
+    '.part' files next to them.
     
-    # Save combined data
-    if all_data:
-        FileHandler.save_json(all_data, 'multiple_pages_scrape')
-        FileHandler.save_csv(all_data, 'multiple_pages_scrape')
+    Args:
+        urls (iterable): URLs to scrape
+        state_path (str): Crawl state database; when given, reruns only fetch
+            due pages and only write pages whose content changed
+        on_record (callable): Called with each record once it is written
     
-    return all_data
+    Returns:
+        int: Number of pages scraped
+    """
+    scraper = WebScraper(delay=1)
+    state = CrawlStateStore(state_path) if state_path else None
+    count = 0
+    
+    with FileHandler.open_jsonl('multiple_pages_scrape') as jsonl, \
+            FileHandler.open_csv('multiple_pages_scrape') as csv_out:
+        for data in scrape_iter(urls, scraper, state=state):
+            print(f"\nScraped: {data['url']}")
+            jsonl.write(data)
+            csv_out.write(data)
+            if on_record:
+                on_record(data)
+            count += 1
+        
+    FileHandler.flush()  # the JSON Lines file is published by the background sink
+    if state:
+        state.commit_pending()  # only now are the written pages marked as seen
+        state.close()
+    print(f"Data saved to: {jsonl.filepath} and {csv_out.filepath}")
+    return count
 
 if __name__ == "__main__":
     print("Starting web scraper example...")
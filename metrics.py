@@ -0,0 +1,463 @@
+"""
+Lightweight metrics: counters and histograms with Prometheus-text and JSON export
+Disabled by default; when disabled every hook is a single attribute check
+"""
+
+import contextvars
+import functools
+import json
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Default histogram buckets
+TIME_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+BYTES_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+class Histogram:
+    def __init__(self, buckets=TIME_BUCKETS):
+        """
+        Cumulative histogram with fixed upper bounds
+        
+        Args:
+            buckets (tuple): Sorted bucket upper bounds
+        """
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+    
+    def observe(self, value):
+        """
+        Record one value
+        
+        Args:
+            value (float): Observed value
+        """
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+    
+    def quantile(self, q):
+        """
+        Estimate a quantile as the upper bound of the bucket containing it
+        
+        Args:
+            q (float): Quantile between 0 and 1
+        
+        Returns:
+            float: Estimated value (inf if it falls in the overflow bucket)
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float('inf')
+    
+    def to_dict(self):
+        """
+        JSON-friendly view
+        
+        Returns:
+            dict: count, sum and cumulative bucket counts keyed by upper bound
+        """
+        cumulative, total = {}, 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            total += count
+            cumulative[str(bound)] = total
+        return {'count': self.count, 'sum': self.sum, 'buckets': cumulative}
+
+class MetricsRegistry:
+    def __init__(self, enabled=True, prefix='scraper_'):
+        """
+        Registry of labelled counters and histograms
+        
+        Args:
+            enabled (bool): Record values; when False every call returns immediately
+            prefix (str): Prefix added to metric names on export
+        """
+        self.enabled = enabled
+        self.prefix = prefix
+        self._counters = {}    # (name, labels) -> value
+        self._histograms = {}  # (name, labels) -> Histogram
+        self._collectors = []
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _key(name, labels):
+        """
+        Storage key for a metric and its labels
+        """
+        return name, tuple(sorted((key, str(value)) for key, value in labels.items()))
+    
+    def inc(self, name, value=1, **labels):
+        """
+        Increase a counter
+        
+        Args:
+            name (str): Metric name
+            value (float): Amount to add
+            **labels: Label values
+        """
+        if not self.enabled:
+            return
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+    
+    def observe(self, name, value, buckets=TIME_BUCKETS, **labels):
+        """
+        Record a histogram value
+        
+        Args:
+            name (str): Metric name
+            value (float): Observed value
+            buckets (tuple): Bucket bounds used if the histogram is new
+            **labels: Label values
+        """
+        if not self.enabled:
+            return
+        key = self._key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+    
+    def timer(self, name, **labels):
+        """
+        Context manager recording elapsed seconds into a histogram
+        
+        Args:
+            name (str): Metric name
+            **labels: Label values
+        
+        Returns:
+            context manager
+        """
+        return _Timer(self, name, labels)
+    
+    def add_collector(self, collector):
+        """
+        Register a callable returning extra gauge values at export time
+        
+        Args:
+            collector (callable): collector() -> {name: number}
+        """
+        self._collectors.append(collector)
+    
+    def histogram(self, name, **labels):
+        """
+        Get a histogram
+        
+        Args:
+            name (str): Metric name
+            **labels: Label values
+        
+        Returns:
+            Histogram: Histogram or None if nothing was recorded
+        """
+        return self._histograms.get(self._key(name, labels))
+    
+    def merged_histogram(self, name):
+        """
+        Combine a histogram across all of its label values
+        
+        Args:
+            name (str): Metric name
+        
+        Returns:
+            Histogram: Merged histogram or None if nothing was recorded
+        """
+        merged = None
+        with self._lock:
+            for (metric, _), histogram in self._histograms.items():
+                if metric != name:
+                    continue
+                if merged is None:
+                    merged = Histogram(histogram.buckets)
+                if histogram.buckets == merged.buckets:
+                    merged.counts = [a + b for a, b in zip(merged.counts, histogram.counts)]
+                    merged.count += histogram.count
+                    merged.sum += histogram.sum
+        return merged
+    
+    def counter(self, name, **labels):
+        """
+        Get a counter value
+        
+        Args:
+            name (str): Metric name
+            **labels: Label values
+        
+        Returns:
+            float: Counter value (0 if never incremented)
+        """
+        return self._counters.get(self._key(name, labels), 0)
+    
+    def reset(self):
+        """
+        Clear all recorded values
+        """
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+    
+    def _gauges(self):
+        """
+        Collect gauge values from the registered collectors
+        """
+        gauges = {}
+        for collector in self._collectors:
+            gauges.update(collector())
+        return gauges
+    
+    def snapshot(self):
+        """
+        JSON-friendly snapshot of every metric
+        
+        Returns:
+            dict: counters, histograms and gauges keyed by name with labels
+        """
+        with self._lock:
+            counters = {_label_name(name, labels): value for (name, labels), value in self._counters.items()}
+            histograms = {_label_name(name, labels): h.to_dict() for (name, labels), h in self._histograms.items()}
+        return {
+            'timestamp': time.time(),
+            'counters': counters,
+            'histograms': histograms,
+            'gauges': self._gauges(),
+        }
+    
+    def to_json(self):
+        """
+        Export a snapshot as JSON
+        
+        Returns:
+            str: JSON text
+        """
+        return json.dumps(self.snapshot())
+    
+    def to_prometheus(self):
+        """
+        Export every metric in the Prometheus text exposition format
+        
+        Returns:
+            str: Exposition text
+        """
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(self._histograms.items(), key=lambda item: item[0])
+            typed = set()
+            for (name, labels), value in counters:
+                full_name = self.prefix + name
+                if full_name not in typed:
+                    lines.append(f"# TYPE {full_name} counter")
+                    typed.add(full_name)
+                lines.append(f"{full_name}{_format_labels(labels)} {value}")
+            for (name, labels), histogram in histograms:
+                full_name = self.prefix + name
+                if full_name not in typed:
+                    lines.append(f"# TYPE {full_name} histogram")
+                    typed.add(full_name)
+                total = 0
+                for bound, count in zip(histogram.buckets + ('+Inf',), histogram.counts):
+                    total += count
+                    lines.append(f"{full_name}_bucket{_format_labels(labels + (('le', bound),))} {total}")
+                lines.append(f"{full_name}_sum{_format_labels(labels)} {histogram.sum}")
+                lines.append(f"{full_name}_count{_format_labels(labels)} {histogram.count}")
+        for name, value in sorted(self._gauges().items()):
+            lines.append(f"# TYPE {self.prefix}{name} gauge")
+            lines.append(f"{self.prefix}{name} {value}")
+        return '\n'.join(lines) + '\n'
+
+class _Timer:
+    __slots__ = ('registry', 'name', 'labels', 'start')
+    
+    def __init__(self, registry, name, labels):
+        """
+        Timer returned by MetricsRegistry.timer()
+        """
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+        self.start = None
+    
+    def __enter__(self):
+        if self.registry.enabled:
+            self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.start is not None:
+            self.registry.observe(self.name, time.perf_counter() - self.start, **self.labels)
+
+def _format_labels(labels):
+    """
+    Render labels as {key="value",...} with Prometheus escaping
+    """
+    if not labels:
+        return ''
+    escaped = []
+    for key, value in labels:
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        escaped.append(f'{key}="{value}"')
+    return '{' + ','.join(escaped) + '}'
+
+def _label_name(name, labels):
+    """
+    Metric name with its labels, used as the snapshot key
+    """
+    return name + _format_labels(labels)
+
+# Shared registry used by default; disabled until enable() is called
+REGISTRY = MetricsRegistry(enabled=False)
+
+def enable(registry=REGISTRY):
+    """
+    Turn on recording for a registry (the shared one by default)
+    
+    Returns:
+        MetricsRegistry: The enabled registry
+    """
+    registry.enabled = True
+    return registry
+
+def disable(registry=REGISTRY):
+    """
+    Turn off recording for a registry (the shared one by default)
+    """
+    registry.enabled = False
+
+# Registry timed() functions record into, set by use_registry()
+_current_registry = contextvars.ContextVar('current_registry', default=None)
+# True while a timed() function runs, so nested timed calls are not counted twice
+_timing = contextvars.ContextVar('timing', default=False)
+
+@contextmanager
+def use_registry(registry):
+    """
+    Route timed() functions called in this context to a registry
+    
+    WebScraper wraps its extract callbacks in this, so extractor timings go
+    to the registry passed to WebScraper(metrics=...).
+    
+    Args:
+        registry (MetricsRegistry): Registry to record into
+    
+    Yields:
+        MetricsRegistry: The registry
+    """
+    token = _current_registry.set(registry)
+    try:
+        yield registry
+    finally:
+        _current_registry.reset(token)
+
+def timed(name, registry=None, **labels):
+    """
+    Decorator recording a function's run time into a histogram
+    
+    Only the outermost timed call is recorded: a timed function called from
+    another one (e.g. extract_emails inside extract_fields) is not counted
+    separately.
+    
+    Args:
+        name (str): Metric name
+        registry (MetricsRegistry): Fixed registry to record into; None
+            resolves it at call time to the one set by use_registry(), or
+            the shared REGISTRY
+        **labels: Label values
+    
+    Returns:
+        callable: Decorator
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _timing.get():
+                return func(*args, **kwargs)
+            target = registry or _current_registry.get() or REGISTRY
+            if not target.enabled:
+                return func(*args, **kwargs)
+            token = _timing.set(True)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _timing.reset(token)
+                target.observe(name, time.perf_counter() - start, **labels)
+        return wrapper
+    return decorator
+
+class SummaryLogger:
+    def __init__(self, registry=REGISTRY, interval=60, logger=None):
+        """
+        Periodically log a one-line summary of the main scraper metrics
+        
+        Args:
+            registry (MetricsRegistry): Registry to summarize
+            interval (float): Seconds between log lines
+            logger (logging.Logger): Destination logger
+        """
+        self.registry = registry
+        self.interval = interval
+        self.logger = logger or logging.getLogger(__name__)
+        self._stop = threading.Event()
+        self._thread = None
+        self._last = (time.monotonic(), 0)
+    
+    def summary(self):
+        """
+        Build the summary line
+        
+        Returns:
+            str: Summary text
+        """
+        snapshot = self.registry.snapshot()
+        counters = snapshot['counters']
+        responses = sum(v for k, v in counters.items() if k.startswith('http_responses_total'))
+        errors = sum(v for k, v in counters.items() if k.startswith('http_errors_total'))
+        now = time.monotonic()
+        last_time, last_responses = self._last
+        rate = (responses - last_responses) / (now - last_time) if now > last_time else 0.0
+        self._last = (now, responses)
+        ttfb = self.registry.merged_histogram('http_ttfb_seconds')
+        parse = self.registry.merged_histogram('parse_seconds')
+        return (f"responses={responses:.0f} errors={errors:.0f} rate={rate:.1f}/s "
+                f"bytes={counters.get('http_bytes_total', 0):.0f} "
+                f"ttfb_p50={ttfb.quantile(0.5) if ttfb else 0}s "
+                f"parse_p50={parse.quantile(0.5) if parse else 0}s")
+    
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.logger.info(f"Metrics: {self.summary()}")
+    
+    def start(self):
+        """
+        Start logging on a daemon thread
+        
+        Returns:
+            SummaryLogger: self
+        """
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='metrics-summary', daemon=True)
+            self._thread.start()
+        return self
+    
+    def stop(self):
+        """
+        Stop logging
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
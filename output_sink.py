@@ -0,0 +1,437 @@
+"""
+Write-behind output sink
+A single background thread owns every output file: callers queue text and
+return at once, writes are coalesced into large buffered chunks, files are
+fsynced periodically and published by renaming a temporary file into place
+"""
+
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import config
+from stream_writers import open_output
+
+TEMP_SUFFIX = '.part'
+
+def fsync_directory(directory):
+    """
+    Make a rename in a directory durable (no-op where unsupported)
+    
+    Args:
+        directory (str): Directory path
+    """
+    try:
+        fd = os.open(directory or '.', os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+def write_atomic(filepath, text, compression=None, newline=None):
+    """
+    Write a whole file through a temporary file and an atomic rename
+    
+    Readers see either the previous file or the complete new one.
+    
+    Args:
+        filepath (str): Output path
+        text (str): File contents
+        compression (str): None, 'gzip' or 'zstd'
+        newline (str): Passed to the text layer ('' for csv)
+    
+    Returns:
+        str: Path of the written file
+    """
+    directory = os.path.dirname(filepath)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = filepath + TEMP_SUFFIX
+    with open_output(tmp_path, compression, newline) as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, filepath)
+    fsync_directory(directory)
+    return filepath
+
+class SinkFile:
+    # Characters collected on the calling thread before they are queued
+    CHUNK_SIZE = 64 * 1024
+    
+    def __init__(self, sink, filepath, compression=None, newline=None, finalize=None):
+        """
+        File-like handle whose writes are performed by an OutputSink
+        
+        Data goes to filepath + '.part', which is renamed to filepath when
+        the handle is closed. Use OutputSink.open() rather than this
+        constructor.
+        
+        Args:
+            sink (OutputSink): Sink performing the writes
+            filepath (str): Final output path
+            compression (str): None, 'gzip' or 'zstd'
+            newline (str): Passed to the text layer ('' for csv)
+            finalize (callable): finalize(part_path), run on the writer
+                thread after the last write and before the rename, e.g. to
+                rewrite a header
+        """
+        self.sink = sink
+        self.filepath = filepath
+        self.compression = compression
+        self.newline = newline
+        self.finalize = finalize
+        self.closed = False
+        self.published = Future()  # resolves to filepath once renamed into place
+        self._chunk = []
+        self._chunk_size = 0
+        # Owned by the writer thread
+        self._file = None
+        self._buffer = []
+        self._buffered = 0
+        self._dirty = False
+        self._error = None
+    
+    def write(self, text):
+        """
+        Queue text for writing
+        
+        Text is queued in chunks of CHUNK_SIZE characters; this blocks only
+        while the sink's queue is full.
+        
+        Args:
+            text (str): Text to append
+        
+        Returns:
+            int: Number of characters accepted
+        """
+        if self.closed:
+            raise ValueError(f"I/O operation on closed file {self.filepath}")
+        self._chunk.append(text)
+        self._chunk_size += len(text)
+        if self._chunk_size >= self.CHUNK_SIZE:
+            self._queue_chunk()
+        return len(text)
+    
+    def _queue_chunk(self):
+        """
+        Hand the collected text to the sink
+        """
+        if self._chunk:
+            self.sink._put(('write', self, ''.join(self._chunk), None), self._chunk_size)
+            self._chunk = []
+            self._chunk_size = 0
+    
+    def flush(self):
+        """
+        Wait until everything written so far is on disk
+        """
+        if not self.closed:
+            self._queue_chunk()
+            future = Future()
+            self.sink._put(('sync', self, None, future))
+            future.result()
+    
+    def close(self):
+        """
+        Queue the file for publishing without waiting
+        
+        Returns:
+            str: Final path; see the published future for completion
+        """
+        if not self.closed:
+            self._queue_chunk()
+            self.closed = True
+            self.sink._put(('close', self, None, self.published))
+        return self.filepath
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+class OutputSink:
+    def __init__(self, max_pending_bytes=config.SINK_MAX_PENDING_BYTES, batch_bytes=config.SINK_BATCH_BYTES,
+                 fsync_interval=config.SINK_FSYNC_INTERVAL):
+        """
+        Start a background writer
+        
+        Args:
+            max_pending_bytes (int): Queued characters above which callers
+                block until the writer catches up (backpressure)
+            batch_bytes (int): Characters buffered per file before a write
+            fsync_interval (float): Seconds between fsyncs of open files
+                (None to fsync only when a file is closed)
+        """
+        self.max_pending_bytes = max_pending_bytes
+        self.batch_bytes = batch_bytes
+        self.fsync_interval = fsync_interval
+        self.logger = logging.getLogger(__name__)
+        self._ops = deque()
+        self._pending_bytes = 0
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._writer_idle = False
+        self._open_files = set()
+        self._last_sync = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name='output-sink', daemon=True)
+        self._thread.start()
+    
+    def publish(self, filepath, text, compression=None, newline=None):
+        """
+        Queue a whole file to be written atomically
+        
+        Args:
+            filepath (str): Output path
+            text (str): File contents
+            compression (str): None, 'gzip' or 'zstd'
+            newline (str): Passed to the text layer ('' for csv)
+        
+        Returns:
+            Future: Resolves to filepath once the file is in place
+        """
+        future = Future()
+        self._put(('publish', (filepath, compression, newline), text, future), len(text))
+        return future
+    
+    def open(self, filepath, compression=None, newline=None, finalize=None):
+        """
+        Open a streamed output file
+        
+        Args:
+            filepath (str): Final output path
+            compression (str): None, 'gzip' or 'zstd'
+            newline (str): Passed to the text layer ('' for csv)
+            finalize (callable): finalize(part_path) run before the file is
+                renamed into place (see SinkFile)
+        
+        Returns:
+            SinkFile: File-like handle; close() publishes the file
+        """
+        return SinkFile(self, filepath, compression, newline, finalize)
+    
+    def flush(self):
+        """
+        Wait until every queued operation has been carried out
+        
+        Files that are still open are written and fsynced but not published.
+        """
+        future = Future()
+        self._put(('barrier', None, None, future))
+        future.result()
+    
+    def close(self):
+        """
+        Finish queued work, publish files left open and stop the thread
+        """
+        with self._cond:
+            if self._stopping:
+                return
+            self._stopping = True
+            self._cond.notify_all()
+        self._thread.join()
+    
+    def _put(self, op, size=0):
+        """
+        Queue an operation, waiting while the queue is over its byte budget
+        """
+        with self._cond:
+            if self._stopping:
+                raise ValueError("Output sink is closed")
+            # An empty queue always admits, so oversized items cannot deadlock
+            while self._pending_bytes and self._pending_bytes + size > self.max_pending_bytes:
+                self._cond.wait()
+            self._ops.append((op, size))
+            self._pending_bytes += size
+            if self._writer_idle:
+                self._cond.notify_all()
+    
+    def _run(self):
+        """
+        Writer thread: apply queued operations in batches
+        """
+        while True:
+            with self._cond:
+                if not self._ops and not self._stopping:
+                    self._writer_idle = True
+                    self._cond.wait(self.fsync_interval)
+                    self._writer_idle = False
+                batch = list(self._ops)
+                self._ops.clear()
+                stopping = self._stopping
+            
+            for op, _ in batch:
+                self._apply(*op)
+            # Queue drained: write out full buffers and fsync on schedule
+            for handle in list(self._open_files):
+                if handle._buffered >= self.batch_bytes:
+                    self._write_buffer(handle)
+            if self.fsync_interval is not None and time.monotonic() - self._last_sync >= self.fsync_interval:
+                self._sync_all()
+            
+            with self._cond:
+                self._pending_bytes -= sum(size for _, size in batch)
+                self._cond.notify_all()
+                if stopping and not self._ops:
+                    break
+        
+        for handle in list(self._open_files):
+            self._close(handle, handle.published)
+    
+    def _apply(self, kind, target, payload, future):
+        """
+        Carry out one queued operation
+        """
+        if kind == 'write':
+            if target._error is None:
+                self._open_files.add(target)
+                target._buffer.append(payload)
+                target._buffered += len(payload)
+        elif kind == 'publish':
+            filepath, compression, newline = target
+            try:
+                write_atomic(filepath, payload, compression, newline)
+            except Exception as e:
+                self.logger.error(f"Error writing {filepath}: {e}")
+                future.set_exception(e)
+            else:
+                self.logger.info(f"Data saved to: {filepath}")
+                future.set_result(filepath)
+        elif kind == 'sync':
+            self._sync(target)
+            self._resolve(target, future)
+        elif kind == 'close':
+            self._close(target, future)
+        elif kind == 'barrier':
+            for handle in list(self._open_files):
+                self._sync(handle)
+            future.set_result(None)
+    
+    def _write_buffer(self, handle):
+        """
+        Write a file's buffered text in one call, opening the file if needed
+        """
+        if not handle._buffer or handle._error is not None:
+            return
+        try:
+            if handle._file is None:
+                directory = os.path.dirname(handle.filepath)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                handle._file = open_output(handle.filepath + TEMP_SUFFIX, handle.compression, handle.newline)
+            handle._file.write(''.join(handle._buffer))
+            handle._dirty = True
+        except Exception as e:
+            self._fail(handle, e)
+        handle._buffer.clear()
+        handle._buffered = 0
+    
+    def _sync(self, handle):
+        """
+        Write out and fsync one file
+        """
+        self._write_buffer(handle)
+        if handle._dirty and handle._error is None:
+            try:
+                handle._file.flush()
+                os.fsync(handle._file.fileno())
+            except Exception as e:
+                self._fail(handle, e)
+            handle._dirty = False
+    
+    def _sync_all(self):
+        """
+        Periodic fsync of every open file
+        """
+        for handle in list(self._open_files):
+            self._sync(handle)
+        self._last_sync = time.monotonic()
+    
+    def _close(self, handle, future):
+        """
+        Finish a streamed file and rename it into place
+        """
+        self._sync(handle)
+        self._open_files.discard(handle)
+        if handle._error is None:
+            try:
+                if handle._file is None:  # nothing was written
+                    handle._file = open_output(handle.filepath + TEMP_SUFFIX, handle.compression, handle.newline)
+                handle._file.close()
+                if handle.finalize is not None:
+                    handle.finalize(handle.filepath + TEMP_SUFFIX)
+                os.replace(handle.filepath + TEMP_SUFFIX, handle.filepath)
+                fsync_directory(os.path.dirname(handle.filepath))
+            except Exception as e:
+                self._fail(handle, e)
+            else:
+                self.logger.info(f"Data saved to: {handle.filepath}")
+        elif handle._file is not None:
+            handle._file.close()
+        self._resolve(handle, future)
+    
+    def _fail(self, handle, error):
+        """
+        Record a file's first error; later writes to it are dropped
+        """
+        if handle._error is None:
+            self.logger.error(f"Error writing {handle.filepath}: {error}")
+            handle._error = error
+    
+    @staticmethod
+    def _resolve(handle, future):
+        """
+        Complete a future with the file's error or path
+        """
+        if future.done():
+            return
+        if handle._error is not None:
+            future.set_exception(handle._error)
+        else:
+            future.set_result(handle.filepath)
+
+_default_sink = None
+_default_lock = threading.Lock()
+
+def _reset_after_fork():
+    """
+    Drop the inherited default sink in a forked child
+    
+    Only the forking thread survives a fork, so the inherited sink's writer
+    thread is gone and its locks may be held; the child starts its own sink
+    on first use instead.
+    """
+    global _default_sink, _default_lock
+    if _default_sink is not None:
+        atexit.unregister(_default_sink.close)
+    _default_sink = None
+    _default_lock = threading.Lock()
+
+if hasattr(os, 'register_at_fork'):  # not available on Windows, which spawns instead
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+def default_sink():
+    """
+    Process-wide sink shared by the output classes
+    
+    Created on first use and closed at interpreter exit, so queued output
+    is always written. A forked child process gets a sink of its own.
+    
+    Returns:
+        OutputSink: Shared sink
+    """
+    global _default_sink
+    with _default_lock:
+        if _default_sink is None:
+            _default_sink = OutputSink()
+            atexit.register(_default_sink.close)
+        return _default_sink
@@ -0,0 +1,155 @@
+"""
+Fetch/parse split pipeline
+I/O threads fetch raw bytes and a process pool parses and extracts them,
+so CPU-bound parsing is not limited by the GIL
+"""
+
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+from charset import CharsetDetector
+from data_extractor import DataExtractor
+from scraper import WebScraper
+
+logger = logging.getLogger(__name__)
+
+# Charset detector of this worker process, created on first use
+_detector = None
+
+class ExtractionSpec:
+    # extract() takes an encoding keyword; other specs set this to opt in
+    accepts_encoding = True
+    
+    def __init__(self, fields=('titles', 'text'), parser=None, parse_only=None, text_limit=None):
+        """
+        Picklable description of what to extract from each page
+        
+        Args:
+            fields (iterable): Field names from DataExtractor.FIELDS
+            parser (str): Parser name (defaults to the scraper's parser)
+            parse_only (list): Tag names to restrict parsing to
+            text_limit (int): Truncate the 'text' field to this many characters
+        """
+        self.fields = tuple(fields)
+        self.parser = parser
+        self.parse_only = list(parse_only) if parse_only else None
+        self.text_limit = text_limit
+    
+    def extract(self, url, content, parser, encoding=None):
+        """
+        Parse a page and extract the requested fields
+        
+        Runs inside a worker process; only the small record is sent back.
+        
+        Args:
+            url (str): Page URL
+            content (bytes): Raw HTML
+            parser (str): Parser name
+            encoding (str): Known encoding of content (None to detect it)
+        
+        Returns:
+            dict: Record with 'url' and the requested fields
+        """
+        strainer = SoupStrainer(self.parse_only) if self.parse_only else None
+        soup = BeautifulSoup(content, parser, parse_only=strainer, from_encoding=encoding)
+        record = {'url': url}
+        record.update(DataExtractor.extract_fields(soup, self.fields, base_url=url))
+        if self.text_limit is not None and 'text' in record:
+            record['text'] = record['text'][:self.text_limit]
+        soup.decompose()
+        return record
+
+def _extract_in_worker(spec, url, content, parser, content_type=None, detect_charset=False):
+    """
+    Process pool entry point
+    
+    With detect_charset, the page's encoding is found here, next to the
+    parse, so the fetch loop only moves bytes. Each worker process keeps its
+    own detector and per-host cache.
+    
+    Args:
+        spec (ExtractionSpec): Extraction spec
+        url (str): Page URL
+        content (bytes): Raw HTML
+        parser (str): Parser name
+        content_type (str): Content-Type header of the response
+        detect_charset (bool): Detect the encoding and pass it to extract()
+    
+    Returns:
+        dict: Extracted record
+    """
+    global _detector
+    if not detect_charset:
+        return spec.extract(url, content, parser)
+    if _detector is None:
+        _detector = CharsetDetector()
+    encoding = _detector.detect(content, content_type, url)[0]
+    return spec.extract(url, content, parser, encoding=encoding)
+
+def scrape_parallel(urls, spec=None, scraper=None, parse_workers=None, max_queued=None):
+    """
+    Scrape URLs with threaded fetching and process-pool parsing
+    
+    Fetch threads hand raw bytes to the pool as they arrive. At most
+    max_queued pages wait for a parse worker; beyond that no new URLs are
+    pulled, so memory stays bounded.
+    
+    Args:
+        urls (iterable): URLs to scrape
+        spec (ExtractionSpec): What to extract (titles and text by default);
+            any picklable object with an extract(url, content, parser) method
+            works. A spec whose accepts_encoding attribute is true also
+            receives an encoding keyword, detected in the worker process when
+            the scraper has charset detection enabled. An optional parser
+            attribute overrides the scraper's parser
+        scraper (WebScraper): Scraper used for fetching (a default one if None)
+        parse_workers (int): Worker processes (defaults to the CPU count)
+        max_queued (int): Pages allowed to wait for parsing (defaults to 2 per worker)
+    
+    Yields:
+        dict: Extracted records, in completion order
+    """
+    spec = spec or ExtractionSpec()
+    scraper = scraper or WebScraper()
+    parser = getattr(spec, 'parser', None) or scraper.parser
+    detect_charset = scraper.charsets is not None and getattr(spec, 'accepts_encoding', False)
+    parse_workers = parse_workers or os.cpu_count() or 1
+    max_queued = max_queued or parse_workers * 2
+    
+    futures = {}
+    with ProcessPoolExecutor(max_workers=parse_workers) as pool:
+        for url, response in scraper.fetch_many(urls):
+            if isinstance(response, Exception):
+                continue
+            job = pool.submit(_extract_in_worker, spec, url, response.content, parser,
+                              response.headers.get('Content-Type'), detect_charset)
+            futures[job] = url
+            
+            if len(futures) >= max_queued:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                yield from _collect(futures, done)
+        
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            yield from _collect(futures, done)
+
+def _collect(futures, done):
+    """
+    Yield results of finished parse jobs, logging failures
+    
+    Args:
+        futures (dict): Outstanding future -> URL map (finished ones are removed)
+        done (set): Finished futures
+    
+    Yields:
+        dict: Extracted records
+    """
+    for future in done:
+        url = futures.pop(future)
+        try:
+            yield future.result()
+        except Exception as e:
+            logger.error(f"Error extracting {url}: {e}")
@@ -0,0 +1,184 @@
+"""
+Precompiled multi-pattern text extraction
+Scans text or bytes for several registered patterns in a single pass
+"""
+
+import re
+
+from data_extractor import DataExtractor
+
+DEFAULT_PATTERNS = {
+    'emails': DataExtractor.EMAIL_PATTERN.pattern,
+    'phones': r'(?<![\w+])(?:\+\d{1,3}[\s.-]?)?(?:\(\d{2,4}\)[\s.-]?|\d{2,4}[\s.-])\d{3,4}[\s.-]\d{3,4}(?!\w)',
+    'urls': r'\bhttps?://[^\s<>"\']+',
+}
+
+# re flags that can be scoped to one alternative of the combined pattern
+_SCOPED_FLAGS = ((re.IGNORECASE, 'i'), (re.MULTILINE, 'm'), (re.DOTALL, 's'), (re.VERBOSE, 'x'))
+
+class PatternEngine:
+    def __init__(self, patterns=None):
+        """
+        Initialize the engine
+        
+        All registered patterns are combined into one alternation and compiled
+        once, for both str and bytes input. At each position the first pattern
+        (in registration order) that matches wins, so one piece of text is
+        reported under a single name.
+        
+        Args:
+            patterns (dict): Name -> regex; defaults to emails, phones and urls
+        """
+        self._patterns = {}
+        self._compiled = {}
+        self._group_names = {}
+        for name, pattern in (DEFAULT_PATTERNS if patterns is None else patterns).items():
+            self.register(name, pattern)
+    
+    def register(self, name, pattern, flags=0):
+        """
+        Add or replace a pattern
+        
+        Numbered backreferences are not supported since groups are renumbered
+        in the combined pattern; use named groups instead.
+        
+        Args:
+            name (str): Result key (a valid Python identifier)
+            pattern (str): Regular expression
+            flags (int): re.IGNORECASE, re.MULTILINE, re.DOTALL and/or re.VERBOSE
+        """
+        if not name.isidentifier():
+            raise ValueError(f"Pattern name must be an identifier: {name!r}")
+        re.compile(pattern, flags)  # fail early on invalid patterns
+        inline = ''.join(letter for flag, letter in _SCOPED_FLAGS if flags & flag)
+        self._patterns[name] = f"(?{inline}:{pattern})" if inline else pattern
+        self._compiled.clear()
+    
+    @property
+    def names(self):
+        """
+        Registered pattern names, in priority order
+        """
+        return list(self._patterns)
+    
+    def _regex(self, sample):
+        """
+        Combined regex for str or bytes input, compiled on first use
+        
+        Args:
+            sample (str or bytes): Input whose type selects the variant
+        
+        Returns:
+            re.Pattern: Compiled combined pattern
+        """
+        kind = bytes if isinstance(sample, (bytes, bytearray)) else str
+        regex = self._compiled.get(kind)
+        if regex is None:
+            # Group names are positional so user patterns can use any names internally
+            combined = '|'.join(f"(?P<_p{i}>{pattern})" for i, pattern in enumerate(self._patterns.values()))
+            if kind is bytes:
+                combined = combined.encode('utf-8')
+            regex = self._compiled[kind] = re.compile(combined)
+            self._group_names = {f"_p{i}": name for i, name in enumerate(self._patterns)}
+        return regex
+    
+    def finditer(self, text, pos=0, endpos=None):
+        """
+        Iterate over matches of all patterns
+        
+        Args:
+            text (str or bytes): Input
+            pos (int): Start position
+            endpos (int): End position
+        
+        Yields:
+            tuple: (name, matched text, start offset)
+        """
+        regex = self._regex(text)
+        names = self._group_names
+        matches = regex.finditer(text, pos) if endpos is None else regex.finditer(text, pos, endpos)
+        for match in matches:
+            yield names[match.lastgroup], match.group(), match.start()
+    
+    def scan(self, text):
+        """
+        Find all matches in one document
+        
+        Args:
+            text (str or bytes): Input
+        
+        Returns:
+            dict: Name -> list of matches (every registered name is present)
+        """
+        results = {name: [] for name in self._patterns}
+        for name, value, _ in self.finditer(text):
+            results[name].append(value)
+        return results
+    
+    def scan_batch(self, documents):
+        """
+        Scan several documents with the same compiled pattern
+        
+        Args:
+            documents (iterable): str or bytes documents
+        
+        Returns:
+            list: One scan() result per document, in input order
+        """
+        return [self.scan(document) for document in documents]
+    
+    def iter_stream(self, chunks, max_match=4096):
+        """
+        Scan a large input chunk by chunk without joining it into one string
+        
+        Matches may span chunk boundaries as long as they are no longer than
+        max_match; only that much text is carried over between chunks.
+        
+        Args:
+            chunks (iterable): str or bytes chunks
+            max_match (int): Longest match to expect
+        
+        Yields:
+            tuple: (name, matched text)
+        """
+        context = 16  # characters kept before the carry-over for lookbehinds and \b
+        buffer = None
+        start = 0
+        for chunk in chunks:
+            if not chunk:
+                continue
+            buffer = chunk if buffer is None else buffer + chunk
+            safe = len(buffer) - max_match
+            if safe <= start:
+                continue
+            
+            cut = safe
+            for name, value, offset in self.finditer(buffer, start):
+                if offset >= safe:
+                    break  # could still grow with the next chunk
+                yield name, value
+                cut = max(cut, offset + len(value))
+            
+            keep_from = max(0, cut - context)
+            buffer = buffer[keep_from:]
+            start = cut - keep_from
+        
+        if buffer is not None:
+            for name, value, _ in self.finditer(buffer, start):
+                yield name, value
+    
+    def scan_stream(self, chunks, max_match=4096):
+        """
+        Collect the matches of iter_stream()
+        
+        Args:
+            chunks (iterable): str or bytes chunks
+            max_match (int): Longest match to expect
+        
+        Returns:
+            dict: Name -> list of matches
+        """
+        results = {name: [] for name in self._patterns}
+        for name, value in self.iter_stream(chunks, max_match):
+            results[name].append(value)
+        return results
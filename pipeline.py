@@ -0,0 +1,128 @@
+"""
+Lazy scraping pipeline that yields records as pages complete
+"""
+
+from data_extractor import DataExtractor
+from dedup import NearDuplicateFilter
+from metrics import use_registry
+from records import release_tree
+from scraper import WebScraper
+
+def summary_record(scraper, url, soup):
+    """
+    Default record: URL, titles and a short text preview
+    
+    Args:
+        scraper (WebScraper): Scraper that fetched the page
+        url (str): Page URL
+        soup (BeautifulSoup): Parsed page
+    
+    Returns:
+        dict: Extracted record
+    """
+    fields = DataExtractor.extract_fields(soup, ['titles', 'text'])
+    return {
+        'url': url,
+        'titles': fields['titles'],
+        'text_preview': fields['text'][:200] + '...'
+    }
+
+def changed_pages(urls, scraper, state):
+    """
+    Fetch the due URLs and yield only pages that are new or changed
+    
+    Requests carry the stored validators, and every outcome (304, unchanged
+    hash, change or error) is recorded to reschedule the URL. The new state
+    of changed pages is held until the caller's state.commit_pending(), so
+    a page whose record is lost before being written is emitted again.
+    
+    Args:
+        urls (iterable): URLs to consider
+        scraper (WebScraper): Scraper to use
+        state (CrawlStateStore): Crawl state
+    
+    Yields:
+        tuple: (url, soup) for new or changed pages
+    """
+    for url, response in scraper.fetch_many(state.due(urls), headers=state.conditional_headers):
+        if isinstance(response, Exception):
+            state.record_error(url, response)
+            continue
+        if state.record(url, response, pending=True):
+            yield url, scraper.parse_response(response)
+
+def scrape_iter(urls, scraper=None, extract=summary_record, dedup=None, on_duplicate='drop', state=None,
+                low_memory=False, monitor=None):
+    """
+    Scrape URLs lazily, yielding one record per successfully fetched page
+    
+    Nothing is accumulated: URLs are pulled from the iterable as fetch slots
+    free up and each record is yielded as soon as its page completes, so
+    memory does not grow with the number of URLs.
+    
+    Args:
+        urls (iterable): URLs to scrape
+        scraper (WebScraper): Scraper to use (a default one if None)
+        extract (callable): extract(scraper, url, soup) -> record
+        dedup (NearDuplicateFilter or bool): Skip extraction for pages whose
+            text nearly matches an earlier page; True uses a default filter
+        on_duplicate (str): 'drop' to skip near-duplicates, or 'flag' to yield
+            {'url': url, 'duplicate': True} in place of the extracted record
+        state (CrawlStateStore): Incremental re-crawl state; URLs that are not
+            due are skipped and unchanged pages yield nothing. Call
+            state.commit_pending() once the yielded records are written,
+            otherwise the next run emits the changed pages again
+        low_memory (bool): Extract on the fetch threads and decompose each
+            tree as soon as its record is built (see WebScraper.scrape_pages);
+            with dedup, near-duplicates are then extracted before being dropped
+        monitor (MemoryMonitor): Samples RSS per page in low_memory mode
+    
+    Yields:
+        dict: Extracted records, in completion order
+    """
+    if on_duplicate not in ('drop', 'flag'):
+        raise ValueError("on_duplicate must be 'drop' or 'flag'")
+    scraper = scraper or WebScraper()
+    dedup = NearDuplicateFilter() if dedup is True else dedup or None
+    if low_memory and state is None:
+        yield from _scrape_low_memory(urls, scraper, extract, dedup, on_duplicate, monitor)
+        return
+    
+    pages = changed_pages(urls, scraper, state) if state is not None else scraper.get_pages(urls)
+    for url, soup in pages:
+        if isinstance(soup, Exception):
+            continue
+        try:
+            if dedup is not None and dedup.is_duplicate(scraper.extract_text(soup)):
+                if on_duplicate == 'flag':
+                    yield {'url': url, 'duplicate': True}
+                continue
+            with use_registry(scraper.metrics):
+                record = extract(scraper, url, soup)
+        finally:
+            if low_memory:
+                release_tree(soup)
+        yield record
+
+def _scrape_low_memory(urls, scraper, extract, dedup, on_duplicate, monitor):
+    """
+    scrape_iter() body for low_memory mode
+    """
+    if dedup is None:
+        task = extract
+    else:
+        # The dedup index is not thread-safe, so only the text is computed on the fetch threads
+        task = lambda scraper, url, soup: (scraper.extract_text(soup), extract(scraper, url, soup))
+    
+    for url, result in scraper.scrape_pages(urls, task, monitor=monitor):
+        if isinstance(result, Exception):
+            continue
+        if dedup is None:
+            yield result
+            continue
+        text, record = result
+        if dedup.is_duplicate(text):
+            if on_duplicate == 'flag':
+                yield {'url': url, 'duplicate': True}
+            continue
+        yield record
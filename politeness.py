@@ -0,0 +1,136 @@
+"""
+Per-host politeness scheduling
+Tracks the next allowed request time for each host so that only requests
+to the same host are delayed
+"""
+
+import threading
+import time
+from urllib.parse import urlparse
+
+import config
+
+class HostScheduler:
+    # Forget hosts whose next allowed time has passed once this many are tracked
+    PRUNE_THRESHOLD = 10000
+    
+    def __init__(self, default_delay=config.DEFAULT_DELAY, host_delays=None):
+        """
+        Initialize the scheduler
+        
+        Args:
+            default_delay (float): Minimum seconds between requests to one host
+            host_delays (dict): Per-host overrides, keyed by host name
+        """
+        self.default_delay = default_delay
+        self.host_delays = {}
+        for host, delay in (host_delays or {}).items():
+            self.set_delay(host, delay)
+        self._next_allowed = {}
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def host_key(url_or_host):
+        """
+        Normalize a URL or host name to the key used for scheduling
+        
+        Args:
+            url_or_host (str): Full URL or bare host name
+        
+        Returns:
+            str: Lowercased host (with port, if any)
+        """
+        if '://' in url_or_host:
+            return urlparse(url_or_host).netloc.lower()
+        return url_or_host.lower()
+    
+    def set_delay(self, url_or_host, delay):
+        """
+        Override the delay for a single host
+        
+        Args:
+            url_or_host (str): URL or host name
+            delay (float): Minimum seconds between requests to that host
+        """
+        self.host_delays[self.host_key(url_or_host)] = delay
+    
+    def get_delay(self, url_or_host):
+        """
+        Get the delay that applies to a host
+        
+        Args:
+            url_or_host (str): URL or host name
+        
+        Returns:
+            float: Minimum seconds between requests to that host
+        """
+        return self.host_delays.get(self.host_key(url_or_host), self.default_delay)
+    
+    def ready_in(self, url_or_host):
+        """
+        Seconds until a request to the host may start, without reserving it
+        
+        Args:
+            url_or_host (str): URL or host name
+        
+        Returns:
+            float: 0 if a request may start now
+        """
+        host = self.host_key(url_or_host)
+        with self._lock:
+            return max(0.0, self._next_allowed.get(host, 0.0) - time.monotonic())
+    
+    def reserve(self, url_or_host):
+        """
+        Reserve the next request slot for a host
+        
+        Args:
+            url_or_host (str): URL or host name
+        
+        Returns:
+            float: Seconds the caller must wait before sending the request
+        """
+        host = self.host_key(url_or_host)
+        delay = self.get_delay(host)
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_allowed.get(host, 0.0))
+            self._next_allowed[host] = start + delay
+            if len(self._next_allowed) > self.PRUNE_THRESHOLD:
+                self._prune(now)
+            return start - now
+    
+    def defer(self, url_or_host, seconds):
+        """
+        Push back the next allowed request to a host, e.g. after Retry-After
+        
+        Args:
+            url_or_host (str): URL or host name
+            seconds (float): Seconds from now before the host may be requested
+        """
+        host = self.host_key(url_or_host)
+        with self._lock:
+            allowed = time.monotonic() + seconds
+            self._next_allowed[host] = max(self._next_allowed.get(host, 0.0), allowed)
+    
+    def wait(self, url_or_host):
+        """
+        Block until a request to the host is allowed, reserving the slot
+        
+        Args:
+            url_or_host (str): URL or host name
+        """
+        delay = self.reserve(url_or_host)
+        if delay > 0:
+            time.sleep(delay)
+    
+    def _prune(self, now):
+        """
+        Drop hosts that no longer constrain scheduling (lock must be held)
+        
+        Args:
+            now (float): Current monotonic time
+        """
+        self._next_allowed = {
+            host: allowed for host, allowed in self._next_allowed.items() if allowed > now
+        }
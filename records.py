@@ -0,0 +1,218 @@
+"""
+Compact result records and memory accounting for bounded-memory scraping
+Records use __slots__ and tuples instead of dicts of lists, parse trees are
+torn down as soon as extraction finishes, and RSS is sampled per page to
+size worker counts
+"""
+
+import os
+import sys
+import threading
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+# page_rss_bytes histogram buckets: 16 MB to 8 GB
+RSS_BUCKETS = tuple(2 ** power * 1024 * 1024 for power in range(4, 14))
+
+class PageRecord:
+    __slots__ = ('url', 'titles', 'paragraphs', 'images', 'emails', 'links', 'text')
+    
+    def __init__(self, url, titles=(), paragraphs=(), images=(), emails=(), links=(), text=''):
+        """
+        Fields scraped from one page, stored as tuples of strings
+        
+        URLs are interned, so links shared by many pages (navigation,
+        footers) are stored once.
+        
+        Args:
+            url (str): Page URL
+            titles (iterable): Title texts
+            paragraphs (iterable): Paragraph texts
+            images (iterable): Image URLs
+            emails (iterable): Email addresses
+            links (iterable): Link URLs
+            text (str): Page text
+        """
+        intern = sys.intern
+        self.url = intern(url)
+        self.titles = tuple(titles)
+        self.paragraphs = tuple(paragraphs)
+        self.images = tuple(intern(image) for image in images)
+        self.emails = tuple(emails)
+        self.links = tuple(intern(link) for link in links)
+        self.text = text
+    
+    @classmethod
+    def from_fields(cls, url, fields):
+        """
+        Build a record from an extract_fields() or ExtractionPlan.apply() result
+        
+        Args:
+            url (str): Page URL
+            fields (dict): Field name -> value; unknown names are ignored
+        
+        Returns:
+            PageRecord: Record
+        """
+        return cls(url, **{name: value for name, value in fields.items() if name in cls.__slots__})
+    
+    def to_dict(self):
+        """
+        JSON-compatible dictionary (tuples become lists)
+        
+        Returns:
+            dict: Field name -> value
+        """
+        return {name: list(value) if isinstance(value, tuple) else value
+                for name in self.__slots__ for value in (getattr(self, name),)}
+    
+    def __eq__(self, other):
+        if not isinstance(other, PageRecord):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+    
+    def __repr__(self):
+        return f"PageRecord(url={self.url!r}, titles={len(self.titles)}, links={len(self.links)})"
+
+def release_tree(soup):
+    """
+    Tear down a parse tree right away
+    
+    BeautifulSoup trees are full of reference cycles, so a dropped tree waits
+    for the cyclic garbage collector; decompose() breaks the cycles and the
+    memory is returned immediately. The tree is unusable afterwards.
+    
+    Args:
+        soup (BeautifulSoup): Tree to destroy (None is ignored)
+    """
+    if soup is not None:
+        soup.decompose()
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+def current_rss_bytes():
+    """
+    Current resident set size of this process
+    
+    Read from /proc on Linux; elsewhere the peak so far is returned.
+    
+    Returns:
+        int: Bytes, or None where neither source is available
+    """
+    try:
+        with open('/proc/self/statm', 'rb') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return peak_rss_bytes()
+
+def peak_rss_bytes():
+    """
+    Peak resident set size of this process
+    
+    Returns:
+        int: Bytes, or None where the resource module is unavailable
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+class MemoryMonitor:
+    def __init__(self, metrics=None):
+        """
+        Track RSS while pages are processed
+        
+        RSS is sampled when each page's tree is fully built (its largest
+        point). The growth over the starting RSS divided by the most pages
+        held at once estimates the memory one in-flight page costs.
+        
+        Args:
+            metrics (MetricsRegistry): Registry receiving a page_rss_bytes
+                histogram (optional)
+        """
+        self.metrics = metrics
+        self.baseline = current_rss_bytes() or 0
+        self.peak = self.baseline
+        self.pages = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+    
+    def start_page(self):
+        """
+        Note that a page is about to be parsed
+        
+        Called once the page is downloaded and holds a parse slot, so
+        in-flight pages are those whose trees may be alive; pages still
+        downloading are not counted.
+        """
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+    
+    def sample(self):
+        """
+        Sample RSS while a page's tree is alive
+        
+        Returns:
+            int: Current RSS in bytes
+        """
+        rss = current_rss_bytes() or 0
+        with self._lock:
+            self.peak = max(self.peak, rss)
+        if self.metrics is not None:
+            self.metrics.observe('page_rss_bytes', rss, buckets=RSS_BUCKETS)
+        return rss
+    
+    def end_page(self):
+        """
+        Note that a page finished (its tree is released)
+        """
+        with self._lock:
+            self.in_flight -= 1
+            self.pages += 1
+    
+    def per_page_bytes(self):
+        """
+        Estimated memory per in-flight page
+        
+        Returns:
+            int: Bytes, or None before any page was sampled
+        """
+        if not self.max_in_flight:
+            return None
+        return max(0, self.peak - self.baseline) // self.max_in_flight
+    
+    def suggest_workers(self, budget_bytes):
+        """
+        Concurrency that fits a memory budget at the observed per-page cost
+        
+        Args:
+            budget_bytes (int): Total RSS the process may use
+        
+        Returns:
+            int: Suggested max_workers (at least 1), or None before any page
+        """
+        per_page = self.per_page_bytes()
+        if per_page is None:
+            return None
+        return max(1, (budget_bytes - self.baseline) // max(per_page, 1))
+    
+    def report(self):
+        """
+        Summary for logs or benchmark output
+        
+        Returns:
+            dict: pages, baseline/peak RSS, max in-flight pages and the
+                per-page estimate
+        """
+        return {
+            'pages': self.pages,
+            'baseline_rss_bytes': self.baseline,
+            'peak_rss_bytes': self.peak,
+            'max_in_flight': self.max_in_flight,
+            'per_page_bytes': self.per_page_bytes(),
+        }
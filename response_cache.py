@@ -0,0 +1,286 @@
+"""
+On-disk HTTP response cache with conditional revalidation and LRU eviction
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+import config
+from url_utils import normalize_url
+
+class ResponseCache:
+    def __init__(self, directory=config.CACHE_DIRECTORY, max_bytes=config.CACHE_MAX_BYTES):
+        """
+        Initialize the response cache
+        
+        Only successful responses that carry an ETag or Last-Modified validator
+        are stored, since anything else could not be revalidated.
+        
+        Args:
+            directory (str): Cache directory
+            max_bytes (int): Size cap for stored bodies; least recently used
+                entries are evicted beyond it
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._index = OrderedDict()  # key -> body size, least recently used first
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+    
+    def get(self, url):
+        """
+        Look up a cached response
+        
+        Args:
+            url (str): Request URL
+        
+        Returns:
+            tuple: (meta, body) or None if the URL is not cached
+        """
+        key = self._key(url)
+        with self._lock:
+            if key not in self._index:
+                self.misses += 1
+                return None
+        try:
+            with open(self._path(key, '.json'), 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(self._path(key, '.body'), 'rb') as f:
+                body = f.read()
+        except (OSError, ValueError):
+            self._remove(key)
+            with self._lock:
+                self.misses += 1
+            return None
+        return meta, body
+    
+    @staticmethod
+    def conditional_headers(meta):
+        """
+        Build revalidation headers for a cached entry
+        
+        Args:
+            meta (dict): Entry metadata returned by get()
+        
+        Returns:
+            dict: If-None-Match / If-Modified-Since headers
+        """
+        headers = CaseInsensitiveDict(meta['headers'])
+        conditional = {}
+        if 'ETag' in headers:
+            conditional['If-None-Match'] = headers['ETag']
+        if 'Last-Modified' in headers:
+            conditional['If-Modified-Since'] = headers['Last-Modified']
+        return conditional
+    
+    def store(self, url, response):
+        """
+        Store a response if it can be revalidated later
+        
+        Args:
+            url (str): Request URL
+            response (requests.Response): Successful response
+        
+        Returns:
+            bool: True if the response was stored
+        """
+        headers = response.headers
+        if response.status_code != 200 or 'no-store' in headers.get('Cache-Control', ''):
+            return False
+        if 'ETag' not in headers and 'Last-Modified' not in headers:
+            return False
+        
+        key = self._key(url)
+        body = response.content
+        meta = {
+            'url': url,
+            'status': response.status_code,
+            'headers': dict(headers),
+            'stored_at': time.time(),
+        }
+        os.makedirs(os.path.dirname(self._path(key, '.body')), exist_ok=True)
+        self._write_atomic(self._path(key, '.body'), body)
+        self._write_atomic(self._path(key, '.json'), json.dumps(meta).encode('utf-8'))
+        
+        with self._lock:
+            self.total_bytes -= self._index.pop(key, 0)
+            self._index[key] = len(body)
+            self.total_bytes += len(body)
+            evicted = self._evict()
+        for old_key in evicted:
+            self._delete_files(old_key)
+        return True
+    
+    def revalidated(self, url, meta, body, response):
+        """
+        Record a 304 response and build the response to hand back to callers
+        
+        Args:
+            url (str): Request URL
+            meta (dict): Cached entry metadata
+            body (bytes): Cached body
+            response (requests.Response): The 304 response
+        
+        Returns:
+            requests.Response: 200 response rebuilt from the cache
+        """
+        # A 304 may carry fresh validators; keep them for the next revalidation
+        headers = CaseInsensitiveDict(meta['headers'])
+        for name in ('ETag', 'Last-Modified', 'Cache-Control', 'Expires', 'Date'):
+            if name in response.headers:
+                headers[name] = response.headers[name]
+        meta = dict(meta, headers=dict(headers))
+        key = self._key(url)
+        self._write_atomic(self._path(key, '.json'), json.dumps(meta).encode('utf-8'))
+        
+        with self._lock:
+            self.hits += 1
+            if key in self._index:
+                self._index.move_to_end(key)
+        try:
+            os.utime(self._path(key, '.body'))
+        except OSError:
+            pass
+        return self.build_response(url, meta, body)
+    
+    @staticmethod
+    def build_response(url, meta, body):
+        """
+        Rebuild a requests.Response from a cached entry
+        
+        Args:
+            url (str): Request URL
+            meta (dict): Cached entry metadata
+            body (bytes): Cached body
+        
+        Returns:
+            requests.Response: Response with from_cache set to True
+        """
+        response = requests.Response()
+        response.status_code = meta['status']
+        response.headers = CaseInsensitiveDict(meta['headers'])
+        response._content = body
+        response.url = url
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response.from_cache = True
+        return response
+    
+    def clear(self):
+        """
+        Remove every cached entry
+        """
+        with self._lock:
+            keys = list(self._index)
+            self._index.clear()
+            self.total_bytes = 0
+        for key in keys:
+            self._delete_files(key)
+    
+    def _load_index(self):
+        """
+        Rebuild the LRU index from the files on disk, oldest access first
+        """
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith('.body'):
+                    continue
+                try:
+                    stat = os.stat(os.path.join(root, name))
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, name[:-len('.body')], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self.total_bytes += size
+        for old_key in self._evict():
+            self._delete_files(old_key)
+    
+    def _evict(self):
+        """
+        Drop least recently used entries until under the size cap (lock must be held)
+        
+        Returns:
+            list: Keys whose files should be deleted
+        """
+        evicted = []
+        while self.total_bytes > self.max_bytes and len(self._index) > 1:
+            key, size = self._index.popitem(last=False)
+            self.total_bytes -= size
+            evicted.append(key)
+        return evicted
+    
+    def _remove(self, key):
+        """
+        Forget an entry and delete its files
+        
+        Args:
+            key (str): Cache key
+        """
+        with self._lock:
+            self.total_bytes -= self._index.pop(key, 0)
+        self._delete_files(key)
+    
+    def _delete_files(self, key):
+        """
+        Delete the files of an entry, ignoring ones that are already gone
+        
+        Args:
+            key (str): Cache key
+        """
+        for suffix in ('.body', '.json'):
+            try:
+                os.remove(self._path(key, suffix))
+            except OSError:
+                pass
+    
+    @staticmethod
+    def _key(url):
+        """
+        Cache key for a URL
+        
+        Args:
+            url (str): Request URL
+        
+        Returns:
+            str: Hex digest of the normalized URL
+        """
+        return hashlib.sha256(normalize_url(url).encode('utf-8')).hexdigest()
+    
+    def _path(self, key, suffix):
+        """
+        Path of an entry file, fanned out into subdirectories by key prefix
+        
+        Args:
+            key (str): Cache key
+            suffix (str): '.body' or '.json'
+        
+        Returns:
+            str: File path
+        """
+        return os.path.join(self.directory, key[:2], key + suffix)
+    
+    @staticmethod
+    def _write_atomic(path, data):
+        """
+        Write a file via a temporary file and rename
+        
+        Args:
+            path (str): Destination path
+            data (bytes): File content
+        """
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
@@ -0,0 +1,215 @@
+"""
+Retry policy with jittered exponential backoff and a per-host circuit breaker
+"""
+
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+
+import config
+
+class CircuitOpenError(requests.RequestException):
+    """Raised instead of sending a request to a host whose circuit is open"""
+
+class RetryPolicy:
+    # Exceptions that indicate a transient network problem
+    TRANSIENT_EXCEPTIONS = (
+        requests.ConnectionError,
+        requests.Timeout,
+        requests.exceptions.ChunkedEncodingError,
+    )
+    
+    def __init__(self, max_retries=config.MAX_RETRIES, backoff_factor=config.BACKOFF_FACTOR,
+                 max_backoff=config.MAX_BACKOFF, retry_statuses=(429, 500, 502, 503, 504)):
+        """
+        Initialize the retry policy
+        
+        Args:
+            max_retries (int): Retries after the first attempt
+            backoff_factor (float): Base delay in seconds, doubled per attempt
+            max_backoff (float): Cap for a single delay, including Retry-After
+            retry_statuses (tuple): HTTP status codes worth retrying
+        """
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.retry_statuses = retry_statuses
+    
+    def is_transient(self, error):
+        """
+        Check whether an error is worth retrying
+        
+        Args:
+            error (requests.RequestException): Error raised by a request
+        
+        Returns:
+            bool: True for network errors, timeouts and retryable statuses
+        """
+        if isinstance(error, CircuitOpenError):
+            return False
+        if isinstance(error, self.TRANSIENT_EXCEPTIONS):
+            return True
+        response = getattr(error, 'response', None)
+        return response is not None and response.status_code in self.retry_statuses
+    
+    def backoff(self, attempt, response=None):
+        """
+        Delay before the next attempt
+        
+        Honors Retry-After on 429/503 responses; otherwise uses full-jitter
+        exponential backoff.
+        
+        Args:
+            attempt (int): Number of attempts made so far, starting at 0
+            response (requests.Response): Failed response, if any
+        
+        Returns:
+            float: Seconds to wait
+        """
+        if response is not None and response.status_code in (429, 503):
+            retry_after = self.parse_retry_after(response.headers.get('Retry-After'))
+            if retry_after is not None:
+                return min(retry_after, self.max_backoff)
+        return random.uniform(0, min(self.max_backoff, self.backoff_factor * (2 ** attempt)))
+    
+    @staticmethod
+    def parse_retry_after(value):
+        """
+        Parse a Retry-After header value
+        
+        Args:
+            value (str): Delay in seconds or an HTTP date
+        
+        Returns:
+            float: Seconds to wait, or None if missing or invalid
+        """
+        if not value:
+            return None
+        value = value.strip()
+        if value.isdigit():
+            return float(value)
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if retry_at is None:
+            return None
+        return max(0.0, retry_at.timestamp() - time.time())
+
+class CircuitBreaker:
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+    
+    def __init__(self, failure_threshold=config.CIRCUIT_FAILURE_THRESHOLD,
+                 reset_timeout=config.CIRCUIT_RESET_TIMEOUT):
+        """
+        Initialize the circuit breaker
+        
+        After failure_threshold consecutive failures a host's circuit opens
+        and requests to it are refused. Once reset_timeout has passed a single
+        probe request is let through: success closes the circuit, failure
+        opens it again.
+        
+        Args:
+            failure_threshold (int): Consecutive failures that open a circuit
+            reset_timeout (float): Seconds before an open circuit is probed
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._hosts = {}  # host -> [state, consecutive failures, opened at]
+        self._lock = threading.Lock()
+    
+    def state(self, host):
+        """
+        Current state of a host's circuit
+        
+        Args:
+            host (str): Host key
+        
+        Returns:
+            str: CLOSED, OPEN or HALF_OPEN
+        """
+        with self._lock:
+            entry = self._hosts.get(host)
+            return entry[0] if entry else self.CLOSED
+    
+    def is_open(self, host):
+        """
+        Check whether requests to a host would be refused right now
+        
+        Args:
+            host (str): Host key
+        
+        Returns:
+            bool: True while the circuit is open and not yet due for a probe
+        """
+        with self._lock:
+            entry = self._hosts.get(host)
+            if entry is None or entry[0] == self.CLOSED:
+                return False
+            if entry[0] == self.HALF_OPEN:
+                return True  # probe already in flight
+            return time.monotonic() - entry[2] < self.reset_timeout
+    
+    def allow(self, host):
+        """
+        Ask permission to send a request to a host
+        
+        Args:
+            host (str): Host key
+        
+        Returns:
+            bool: True if the request may be sent (possibly as the probe)
+        """
+        with self._lock:
+            entry = self._hosts.get(host)
+            if entry is None or entry[0] == self.CLOSED:
+                return True
+            if entry[0] == self.OPEN and time.monotonic() - entry[2] >= self.reset_timeout:
+                entry[0] = self.HALF_OPEN
+                return True
+            return False
+    
+    def record_success(self, host):
+        """
+        Record a successful request, closing the host's circuit
+        
+        Args:
+            host (str): Host key
+        """
+        with self._lock:
+            self._hosts.pop(host, None)
+    
+    def release(self, host):
+        """
+        Give back a probe that ended without telling anything about the host
+        
+        A half-open circuit goes back to open and the next request to the
+        host becomes the probe. In any other state this does nothing.
+        
+        Args:
+            host (str): Host key
+        """
+        with self._lock:
+            entry = self._hosts.get(host)
+            if entry is not None and entry[0] == self.HALF_OPEN:
+                entry[0] = self.OPEN
+                entry[2] = time.monotonic() - self.reset_timeout
+    
+    def record_failure(self, host):
+        """
+        Record a failed request, opening the circuit if needed
+        
+        Args:
+            host (str): Host key
+        """
+        with self._lock:
+            entry = self._hosts.setdefault(host, [self.CLOSED, 0, 0.0])
+            entry[1] += 1
+            if entry[0] == self.HALF_OPEN or entry[1] >= self.failure_threshold:
+                entry[0] = self.OPEN
+                entry[2] = time.monotonic()
@@ -0,0 +1,173 @@
+"""
+Per-host robots.txt cache with allow/disallow checks, Crawl-delay and
+sitemap discovery
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+
+import requests
+
+import config
+
+class RobotsDisallowed(requests.RequestException):
+    """Raised instead of fetching a URL that robots.txt disallows"""
+
+class RobotsCache:
+    def __init__(self, session=None, user_agent=config.ROBOTS_USER_AGENT, ttl=config.ROBOTS_TTL,
+                 error_ttl=config.ROBOTS_ERROR_TTL, timeout=10, max_hosts=config.ROBOTS_MAX_HOSTS):
+        """
+        Initialize the robots.txt cache
+        
+        Missing robots.txt files (4xx) allow everything; server errors and
+        network failures disallow the host until error_ttl has passed, as
+        RFC 9309 recommends.
+        
+        Args:
+            session (requests.Session): Session used to fetch robots.txt
+            user_agent (str): Product token matched against User-agent lines
+            ttl (float): Seconds a fetched robots.txt is reused
+            error_ttl (float): Seconds a failed fetch is reused
+            timeout (float): Request timeout in seconds
+            max_hosts (int): Hosts kept; the least recently used are dropped
+        """
+        self.session = session or requests.Session()
+        self.user_agent = user_agent
+        self.ttl = ttl
+        self.error_ttl = error_ttl
+        self.timeout = timeout
+        self.max_hosts = max_hosts
+        self._entries = OrderedDict()  # origin -> (expires at, RobotFileParser)
+        self._host_locks = {}
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def origin(url):
+        """
+        scheme://host[:port] a URL's robots.txt belongs to
+        """
+        parts = urlsplit(url)
+        return f"{parts.scheme.lower()}://{parts.netloc.lower()}"
+    
+    def get(self, url):
+        """
+        Parsed robots.txt for a URL's host, fetched if missing or expired
+        
+        Concurrent callers for the same host wait for a single fetch.
+        
+        Args:
+            url (str): Any URL on the host
+        
+        Returns:
+            RobotFileParser: Parsed rules
+        """
+        origin = self.origin(url)
+        entry = self._lookup(origin)
+        if entry is not None:
+            return entry
+        with self._lock:
+            host_lock = self._host_locks.setdefault(origin, threading.Lock())
+        with host_lock:
+            entry = self._lookup(origin)
+            if entry is None:
+                parser, ttl = self._fetch(origin)
+                with self._lock:
+                    self._entries[origin] = (time.monotonic() + ttl, parser)
+                    self._entries.move_to_end(origin)
+                    while len(self._entries) > self.max_hosts:
+                        evicted, _ = self._entries.popitem(last=False)
+                        self._host_locks.pop(evicted, None)
+                entry = parser
+        return entry
+    
+    def _lookup(self, origin):
+        """
+        Cached parser for an origin if still fresh
+        """
+        with self._lock:
+            entry = self._entries.get(origin)
+            if entry is None or entry[0] <= time.monotonic():
+                return None
+            self._entries.move_to_end(origin)
+            return entry[1]
+    
+    def _fetch(self, origin):
+        """
+        Download and parse one robots.txt
+        
+        Returns:
+            tuple: (RobotFileParser, seconds to cache it)
+        """
+        parser = RobotFileParser(f"{origin}/robots.txt")
+        try:
+            response = self.session.get(parser.url, timeout=self.timeout, stream=True)
+        except requests.RequestException:
+            parser.disallow_all = True
+            return parser, self.error_ttl
+        with response:
+            if response.status_code >= 500:
+                parser.disallow_all = True
+                return parser, self.error_ttl
+            if response.status_code >= 400:
+                parser.allow_all = True
+                return parser, self.ttl
+            # Only the first ROBOTS_MAX_BYTES are parsed, like major crawlers do
+            body = response.raw.read(config.ROBOTS_MAX_BYTES, decode_content=True)
+        parser.parse(body.decode('utf-8', errors='replace').splitlines())
+        return parser, self.ttl
+    
+    def allowed(self, url):
+        """
+        Check whether robots.txt allows fetching a URL
+        
+        Args:
+            url (str): URL to check
+        
+        Returns:
+            bool: True if allowed
+        """
+        return self.get(url).can_fetch(self.user_agent, url)
+    
+    def crawl_delay(self, url):
+        """
+        Delay robots.txt asks for on a URL's host
+        
+        Uses Crawl-delay, or Request-rate converted to seconds per request.
+        
+        Args:
+            url (str): Any URL on the host
+        
+        Returns:
+            float: Seconds between requests, or None if unspecified
+        """
+        parser = self.get(url)
+        delay = parser.crawl_delay(self.user_agent)
+        if delay is not None:
+            return float(delay)
+        rate = parser.request_rate(self.user_agent)
+        if rate is not None and rate.requests:
+            return rate.seconds / rate.requests
+        return None
+    
+    def sitemaps(self, url):
+        """
+        Sitemap URLs listed in a host's robots.txt
+        
+        Args:
+            url (str): Any URL on the host
+        
+        Returns:
+            list: Sitemap URLs (empty if none are listed)
+        """
+        return self.get(url).site_maps() or []
+    
+    def clear(self):
+        """
+        Drop every cached robots.txt
+        """
+        with self._lock:
+            self._entries.clear()
+            self._host_locks.clear()
@@ -4,55 +4,658 @@ Handles HTTP requests and basic HTML parsing
 """
 
 import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
+from bs4.builder import builder_registry
 import time
 import logging
-from urllib.parse import urljoin, urlparse
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urlparse
+
+import config
+from charset import CharsetDetector
+from extraction_plan import select
+from link_extractor import LinkExtractor
+from politeness import HostScheduler
+from records import release_tree
+from response_cache import ResponseCache
+from retry import RetryPolicy, CircuitBreaker, CircuitOpenError
+from robots import RobotsCache, RobotsDisallowed
+from session import build_session, DNSCache
+from metrics import REGISTRY, BYTES_BUCKETS, use_registry
+from streaming import ResponseTooLarge, check_response, iter_body, read_body, iter_links
 
 class WebScraper:
-    def __init__(self, delay=1, timeout=10):
+    SUPPORTED_PARSERS = ('lxml', 'html.parser', 'html5lib')
+    
+    def __init__(self, delay=config.DEFAULT_DELAY, timeout=10, max_workers=8, per_host_limit=1,
+                 host_delays=None, cache=None, parser=None, parse_only=None,
+                 retry_policy=None, circuit_breaker=None, pool_maxsize=None,
+                 pool_connections=config.POOL_CONNECTIONS, keep_alive=True, dns_cache=False,
+                 metrics=None, stream=False, max_bytes=config.STREAM_MAX_BYTES,
+                 allowed_content_types=config.STREAM_CONTENT_TYPES, robots=None, charsets=True,
+                 link_extractor=None):
         """
         Initialize the web scraper
         
         Args:
-            delay (int): Delay between requests in seconds
+            delay (int): Delay between requests to the same host in seconds
             timeout (int): Request timeout in seconds
+            max_workers (int): Global concurrency limit for get_pages
+            per_host_limit (int): Concurrent requests allowed per host in get_pages
+            host_delays (dict): Per-host delay overrides, keyed by host name
+            cache (ResponseCache or bool): Response cache; True uses the
+                default cache directory from config
+            parser (str): 'lxml', 'html.parser' or 'html5lib' (defaults to
+                config.DEFAULT_PARSER, or 'html.parser' if that is not installed)
+            parse_only (SoupStrainer or list): Default partial-parse filter,
+                see parse()
+            retry_policy (RetryPolicy): Retry settings (defaults from config)
+            circuit_breaker (CircuitBreaker): Per-host breaker (defaults from
+                config; False disables it)
+            pool_maxsize (int): Connections kept per host (defaults to
+                config.POOL_MAXSIZE, raised to per_host_limit if smaller)
+            pool_connections (int): Number of hosts with pooled connections
+            keep_alive (bool): Reuse connections between requests
+            dns_cache (DNSCache or bool): In-process DNS cache; True installs
+                one with config.DNS_CACHE_TTL
+            metrics (MetricsRegistry): Registry for request/parse timings,
+                byte counts and status codes (defaults to the shared
+                metrics.REGISTRY, which records nothing until metrics.enable())
+            stream (bool): Download bodies in chunks, rejecting disallowed
+                content types and bodies over max_bytes before they are
+                fully read
+            max_bytes (int): Body size cap in streaming mode (None for no cap)
+            allowed_content_types (tuple): Media types accepted in streaming
+                mode (None accepts any)
+            robots (RobotsCache or bool): Respect robots.txt: disallowed URLs
+                raise RobotsDisallowed and Crawl-delay raises the host's
+                delay; True uses a cache on this scraper's session
+            charsets (CharsetDetector or bool): Finds each page's encoding from
+                the BOM, HTTP header, <meta> tag or host history before
+                falling back to statistical detection; False leaves it to
+                BeautifulSoup
+            link_extractor (LinkExtractor): Link normalization and
+                include/exclude filters for extract_links and iter_links
+                (defaults to LinkExtractor())
         """
         self.delay = delay
         self.timeout = timeout
-        self.session = requests.Session()
+        self.max_workers = max_workers
+        self.per_host_limit = per_host_limit
+        self.stream = stream
+        self.max_bytes = max_bytes
+        self.allowed_content_types = allowed_content_types
+        self.scheduler = HostScheduler(default_delay=delay, host_delays=host_delays)
+        self.cache = ResponseCache() if cache is True else cache
+        self.parse_only = parse_only
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.breaker = CircuitBreaker() if circuit_breaker is None else circuit_breaker
+        self.metrics = metrics or REGISTRY
+        self.session = build_session(
+            pool_connections=pool_connections,
+            pool_maxsize=max(pool_maxsize or config.POOL_MAXSIZE, per_host_limit),
+            keep_alive=keep_alive,
+        )
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         })
+        self.dns_cache = DNSCache(metrics=self.metrics) if dns_cache is True else dns_cache or None
+        if self.dns_cache:
+            self.dns_cache.install()
+        self.robots = RobotsCache(self.session, timeout=timeout) if robots is True else robots or None
+        self.charsets = CharsetDetector(metrics=self.metrics) if charsets is True else charsets or None
+        self.link_extractor = link_extractor or LinkExtractor()
+        if metrics is not None:
+            # A dedicated registry also exports this scraper's connection counters
+            metrics.add_collector(self._connection_gauges)
         
         # Setup logging
         logging.basicConfig(level=logging.INFO)
         self.logger = logging.getLogger(__name__)
+        
+        self.parser = self._resolve_parser(parser)
+    
+    def _resolve_parser(self, parser):
+        """
+        Validate the requested parser, falling back for the default one
+        
+        Args:
+            parser (str): Requested parser name or None for the default
+        
+        Returns:
+            str: Parser name to pass to BeautifulSoup
+        
+        Raises:
+            ValueError: If an explicitly requested parser is unknown or not installed
+        """
+        if parser is None:
+            parser = config.DEFAULT_PARSER
+            if builder_registry.lookup(parser) is None:
+                self.logger.warning(f"Parser '{parser}' is not installed, using 'html.parser'")
+                parser = 'html.parser'
+            return parser
+        
+        if parser not in self.SUPPORTED_PARSERS:
+            raise ValueError(f"Unsupported parser '{parser}', expected one of {self.SUPPORTED_PARSERS}")
+        if builder_registry.lookup(parser) is None:
+            raise ValueError(f"Parser '{parser}' is not installed")
+        return parser
+    
+    def fetch(self, url, stream=False, headers=None):
+        """
+        Fetch a URL using the shared session
+        
+        Transient failures (network errors, timeouts, 429/5xx) are retried
+        with backoff per the retry policy, and count towards the host's
+        circuit breaker. With a cache configured, cached URLs are revalidated
+        with If-None-Match / If-Modified-Since and a 304 is served from the cache.
+        
+        Args:
+            url (str): URL to fetch
+            stream (bool): Return once the content type passes the streaming
+                checks, leaving the body unread (read it with
+                streaming.iter_body, which enforces max_bytes; a large
+                Content-Length is not rejected up front, so the caller can
+                use the body up to the cap)
+            headers (dict): Extra request headers, e.g. conditional ones
+                (a 304 they produce is returned as is)
+        
+        Returns:
+            requests.Response: Successful response
+        
+        Raises:
+            requests.RequestException: On network errors or HTTP error status;
+                CircuitOpenError if the host's circuit is open;
+                ResponseTooLarge / UnsupportedContentType in streaming mode;
+                RobotsDisallowed if robots.txt forbids the URL
+        """
+        if self.robots is not None:
+            self._check_robots(url)
+        host = self.scheduler.host_key(url)
+        if self.breaker and not self.breaker.allow(host):
+            raise CircuitOpenError(f"Circuit open for {host}, skipping {url}")
+        
+        try:
+            return self._fetch(url, host, stream, headers)
+        except BaseException:
+            if self.breaker:
+                # An error that says nothing about the host (e.g. InvalidURL)
+                # must not leave its probe in flight forever
+                self.breaker.release(host)
+            raise
+    
+    def _fetch(self, url, host, stream=False, headers=None):
+        """
+        Send a request with retries, see fetch()
+        
+        Args:
+            url (str): URL to fetch
+            host (str): Scheduler host key of the URL
+            stream (bool): Leave the body unread
+            headers (dict): Extra request headers
+        
+        Returns:
+            requests.Response: Successful response
+        """
+        attempt = 0
+        while True:
+            try:
+                response = self._send(url, stream, headers)
+            except requests.RequestException as e:
+                self.metrics.inc('http_errors_total', error=type(e).__name__)
+                if not self.retry_policy.is_transient(e):
+                    if self.breaker and e.response is not None:
+                        self.breaker.record_success(host)  # host answered, e.g. a 404
+                    raise
+                if self.breaker:
+                    self.breaker.record_failure(host)
+                if attempt >= self.retry_policy.max_retries or (self.breaker and not self.breaker.allow(host)):
+                    raise
+                delay = self.retry_policy.backoff(attempt, e.response)
+                self.logger.warning(f"Retrying {url} in {delay:.1f}s after error: {e}")
+                self.metrics.inc('http_retries_total')
+                self.scheduler.defer(host, delay)
+                self.scheduler.wait(host)
+                attempt += 1
+                continue
+            
+            if self.breaker:
+                self.breaker.record_success(host)
+            return response
+    
+    def _check_robots(self, url):
+        """
+        Apply a host's robots.txt to a URL
+        
+        Args:
+            url (str): URL about to be fetched
+        
+        Raises:
+            RobotsDisallowed: If robots.txt forbids the URL
+        """
+        if not self.robots.allowed(url):
+            raise RobotsDisallowed(f"robots.txt disallows {url}")
+        delay = self.robots.crawl_delay(url)
+        if delay is not None:
+            delay = min(delay, config.ROBOTS_MAX_CRAWL_DELAY)
+            if delay > self.scheduler.get_delay(url):
+                self.scheduler.set_delay(url, delay)
+                # The slot for this request was reserved with the old delay
+                self.scheduler.defer(url, delay)
+    
+    def _send(self, url, stream=False, headers=None):
+        """
+        Send a single request, going through the cache if configured
+        
+        Args:
+            url (str): URL to fetch
+            stream (bool): Leave the body unread, see fetch()
+            headers (dict): Extra request headers
+        
+        Returns:
+            requests.Response: Successful response
+        """
+        self.logger.info(f"Fetching: {url}")
+        cached = self.cache.get(url) if self.cache else None
+        if cached:
+            headers = dict(headers or {}, **self.cache.conditional_headers(cached[0]))
+        
+        timing = self.metrics.enabled
+        if timing:
+            start = time.perf_counter()
+        streaming = stream or self.stream
+        response = self.session.get(url, timeout=self.timeout, headers=headers, stream=streaming)
+        if streaming:
+            if not 200 <= response.status_code < 300:
+                response.close()  # error and 304 bodies are not needed
+            else:
+                try:
+                    # Callers reading the body themselves truncate at the cap
+                    check_response(response, self.allowed_content_types, None if stream else self.max_bytes)
+                    if not stream:
+                        read_body(response, self.max_bytes)
+                except requests.RequestException:
+                    response.close()
+                    raise
+        if timing:
+            self._record_response(response, time.perf_counter() - start)
+        if cached and response.status_code == 304:
+            self.metrics.inc('cache_hits_total')
+            return self.cache.revalidated(url, cached[0], cached[1], response)
+        response.raise_for_status()
+        
+        if self.cache and not stream:
+            self.cache.store(url, response)
+        return response
+    
+    def _record_response(self, response, total):
+        """
+        Record timings, size and status of a response
+        
+        Time to first byte is requests' elapsed time (connect included, since
+        urllib3 does not expose connect time separately); the rest of the
+        request time is the body download. Bodies left unread for streaming
+        are not counted.
+        
+        Args:
+            response (requests.Response): Response
+            total (float): Seconds spent in session.get
+        """
+        ttfb = response.elapsed.total_seconds()
+        self.metrics.inc('http_responses_total', status=response.status_code)
+        self.metrics.observe('http_ttfb_seconds', ttfb)
+        if response._content_consumed:
+            size = len(response.content)
+            self.metrics.inc('http_bytes_total', size)
+            self.metrics.observe('http_download_seconds', max(0.0, total - ttfb))
+            self.metrics.observe('http_response_bytes', size, buckets=BYTES_BUCKETS)
+    
+    def _connection_gauges(self):
+        """
+        Connection counters in the flat form metrics collectors return
+        
+        Returns:
+            dict: Gauge name -> value
+        """
+        stats = self.connection_stats()
+        dns = stats.pop('dns', {})
+        gauges = {f"http_{key}": value for key, value in stats.items()}
+        gauges.update({f"dns_cache_{key}": value for key, value in dns.items()})
+        return gauges
+    
+    def connection_stats(self):
+        """
+        Connection reuse and DNS cache counters
+        
+        Returns:
+            dict: Request/connection/handshake counts, plus DNS cache counts if enabled
+        """
+        stats = self.session.get_adapter('https://').stats()
+        if self.dns_cache:
+            stats['dns'] = self.dns_cache.stats()
+        return stats
+    
+    def parse(self, content, parse_only=None, encoding=None):
+        """
+        Parse raw HTML into a BeautifulSoup object
+        
+        Args:
+            content (bytes): Raw HTML content
+            parse_only (SoupStrainer or list): Only build the tree for matching
+                elements, e.g. ['a'] for link-only jobs or ['title'] for
+                title-only jobs (defaults to self.parse_only; ignored by html5lib)
+            encoding (str): Known encoding of content, which skips
+                BeautifulSoup's own detection (see page_encoding())
+        
+        Returns:
+            BeautifulSoup: Parsed HTML content
+        """
+        strainer = self._strainer(parse_only if parse_only is not None else self.parse_only)
+        if not self.metrics.enabled:
+            return BeautifulSoup(content, self.parser, parse_only=strainer, from_encoding=encoding)
+        with self.metrics.timer('parse_seconds', parser=self.parser):
+            return BeautifulSoup(content, self.parser, parse_only=strainer, from_encoding=encoding)
+    
+    def page_encoding(self, response):
+        """
+        Encoding of a response body, found by the charset detector
+        
+        Args:
+            response (requests.Response): Fetched page
+        
+        Returns:
+            str: Encoding, or None to let BeautifulSoup detect it
+        """
+        if self.charsets is None:
+            return None
+        return self.charsets.detect(response.content, response.headers.get('Content-Type'), response.url)[0]
+    
+    def parse_response(self, response, parse_only=None):
+        """
+        Parse a fetched page, using its detected encoding
+        
+        Args:
+            response (requests.Response): Fetched page
+            parse_only (SoupStrainer or list): Partial-parse filter, see parse()
+        
+        Returns:
+            BeautifulSoup: Parsed HTML content
+        """
+        return self.parse(response.content, parse_only, self.page_encoding(response))
+    
+    @staticmethod
+    def _strainer(parse_only):
+        """
+        Turn a tag name or list of tag names into a SoupStrainer
+        
+        Args:
+            parse_only (SoupStrainer, str or list): Partial-parse filter
+        
+        Returns:
+            SoupStrainer: Strainer, or None to parse the whole document
+        """
+        if parse_only is None or isinstance(parse_only, SoupStrainer):
+            return parse_only
+        if isinstance(parse_only, str):
+            parse_only = [parse_only]
+        return SoupStrainer(list(parse_only))
     
-    def get_page(self, url):
+    def get_page(self, url, parse_only=None):
         """
         Fetch a web page and return BeautifulSoup object
         
         Args:
             url (str): URL to scrape
+            parse_only (SoupStrainer or list): Partial-parse filter, see parse()
             
         Returns:
             BeautifulSoup: Parsed HTML content or None if failed
         """
         try:
-            self.logger.info(f"Fetching: {url}")
-            response = self.session.get(url, timeout=self.timeout)
-            response.raise_for_status()
+            # Be polite: only waits if this host was hit too recently
+            self.scheduler.wait(url)
+            response = self.fetch(url)
             
-            # Respect robots.txt and be polite
-            time.sleep(self.delay)
-            
-            return BeautifulSoup(response.content, 'html.parser')
+            return self.parse_response(response, parse_only)
             
         except requests.RequestException as e:
             self.logger.error(f"Error fetching {url}: {e}")
             return None
     
+    def get_pages(self, urls, max_workers=None, per_host_limit=None, max_pending=None, parse_only=None):
+        """
+        Fetch many pages concurrently, yielding results as they complete
+        
+        URLs are consumed lazily from the iterable, so very large URL lists
+        are never fully materialized. Requests to the same host are capped at
+        per_host_limit in flight and spaced by the scheduler's per-host delay;
+        other hosts keep the remaining workers busy.
+        
+        Args:
+            urls (iterable): URLs to fetch
+            max_workers (int): Global concurrency limit (defaults to self.max_workers)
+            per_host_limit (int): In-flight limit per host (defaults to self.per_host_limit)
+            max_pending (int): Max URLs buffered while waiting for a host slot
+            parse_only (SoupStrainer or list): Partial-parse filter, see parse()
+        
+        Yields:
+            tuple: (url, result) where result is a BeautifulSoup object, or the
+                requests.RequestException raised while fetching
+        """
+        task = lambda url: self._fetch_for_batch(url, parse_only)
+        return self._run_batch(urls, task, max_workers, per_host_limit, max_pending)
+    
+    def fetch_many(self, urls, max_workers=None, per_host_limit=None, max_pending=None, headers=None):
+        """
+        Fetch many URLs concurrently without parsing them
+        
+        Same scheduling as get_pages, for pipelines that parse elsewhere
+        (for example in a process pool).
+        
+        Args:
+            urls (iterable): URLs to fetch
+            max_workers (int): Global concurrency limit (defaults to self.max_workers)
+            per_host_limit (int): In-flight limit per host (defaults to self.per_host_limit)
+            max_pending (int): Max URLs buffered while waiting for a host slot
+            headers (callable): headers(url) -> extra request headers for that
+                URL, e.g. CrawlStateStore.conditional_headers
+        
+        Yields:
+            tuple: (url, result) where result is a requests.Response, or the
+                requests.RequestException raised while fetching
+        """
+        task = (lambda url: self.fetch(url, headers=headers(url))) if headers else self.fetch
+        return self._run_batch(urls, task, max_workers, per_host_limit, max_pending)
+    
+    def _run_batch(self, urls, task, max_workers=None, per_host_limit=None, max_pending=None):
+        """
+        Run task(url) for each URL on a thread pool with per-host limits
+        
+        Args:
+            urls (iterable): URLs to process
+            task (callable): Function run in a worker thread for each URL
+            max_workers (int): Global concurrency limit (defaults to self.max_workers)
+            per_host_limit (int): In-flight limit per host (defaults to self.per_host_limit)
+            max_pending (int): Max URLs buffered while waiting for a host slot
+        
+        Yields:
+            tuple: (url, result) where result is task's return value or the
+                requests.RequestException it raised
+        """
+        max_workers = max_workers or self.max_workers
+        per_host_limit = per_host_limit or self.per_host_limit
+        max_pending = max_pending or max_workers * 4
+        
+        url_iter = iter(urls)
+        exhausted = False
+        pending = {}      # host -> deque of URLs waiting for a slot
+        pending_count = 0
+        in_flight = {}    # host -> number of running requests
+        futures = {}      # future -> (url, host)
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            while True:
+                # Top up the pending buffer from the input
+                while not exhausted and pending_count < max_pending:
+                    try:
+                        url = next(url_iter)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    pending.setdefault(urlparse(url).netloc, deque()).append(url)
+                    pending_count += 1
+                
+                # Dispatch to hosts that have a free slot and whose delay has elapsed
+                next_ready = None
+                for host in list(pending):
+                    queue = pending[host]
+                    while queue and len(futures) < max_workers and in_flight.get(host, 0) < per_host_limit:
+                        if self.breaker and self.breaker.is_open(self.scheduler.host_key(host)):
+                            # Host is down: fail its URLs without using a worker
+                            url = queue.popleft()
+                            pending_count -= 1
+                            yield url, CircuitOpenError(f"Circuit open for {host}, skipping {url}")
+                            continue
+                        ready_in = self.scheduler.ready_in(host)
+                        if ready_in > 0:
+                            next_ready = ready_in if next_ready is None else min(next_ready, ready_in)
+                            break
+                        self.scheduler.reserve(host)
+                        url = queue.popleft()
+                        pending_count -= 1
+                        in_flight[host] = in_flight.get(host, 0) + 1
+                        futures[executor.submit(task, url)] = (url, host)
+                    if not queue:
+                        del pending[host]
+                
+                if not futures:
+                    if exhausted and not pending:
+                        return
+                    # Every buffered host is still cooling down
+                    time.sleep(next_ready or 0)
+                    continue
+                
+                done, _ = wait(futures, timeout=next_ready, return_when=FIRST_COMPLETED)
+                for future in done:
+                    url, host = futures.pop(future)
+                    in_flight[host] -= 1
+                    if not in_flight[host]:
+                        del in_flight[host]
+                    try:
+                        result = future.result()
+                    except requests.RequestException as e:
+                        self.logger.error(f"Error fetching {url}: {e}")
+                        result = e
+                    yield url, result
+    
+    def scrape_pages(self, urls, extract, max_workers=None, per_host_limit=None, max_pending=None,
+                     parse_only=None, monitor=None, max_trees=config.MAX_LIVE_TREES):
+        """
+        Fetch, parse and extract many pages, tearing each tree down at once
+        
+        Same scheduling as get_pages, but extract runs on the fetch thread
+        and the tree is decomposed as soon as it returns, so only records
+        wait to be consumed. Parsing is capped at max_trees pages at a time
+        while downloads continue on every worker, so memory follows
+        max_trees rather than max_workers; parsing holds the GIL anyway, so
+        the cap costs little throughput.
+        
+        Args:
+            urls (iterable): URLs to fetch
+            extract (callable): extract(scraper, url, soup) -> record; must
+                not keep references into the tree
+            max_workers (int): Global concurrency limit (defaults to self.max_workers)
+            per_host_limit (int): In-flight limit per host (defaults to self.per_host_limit)
+            max_pending (int): Max URLs buffered while waiting for a host slot
+            parse_only (SoupStrainer or list): Partial-parse filter, see parse()
+            monitor (MemoryMonitor): Samples RSS while each tree is alive
+            max_trees (int): Pages parsed and extracted at once (None for no cap)
+        
+        Yields:
+            tuple: (url, result) where result is the extracted record, or the
+                requests.RequestException raised while fetching
+        """
+        slots = threading.BoundedSemaphore(max_trees) if max_trees else None
+        task = lambda url: self._scrape_for_batch(url, extract, parse_only, monitor, slots)
+        return self._run_batch(urls, task, max_workers, per_host_limit, max_pending)
+    
+    def _scrape_for_batch(self, url, extract, parse_only=None, monitor=None, slots=None):
+        """
+        Worker body for scrape_pages: fetch, parse, extract and release one page
+        """
+        response = self.fetch(url)
+        if slots is not None:
+            slots.acquire()
+        if monitor is not None:
+            monitor.start_page()
+        try:
+            soup = self.parse_response(response, parse_only)
+            del response
+            try:
+                if monitor is not None:
+                    monitor.sample()
+                with use_registry(self.metrics):
+                    return extract(self, url, soup)
+            finally:
+                release_tree(soup)
+        finally:
+            if monitor is not None:
+                monitor.end_page()
+            if slots is not None:
+                slots.release()
+    
+    def _fetch_for_batch(self, url, parse_only=None):
+        """
+        Worker body for get_pages: fetch and parse one URL
+        
+        Args:
+            url (str): URL to fetch
+            parse_only (SoupStrainer or list): Partial-parse filter
+        
+        Returns:
+            BeautifulSoup: Parsed HTML content
+        """
+        response = self.fetch(url)
+        return self.parse_response(response, parse_only)
+    
+    def iter_links(self, url, filter_pattern=None):
+        """
+        Stream a page and yield its links while it downloads
+        
+        The streaming limits (max_bytes, allowed_content_types) apply whatever
+        the stream setting. Stopping the iteration early closes the connection
+        without downloading the rest of the page; a page over max_bytes is
+        cut off at the cap with a warning.
+        
+        Args:
+            url (str): URL to fetch
+            filter_pattern (str, list or PatternSet): Only yield links
+                matching these patterns (see extract_links)
+        
+        Yields:
+            str: Absolute, normalized URLs in document order, duplicates included
+        """
+        try:
+            self.scheduler.wait(url)
+            response = self.fetch(url, stream=True)
+        except requests.RequestException as e:
+            self.logger.error(f"Error fetching {url}: {e}")
+            return
+        
+        declared = 'charset=' in response.headers.get('Content-Type', '').lower()
+        chunks = iter_body(response, self.max_bytes)
+        try:
+            links = iter_links(chunks, response.url, response.encoding if declared else None)
+            yield from self.link_extractor.iter_links(links, response.url, filter_pattern, dedupe=False)
+        except ResponseTooLarge as e:
+            self.logger.warning(f"Stopped reading {url}: {e}")
+        except requests.RequestException as e:
+            self.logger.error(f"Error reading {url}: {e}")
+        finally:
+            chunks.close()
+    
     def extract_links(self, soup, base_url, filter_pattern=None):
         """
         Extract all links from a page
@@ -60,26 +663,14 @@ class WebScraper:
         Args:
             soup (BeautifulSoup): Parsed HTML
             base_url (str): Base URL for relative links
-            filter_pattern (str): Optional pattern to filter links
+            filter_pattern (str, list or PatternSet): Only keep links matching
+                these patterns, on top of the link extractor's own filters; a
+                str or list gives substrings
             
         Returns:
-            list: List of absolute URLs
+            list: Absolute, normalized URLs in document order, without duplicates
         """
-        links = []
-        if not soup:
-            return links
-            
-        for link in soup.find_all('a', href=True):
-            href = link['href']
-            absolute_url = urljoin(base_url, href)
-            
-            if filter_pattern:
-                if filter_pattern in absolute_url:
-                    links.append(absolute_url)
-            else:
-                links.append(absolute_url)
-                
-        return list(set(links))  # Remove duplicates
+        return self.link_extractor.extract(soup, base_url, filter_pattern)
     
     def extract_text(self, soup, selector=None):
         """
@@ -96,7 +687,7 @@ class WebScraper:
             return ""
             
         if selector:
-            elements = soup.select(selector)
+            elements = select(soup, selector)
             text = ' '.join([elem.get_text(strip=True) for elem in elements])
         else:
             text = soup.get_text(strip=True)
@@ -0,0 +1,183 @@
+"""
+HTTP session layer: tunable connection pooling, compression, DNS caching
+and connection-reuse counters
+"""
+
+import socket
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
+
+import config
+
+class CountingHTTPAdapter(HTTPAdapter):
+    def __init__(self, *args, **kwargs):
+        """
+        HTTPAdapter that counts requests and new connections
+        
+        Requests minus new connections is the number of requests that reused
+        a kept-alive connection. New HTTPS connections are TLS handshakes.
+        Accepts the same arguments as HTTPAdapter.
+        """
+        self._stats_lock = threading.Lock()
+        self.requests_sent = 0
+        self._retired = {'http': 0, 'https': 0}  # connections of evicted pools
+        super().__init__(*args, **kwargs)
+    
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        pools = self.poolmanager.pools
+        dispose = pools.dispose_func
+        
+        def retire(pool):
+            # Keep the counts of pools evicted from the pool manager
+            with self._stats_lock:
+                self._retired[pool.scheme] = self._retired.get(pool.scheme, 0) + pool.num_connections
+            if dispose:
+                dispose(pool)
+            else:
+                pool.close()
+        
+        pools.dispose_func = retire
+    
+    def send(self, request, **kwargs):
+        with self._stats_lock:
+            self.requests_sent += 1
+        return super().send(request, **kwargs)
+    
+    def stats(self):
+        """
+        Connection counters
+        
+        Returns:
+            dict: requests, connections_opened, connections_reused and tls_handshakes
+        """
+        opened = dict(self._retired)
+        for key in list(self.poolmanager.pools.keys()):
+            pool = self.poolmanager.pools.get(key)
+            if pool is not None:
+                opened[pool.scheme] = opened.get(pool.scheme, 0) + pool.num_connections
+        with self._stats_lock:
+            sent = self.requests_sent
+        total = sum(opened.values())
+        return {
+            'requests': sent,
+            'connections_opened': total,
+            'connections_reused': max(0, sent - total),
+            'tls_handshakes': opened.get('https', 0),
+        }
+
+class DNSCache:
+    def __init__(self, ttl=config.DNS_CACHE_TTL, metrics=None):
+        """
+        In-process cache for socket.getaddrinfo results
+        
+        Args:
+            ttl (float): Seconds a successful lookup is reused
+            metrics (MetricsRegistry): Records uncached lookup times, if given
+        """
+        self.ttl = ttl
+        self.metrics = metrics
+        self.lookups = 0
+        self.hits = 0
+        self._cache = {}
+        self._lock = threading.Lock()
+        self._original = None
+    
+    def getaddrinfo(self, host, port, family=0, type=0, proto=0, flags=0):
+        """
+        Cached drop-in replacement for socket.getaddrinfo
+        """
+        key = (host, port, family, type, proto, flags)
+        now = time.monotonic()
+        with self._lock:
+            self.lookups += 1
+            entry = self._cache.get(key)
+            if entry and entry[0] > now:
+                self.hits += 1
+                return entry[1]
+        resolve = self._original or socket.getaddrinfo
+        timing = self.metrics is not None and self.metrics.enabled
+        if timing:
+            start = time.perf_counter()
+        result = resolve(host, port, family, type, proto, flags)
+        if timing:
+            self.metrics.observe('dns_lookup_seconds', time.perf_counter() - start)
+        with self._lock:
+            self._cache[key] = (now + self.ttl, result)
+        return result
+    
+    def install(self):
+        """
+        Route all getaddrinfo calls in this process through the cache
+        
+        urllib3 resolves through socket.getaddrinfo, so this covers every
+        session. Installing twice is a no-op.
+        """
+        if self._original is None:
+            self._original = socket.getaddrinfo
+            socket.getaddrinfo = self.getaddrinfo
+    
+    def uninstall(self):
+        """
+        Restore the original socket.getaddrinfo
+        """
+        if self._original is not None:
+            socket.getaddrinfo = self._original
+            self._original = None
+    
+    def clear(self):
+        """
+        Drop every cached lookup
+        """
+        with self._lock:
+            self._cache.clear()
+    
+    def stats(self):
+        """
+        Lookup counters
+        
+        Returns:
+            dict: lookups, hits and cached entries
+        """
+        with self._lock:
+            return {'lookups': self.lookups, 'hits': self.hits, 'entries': len(self._cache)}
+
+def accept_encoding():
+    """
+    Accept-Encoding value for the codecs urllib3 can decode here
+    
+    Always gzip and deflate; br and zstd are added by urllib3 when the
+    brotli / zstandard packages are installed.
+    
+    Returns:
+        str: Header value
+    """
+    return ACCEPT_ENCODING
+
+def build_session(pool_connections=config.POOL_CONNECTIONS, pool_maxsize=config.POOL_MAXSIZE,
+                  keep_alive=True, user_agent=None):
+    """
+    Create a requests.Session with tuned pooling and compression
+    
+    Args:
+        pool_connections (int): Number of per-host pools kept (hosts with warm connections)
+        pool_maxsize (int): Connections kept per host
+        keep_alive (bool): Reuse connections between requests
+        user_agent (str): User-Agent header
+    
+    Returns:
+        requests.Session: Session with a CountingHTTPAdapter mounted for http and https
+    """
+    session = requests.Session()
+    adapter = CountingHTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers['Accept-Encoding'] = accept_encoding()
+    session.headers['Connection'] = 'keep-alive' if keep_alive else 'close'
+    if user_agent:
+        session.headers['User-Agent'] = user_agent
+    return session
@@ -0,0 +1,191 @@
+"""
+Streaming sitemap reader
+Parses sitemap.xml files and sitemap indexes (plain or gzipped) with an
+iterative parser, so URLs are yielded as they are read
+"""
+
+import gzip
+import io
+import logging
+import xml.etree.ElementTree as ET
+from urllib.parse import urljoin
+
+import requests
+
+import config
+from robots import RobotsCache
+from streaming import ResponseTooLarge
+
+# Namespace of the sitemap protocol; elements from extensions (image:,
+# video:, news:, ...) are ignored
+SITEMAP_NAMESPACE = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+
+def _sitemap_tag(tag):
+    """
+    Local name of a sitemap-protocol element, or None for extension elements
+    """
+    if not tag.startswith('{'):
+        return tag
+    namespace, _, name = tag[1:].partition('}')
+    return name if namespace == SITEMAP_NAMESPACE else None
+
+class _CappedReader(io.RawIOBase):
+    def __init__(self, fileobj, max_bytes, name):
+        """
+        File wrapper raising ResponseTooLarge after max_bytes have been read
+        """
+        self.fileobj = fileobj
+        self.max_bytes = max_bytes
+        self.name = name
+        self.count = 0
+    
+    def readable(self):
+        return True
+    
+    def readinto(self, buffer):
+        data = self.fileobj.read(len(buffer))
+        self.count += len(data)
+        if self.count > self.max_bytes:
+            raise ResponseTooLarge(f"Sitemap {self.name} exceeded the {self.max_bytes} byte cap")
+        buffer[:len(data)] = data
+        return len(data)
+
+def parse_sitemap(fileobj, max_bytes=None, name='sitemap'):
+    """
+    Stream entries out of a sitemap or sitemap index
+    
+    Elements are cleared as soon as they are read, so memory stays flat
+    however many entries the file holds. Gzipped input is detected from its
+    magic bytes. Only loc/lastmod elements that are direct children of an
+    entry, in the sitemap namespace (or none), are read, so extension tags
+    such as image:loc never replace the page URL.
+    
+    Args:
+        fileobj (file): Binary file object
+        max_bytes (int): Cap on the uncompressed size (None for no cap)
+        name (str): Name used in error messages
+    
+    Yields:
+        tuple: (kind, loc, lastmod) where kind is 'url' for pages and
+            'sitemap' for entries of a sitemap index (lastmod may be None)
+    """
+    stream = io.BufferedReader(fileobj) if not hasattr(fileobj, 'peek') else fileobj
+    if stream.peek(2)[:2] == b'\x1f\x8b':
+        stream = gzip.GzipFile(fileobj=stream)
+    if max_bytes:
+        stream = _CappedReader(stream, max_bytes, name)
+    
+    root = None
+    loc = lastmod = None
+    path = []  # local names of the open elements, None outside the namespace
+    for event, element in ET.iterparse(stream, events=('start', 'end')):
+        if event == 'start':
+            if root is None:
+                root = element
+            path.append(_sitemap_tag(element.tag))
+            continue
+        tag = path.pop()
+        if len(path) == 2 and path[-1] in ('url', 'sitemap'):  # child of an entry
+            if tag == 'loc':
+                loc = (element.text or '').strip()
+            elif tag == 'lastmod':
+                lastmod = (element.text or '').strip() or None
+        elif len(path) == 1 and tag in ('url', 'sitemap'):
+            if loc:
+                yield tag, loc, lastmod
+            loc = lastmod = None
+            root.clear()  # drop finished entries
+
+class SitemapReader:
+    def __init__(self, scraper=None, max_bytes=config.SITEMAP_MAX_BYTES, max_depth=config.SITEMAP_MAX_DEPTH):
+        """
+        Initialize the sitemap reader
+        
+        Args:
+            scraper (WebScraper): Scraper whose session, politeness delays and
+                robots.txt cache are used (a bare session if None)
+            max_bytes (int): Uncompressed size cap per sitemap file
+            max_depth (int): Levels of nested sitemap indexes followed
+        """
+        self.scraper = scraper
+        self.session = scraper.session if scraper is not None else requests.Session()
+        self.timeout = scraper.timeout if scraper is not None else 10
+        self.max_bytes = max_bytes
+        self.max_depth = max_depth
+        self.logger = logging.getLogger(__name__)
+    
+    def entries(self, sitemap_url):
+        """
+        Stream the entries of one sitemap file
+        
+        Args:
+            sitemap_url (str): Sitemap or sitemap index URL
+        
+        Yields:
+            tuple: (kind, loc, lastmod), see parse_sitemap()
+        
+        Raises:
+            requests.RequestException: If the sitemap cannot be fetched or is too large
+        """
+        if self.scraper is not None:
+            self.scraper.scheduler.wait(sitemap_url)
+        response = self.session.get(sitemap_url, timeout=self.timeout, stream=True)
+        with response:
+            response.raise_for_status()
+            response.raw.decode_content = True
+            response.raw.auto_close = False  # buffered readers may read again at EOF
+            yield from parse_sitemap(response.raw, self.max_bytes, sitemap_url)
+    
+    def iter_urls(self, sitemap_url, with_lastmod=False):
+        """
+        Stream every page URL reachable from a sitemap, following indexes
+        
+        Each sitemap file is read at most once. A sitemap that fails to
+        download or parse is logged and skipped.
+        
+        Args:
+            sitemap_url (str): Sitemap or sitemap index URL
+            with_lastmod (bool): Yield (url, lastmod) tuples instead of URLs
+        
+        Yields:
+            str: Page URLs (or (url, lastmod) tuples)
+        """
+        seen = set()
+        stack = [(sitemap_url, 0)]
+        while stack:
+            url, depth = stack.pop()
+            if url in seen:
+                continue
+            seen.add(url)
+            nested = []
+            try:
+                for kind, loc, lastmod in self.entries(url):
+                    if kind == 'sitemap':
+                        if depth < self.max_depth:
+                            nested.append((urljoin(url, loc), depth + 1))
+                    else:
+                        yield (loc, lastmod) if with_lastmod else loc
+            except (requests.RequestException, ET.ParseError, OSError, EOFError) as e:
+                self.logger.warning(f"Skipping sitemap {url}: {e}")
+            stack.extend(reversed(nested))
+    
+    def discover(self, site_url, with_lastmod=False):
+        """
+        Stream page URLs from a site's sitemaps
+        
+        Uses the Sitemap lines of robots.txt (through the scraper's robots
+        cache when it has one), falling back to /sitemap.xml.
+        
+        Args:
+            site_url (str): Any URL on the site
+            with_lastmod (bool): Yield (url, lastmod) tuples instead of URLs
+        
+        Yields:
+            str: Page URLs (or (url, lastmod) tuples)
+        """
+        robots = getattr(self.scraper, 'robots', None)
+        if robots is None:
+            robots = RobotsCache(self.session, timeout=self.timeout)
+        sitemaps = robots.sitemaps(site_url) or [urljoin(robots.origin(site_url), '/sitemap.xml')]
+        for sitemap_url in sitemaps:
+            yield from self.iter_urls(sitemap_url, with_lastmod)
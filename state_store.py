@@ -0,0 +1,331 @@
+"""
+Persistent per-URL crawl state for incremental re-crawls
+Tracks validators, content hashes and an adaptive recheck interval per URL
+in SQLite, so a refresh only spends work on pages that are due and changed
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+
+import config
+from url_utils import normalize_url
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT PRIMARY KEY,
+    status INTEGER,
+    etag TEXT,
+    last_modified TEXT,
+    content_hash TEXT,
+    last_fetched REAL,
+    last_changed REAL,
+    interval REAL NOT NULL,
+    next_due REAL NOT NULL,
+    checks INTEGER NOT NULL DEFAULT 0,
+    changes INTEGER NOT NULL DEFAULT 0,
+    errors INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS pages_next_due ON pages (next_due);
+"""
+
+COLUMNS = ('url', 'status', 'etag', 'last_modified', 'content_hash', 'last_fetched',
+           'last_changed', 'interval', 'next_due', 'checks', 'changes', 'errors')
+
+class CrawlStateStore:
+    # URLs looked up per query in due()
+    BATCH_SIZE = 500
+    # 4xx statuses that may clear up; other 4xx are treated as permanent
+    TRANSIENT_CLIENT_STATUSES = (408, 425, 429)
+    
+    def __init__(self, path=config.STATE_DB_PATH, default_interval=config.RECRAWL_DEFAULT_INTERVAL,
+                 min_interval=config.RECRAWL_MIN_INTERVAL, max_interval=config.RECRAWL_MAX_INTERVAL,
+                 commit_every=100):
+        """
+        Open (or create) a crawl state database
+        
+        Each page's recheck interval adapts to how often it is seen to
+        change: halved when the content changed, grown by half when it did
+        not, within [min_interval, max_interval].
+        
+        Args:
+            path (str): SQLite database path
+            default_interval (float): Recheck interval for new pages, in seconds
+            min_interval (float): Shortest recheck interval
+            max_interval (float): Longest recheck interval
+            commit_every (int): Updates buffered per transaction
+        """
+        self.path = path
+        self.default_interval = default_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.commit_every = commit_every
+        self._uncommitted = 0
+        self._pending = {}  # key -> row held by record(pending=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.executescript(SCHEMA)
+        columns = {row[1] for row in self._db.execute('PRAGMA table_info(pages)')}
+        if 'errors' not in columns:  # databases created before error backoff
+            self._db.execute('ALTER TABLE pages ADD COLUMN errors INTEGER NOT NULL DEFAULT 0')
+    
+    @staticmethod
+    def content_hash(content):
+        """
+        Hash of a response body
+        
+        Args:
+            content (bytes): Body
+        
+        Returns:
+            str: Hex digest
+        """
+        return hashlib.blake2b(content, digest_size=16).hexdigest()
+    
+    def get(self, url):
+        """
+        Stored state of a URL
+        
+        Args:
+            url (str): Page URL
+        
+        Returns:
+            dict: Row keyed by column name, or None if the URL is unknown
+        """
+        with self._lock:
+            row = self._db.execute(f"SELECT {', '.join(COLUMNS)} FROM pages WHERE url = ?",
+                                   (normalize_url(url),)).fetchone()
+        return dict(zip(COLUMNS, row)) if row else None
+    
+    def is_due(self, url, now=None):
+        """
+        Check whether a URL should be fetched
+        
+        Args:
+            url (str): Page URL
+            now (float): Current Unix time (defaults to time.time())
+        
+        Returns:
+            bool: True for unknown URLs and URLs past their next check
+        """
+        state = self.get(url)
+        return state is None or state['next_due'] <= (time.time() if now is None else now)
+    
+    def due(self, urls, now=None):
+        """
+        Filter URLs down to those due for a fetch
+        
+        URLs are consumed lazily and looked up in batches.
+        
+        Args:
+            urls (iterable): Page URLs
+            now (float): Current Unix time (defaults to time.time())
+        
+        Yields:
+            str: URLs that are unknown or past their next check
+        """
+        now = time.time() if now is None else now
+        batch = []
+        for url in urls:
+            batch.append(url)
+            if len(batch) >= self.BATCH_SIZE:
+                yield from self._due_batch(batch, now)
+                batch = []
+        if batch:
+            yield from self._due_batch(batch, now)
+    
+    def _due_batch(self, urls, now):
+        """
+        Due URLs of one batch, in input order
+        """
+        keys = [normalize_url(url) for url in urls]
+        placeholders = ','.join('?' * len(set(keys)))
+        with self._lock:
+            not_due = {row[0] for row in self._db.execute(
+                f"SELECT url FROM pages WHERE next_due > ? AND url IN ({placeholders})",
+                [now, *set(keys)])}
+        return [url for url, key in zip(urls, keys) if key not in not_due]
+    
+    def conditional_headers(self, url):
+        """
+        If-None-Match / If-Modified-Since headers from the stored validators
+        
+        Args:
+            url (str): Page URL
+        
+        Returns:
+            dict: Request headers (empty if nothing is stored)
+        """
+        state = self.get(url)
+        headers = {}
+        if state and state['etag']:
+            headers['If-None-Match'] = state['etag']
+        if state and state['last_modified']:
+            headers['If-Modified-Since'] = state['last_modified']
+        return headers
+    
+    def record(self, url, response, now=None, pending=False):
+        """
+        Record a fetch and schedule the next check
+        
+        A 304, or a body whose hash matches the stored one, counts as
+        unchanged.
+        
+        Args:
+            url (str): Page URL
+            response (requests.Response): Response received
+            now (float): Current Unix time (defaults to time.time())
+            pending (bool): Hold a new or changed page's state until
+                commit_pending() is called, once its record is safely
+                written; until then the page still counts as changed, so a
+                crash in between re-emits it on the next run
+        
+        Returns:
+            bool: True if the page is new or its content changed
+        """
+        now = time.time() if now is None else now
+        key = normalize_url(url)
+        previous = self.get(url)
+        if response.status_code == 304:
+            digest = previous['content_hash'] if previous else None
+            changed = previous is None
+        else:
+            digest = self.content_hash(response.content)
+            changed = previous is None or previous['content_hash'] != digest
+        
+        if previous is None:
+            interval = self.default_interval
+        elif changed:
+            interval = max(self.min_interval, previous['interval'] / 2)
+        else:
+            interval = min(self.max_interval, previous['interval'] * 1.5)
+        etag = response.headers.get('ETag') or (previous['etag'] if previous else None)
+        last_modified = response.headers.get('Last-Modified') or (previous['last_modified'] if previous else None)
+        last_changed = now if changed else previous['last_changed']
+        
+        row = (key, response.status_code, etag, last_modified, digest, now, last_changed,
+               interval, now + interval, int(changed))
+        with self._lock:
+            if pending and changed:
+                self._pending[key] = row
+            else:
+                self._store(row)
+                self._maybe_commit()
+        return changed
+    
+    def commit_pending(self, urls=None):
+        """
+        Store the state held by record(..., pending=True)
+        
+        Call this once the records of those pages are written (e.g. after the
+        output sink is flushed). State that is never committed is dropped,
+        and the pages are emitted again on the next run.
+        
+        Args:
+            urls (iterable): URLs to commit (None for every held URL)
+        
+        Returns:
+            int: Number of pages stored
+        """
+        with self._lock:
+            keys = list(self._pending) if urls is None else [normalize_url(url) for url in urls]
+            rows = [self._pending.pop(key) for key in keys if key in self._pending]
+            for row in rows:
+                self._store(row)
+            self._db.commit()
+            self._uncommitted = 0
+        return len(rows)
+    
+    def _store(self, row):
+        """
+        Upsert a fetch result built by record() (lock must be held)
+        """
+        self._db.execute(
+            "INSERT INTO pages (url, status, etag, last_modified, content_hash, last_fetched,"
+            " last_changed, interval, next_due, checks, changes) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 1, ?)"
+            " ON CONFLICT(url) DO UPDATE SET status = excluded.status, etag = excluded.etag,"
+            " last_modified = excluded.last_modified, content_hash = excluded.content_hash,"
+            " last_fetched = excluded.last_fetched, last_changed = excluded.last_changed,"
+            " interval = excluded.interval, next_due = excluded.next_due,"
+            " checks = checks + 1, changes = changes + excluded.changes, errors = 0",
+            row)
+    
+    def record_error(self, url, error=None, now=None):
+        """
+        Record a failed fetch and schedule a retry
+        
+        The retry delay doubles with each consecutive error, up to
+        max_interval. It starts at min_interval, or for permanent client
+        errors (4xx other than TRANSIENT_CLIENT_STATUSES, e.g. 404 or 410) at
+        the page's normal recheck interval, so dead URLs are not re-fetched
+        every min_interval. A successful fetch resets the error count.
+        
+        Args:
+            url (str): Page URL
+            error (Exception): Error raised, used for the HTTP status if any
+            now (float): Current Unix time (defaults to time.time())
+        """
+        now = time.time() if now is None else now
+        response = getattr(error, 'response', None)
+        status = response.status_code if response is not None else None
+        previous = self.get(url)
+        errors = previous['errors'] + 1 if previous else 1
+        interval = previous['interval'] if previous else self.default_interval
+        permanent = status is not None and 400 <= status < 500 and status not in self.TRANSIENT_CLIENT_STATUSES
+        base = interval if permanent else self.min_interval
+        delay = min(base * 2 ** min(errors - 1, 32), self.max_interval)
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO pages (url, status, last_fetched, interval, next_due, errors) VALUES (?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT(url) DO UPDATE SET status = excluded.status,"
+                " last_fetched = excluded.last_fetched, next_due = excluded.next_due, errors = excluded.errors",
+                (normalize_url(url), status, now, interval, now + delay, errors))
+            self._maybe_commit()
+    
+    def _maybe_commit(self):
+        """
+        Commit once enough updates are buffered (lock must be held)
+        """
+        self._uncommitted += 1
+        if self._uncommitted >= self.commit_every:
+            self._db.commit()
+            self._uncommitted = 0
+    
+    def stats(self):
+        """
+        Summary counters
+        
+        Returns:
+            dict: pages tracked and pages due now
+        """
+        with self._lock:
+            pages, = self._db.execute("SELECT COUNT(*) FROM pages").fetchone()
+            due, = self._db.execute("SELECT COUNT(*) FROM pages WHERE next_due <= ?", (time.time(),)).fetchone()
+        return {'pages': pages, 'due': due}
+    
+    def commit(self):
+        """
+        Write buffered updates to disk
+        """
+        with self._lock:
+            self._db.commit()
+            self._uncommitted = 0
+    
+    def close(self):
+        """
+        Commit and close the database
+        
+        State still held for commit_pending() is dropped.
+        """
+        with self._lock:
+            self._db.commit()
+            self._db.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,392 @@
+"""
+Streaming writers that append records to disk as they arrive, with optional
+compression, shard rotation and partitioning
+"""
+
+import csv
+import gzip
+import io
+import json
+import os
+import re
+from collections import OrderedDict
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+import config
+
+try:
+    import zstandard
+except ImportError:  # optional; zstd output needs it
+    zstandard = None
+
+# File name suffix per compression
+COMPRESSION_SUFFIXES = {None: '', 'gzip': '.gz', 'zstd': '.zst'}
+
+def open_output(filepath, compression=None, newline=None):
+    """
+    Open a text file for writing, optionally compressed
+    
+    Args:
+        filepath (str): Output path
+        compression (str): None, 'gzip' or 'zstd' (needs the zstandard package)
+        newline (str): Passed to the text layer ('' for csv)
+    
+    Returns:
+        file: Text file object opened for writing UTF-8
+    """
+    if compression is None:
+        return open(filepath, 'w', newline=newline, encoding='utf-8')
+    if compression == 'gzip':
+        return gzip.open(filepath, 'wt', compresslevel=config.GZIP_LEVEL, newline=newline, encoding='utf-8')
+    if compression == 'zstd':
+        if zstandard is None:
+            raise ValueError("zstd compression requires the zstandard package")
+        raw = open(filepath, 'wb')
+        stream = zstandard.ZstdCompressor(level=config.ZSTD_LEVEL).stream_writer(raw, closefd=True)
+        return io.TextIOWrapper(stream, newline=newline, encoding='utf-8')
+    raise ValueError(f"Unsupported compression: {compression!r}")
+
+def _to_json(value):
+    """
+    json.dumps fallback for record objects with a to_dict() method
+    """
+    to_dict = getattr(value, 'to_dict', None)
+    if to_dict is None:
+        raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+    return to_dict()
+
+class RecordWriter:
+    def __init__(self, filepath):
+        """
+        Base for writers appending one record at a time to a file
+        
+        Subclasses open self._file and implement write(record).
+        
+        Args:
+            filepath (str): Output path
+        """
+        self.filepath = filepath
+        self.count = 0
+        self._file = None
+    
+    @staticmethod
+    def _make_directory(filepath):
+        """
+        Create the directory of an output path
+        """
+        directory = os.path.dirname(filepath)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+    
+    def write(self, record):
+        """
+        Append one record (implemented by subclasses)
+        """
+        raise NotImplementedError
+    
+    def write_many(self, records):
+        """
+        Append records from an iterable
+        
+        Args:
+            records (iterable): Records accepted by write()
+        
+        Returns:
+            int: Number of records written
+        """
+        written = 0
+        for record in records:
+            self.write(record)
+            written += 1
+        return written
+    
+    def flush(self):
+        """
+        Flush buffered records to the operating system (to disk when
+        writing through a sink)
+        """
+        self._file.flush()
+    
+    def close(self):
+        """
+        Close the file
+        
+        Returns:
+            str: Path of the written file
+        """
+        if not self._file.closed:
+            self._file.close()
+        return self.filepath
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+class JsonLinesWriter(RecordWriter):
+    def __init__(self, filepath, compression=None, sink=None):
+        """
+        Open a JSON Lines file for writing, one record per line
+        
+        Args:
+            filepath (str): Output path
+            compression (str): None, 'gzip' or 'zstd'
+            sink (OutputSink): Background writer to hand lines to; the file
+                appears at filepath once closed (None writes directly)
+        """
+        super().__init__(filepath)
+        self.size = 0  # uncompressed characters written
+        if sink is not None:
+            self._file = sink.open(filepath, compression)
+        else:
+            self._make_directory(filepath)
+            self._file = open_output(filepath, compression)
+    
+    def write(self, record):
+        """
+        Append one record
+        
+        Args:
+            record: JSON-serializable record
+        """
+        line = json.dumps(record, ensure_ascii=False, default=_to_json) + '\n'
+        self._file.write(line)
+        self.size += len(line)
+        self.count += 1
+
+class CsvStreamWriter(RecordWriter):
+    def __init__(self, filepath, fieldnames=None, extrasaction='raise', sink=None):
+        """
+        Open a CSV file for streaming dictionaries
+        
+        With declared fieldnames the header is written up front. Without them
+        the schema evolves: the first record sets the columns, new keys are
+        appended as extra columns, and close() rewrites the header (streaming
+        the file once) if any were added.
+        
+        Args:
+            filepath (str): Output path
+            fieldnames (list): Declared columns, or None for an evolving schema
+            extrasaction (str): 'raise' or 'ignore' for keys outside declared fieldnames
+            sink (OutputSink): Background writer to hand rows to; the file,
+                header fix-up included, is published at filepath once closed
+                (None writes directly)
+        """
+        super().__init__(filepath)
+        self.evolving = fieldnames is None
+        self.fieldnames = list(fieldnames) if fieldnames is not None else []
+        self._header_fields = None
+        if sink is not None:
+            # The header is fixed up on the writer thread, before the rename
+            self._file = sink.open(filepath, newline='', finalize=self._rewrite_header)
+        else:
+            self._make_directory(filepath)
+            self._file = open(filepath, 'w', newline='', encoding='utf-8')
+        self._sink = sink
+        # The writer shares self.fieldnames, so extending the list adds columns
+        self._writer = csv.DictWriter(self._file, fieldnames=self.fieldnames, extrasaction=extrasaction)
+        if not self.evolving:
+            self._write_header()
+    
+    def write(self, record):
+        """
+        Append one record
+        
+        Args:
+            record (dict): Row to write
+        """
+        if self.evolving:
+            # Appending keeps earlier rows a valid prefix of the new layout
+            self.fieldnames.extend(key for key in record if key not in self.fieldnames)
+            if self._header_fields is None:
+                self._write_header()
+        self._writer.writerow(record)
+        self.count += 1
+    
+    def _write_header(self):
+        """
+        Write the header row for the current columns
+        """
+        self._writer.writeheader()
+        self._header_fields = len(self.fieldnames)
+    
+    def close(self):
+        """
+        Close the file, rewriting the header if the schema grew
+        
+        Returns:
+            str: Path of the written file
+        """
+        if self._file.closed:
+            return self.filepath
+        self._file.close()
+        if self._sink is None:
+            self._rewrite_header(self.filepath)
+        return self.filepath
+    
+    def _rewrite_header(self, path):
+        """
+        If the schema grew, stream a file into a copy with the final header
+        and padded rows, then replace it
+        
+        Args:
+            path (str): File to fix up (the sink's part file, or filepath)
+        """
+        if self._header_fields is None or len(self.fieldnames) <= self._header_fields:
+            return
+        tmp_path = path + '.tmp'
+        width = len(self.fieldnames)
+        with open(path, 'r', newline='', encoding='utf-8') as src, \
+                open(tmp_path, 'w', newline='', encoding='utf-8') as dst:
+            reader = csv.reader(src)
+            writer = csv.writer(dst)
+            next(reader, None)  # old header
+            writer.writerow(self.fieldnames)
+            for row in reader:
+                writer.writerow(row + [''] * (width - len(row)))
+        os.replace(tmp_path, path)
+        self._header_fields = width
+
+
+class ShardedJsonLinesWriter:
+    PARTITIONS = ('host', 'date')
+    
+    def __init__(self, directory, prefix='part', compression=None, max_records=config.SHARD_MAX_RECORDS,
+                 max_bytes=config.SHARD_MAX_BYTES, partition_by=None, max_open=64, sink=None):
+        """
+        Write records into rotated, optionally partitioned JSON Lines shards
+        
+        Shards are named <directory>/[<partition>/]<prefix>-<n>.jsonl[.gz|.zst]
+        and numbered past any shards already on disk, so reruns never
+        overwrite earlier output.
+        
+        Args:
+            directory (str): Output directory
+            prefix (str): Shard file name prefix
+            compression (str): None, 'gzip' or 'zstd'
+            max_records (int): Start a new shard after this many records (None: no limit)
+            max_bytes (int): Start a new shard after this many uncompressed bytes (None: no limit)
+            partition_by (str or callable): 'host' (from the record's url),
+                'date' (UTC write date) or callable(record) -> partition name
+            max_open (int): Partitions kept open at once; the least recently
+                used shard is closed beyond this
+            sink (OutputSink): Background writer for the shards (None writes directly)
+        """
+        if compression not in COMPRESSION_SUFFIXES:
+            raise ValueError(f"Unsupported compression: {compression!r}")
+        if partition_by is not None and not callable(partition_by) and partition_by not in self.PARTITIONS:
+            raise ValueError(f"partition_by must be one of {self.PARTITIONS} or a callable")
+        self.directory = directory
+        self.prefix = prefix
+        self.compression = compression
+        self.max_records = max_records
+        self.max_bytes = max_bytes
+        self.partition_by = partition_by
+        self.max_open = max_open
+        self.sink = sink
+        self.count = 0
+        self.paths = []
+        self._writers = OrderedDict()  # partition -> JsonLinesWriter, least recently used first
+        self._next_index = {}
+    
+    def partition(self, record):
+        """
+        Partition name for a record
+        
+        Args:
+            record (dict): Record
+        
+        Returns:
+            str: Directory name for the record's partition ('' if unpartitioned)
+        """
+        if self.partition_by is None:
+            return ''
+        if callable(self.partition_by):
+            name = str(self.partition_by(record))
+        elif self.partition_by == 'host':
+            name = urlsplit(record.get('url') or '').hostname or 'unknown'
+        else:
+            name = datetime.now(timezone.utc).strftime('%Y-%m-%d')
+        return re.sub(r'[^\w.=-]', '_', name) or 'unknown'
+    
+    def _open(self, partition):
+        """
+        Open the next shard of a partition
+        """
+        if len(self._writers) >= self.max_open:
+            self._writers.popitem(last=False)[1].close()
+        directory = os.path.join(self.directory, partition)
+        os.makedirs(directory, exist_ok=True)
+        suffix = COMPRESSION_SUFFIXES[self.compression]
+        index = self._next_index.get(partition, 0)
+        while True:
+            path = os.path.join(directory, f"{self.prefix}-{index:05d}.jsonl{suffix}")
+            index += 1
+            if not os.path.exists(path):
+                break
+        self._next_index[partition] = index
+        writer = self._writers[partition] = JsonLinesWriter(path, self.compression, self.sink)
+        self.paths.append(path)
+        return writer
+    
+    def write(self, record):
+        """
+        Append one record to its partition's current shard
+        
+        Args:
+            record (dict): JSON-serializable record
+        """
+        partition = self.partition(record)
+        writer = self._writers.get(partition)
+        if writer is None:
+            writer = self._open(partition)
+        else:
+            self._writers.move_to_end(partition)
+        writer.write(record)
+        self.count += 1
+        if (self.max_records and writer.count >= self.max_records) or \
+                (self.max_bytes and writer.size >= self.max_bytes):
+            del self._writers[partition]
+            writer.close()
+    
+    def write_many(self, records):
+        """
+        Append records from an iterable
+        
+        Args:
+            records (iterable): JSON-serializable records
+        
+        Returns:
+            int: Number of records written
+        """
+        written = 0
+        for record in records:
+            self.write(record)
+            written += 1
+        return written
+    
+    def flush(self):
+        """
+        Flush every open shard
+        """
+        for writer in self._writers.values():
+            writer.flush()
+    
+    def close(self):
+        """
+        Close every open shard
+        
+        Returns:
+            list: Paths of all shards written
+        """
+        while self._writers:
+            self._writers.popitem(last=False)[1].close()
+        return list(self.paths)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
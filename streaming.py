@@ -0,0 +1,193 @@
+"""
+Streaming downloads with size and content-type limits, and incremental link
+extraction that runs while the body is still downloading
+"""
+
+import codecs
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+
+import requests
+
+import config
+
+try:
+    from lxml import etree
+except ImportError:  # fall back to the standard library parser
+    etree = None
+
+class ResponseTooLarge(requests.RequestException):
+    """Raised when a response body is larger than the configured cap"""
+
+class UnsupportedContentType(requests.RequestException):
+    """Raised when a response's content type is not in the allowlist"""
+
+def content_type(response):
+    """
+    Media type of a response without parameters
+    
+    Args:
+        response (requests.Response): Response
+    
+    Returns:
+        str: Lowercase media type, e.g. 'text/html' ('' if missing)
+    """
+    return response.headers.get('Content-Type', '').split(';', 1)[0].strip().lower()
+
+def check_response(response, allowed_types=config.STREAM_CONTENT_TYPES, max_bytes=config.STREAM_MAX_BYTES):
+    """
+    Reject a streamed response before reading its body
+    
+    Responses without a Content-Type header are allowed, since many servers
+    omit it for HTML.
+    
+    Args:
+        response (requests.Response): Response opened with stream=True
+        allowed_types (tuple): Accepted media types (None accepts any)
+        max_bytes (int): Body size cap (None for no cap)
+    
+    Raises:
+        UnsupportedContentType: If the media type is not allowed
+        ResponseTooLarge: If Content-Length already exceeds max_bytes
+    """
+    mime = content_type(response)
+    if allowed_types and mime and mime not in allowed_types:
+        raise UnsupportedContentType(f"Unsupported content type {mime} for {response.url}", response=response)
+    length = response.headers.get('Content-Length', '')
+    if max_bytes and length.isdigit() and int(length) > max_bytes:
+        raise ResponseTooLarge(f"{response.url} is {length} bytes, over the {max_bytes} byte cap",
+                               response=response)
+
+def iter_body(response, max_bytes=config.STREAM_MAX_BYTES, chunk_size=config.STREAM_CHUNK_SIZE):
+    """
+    Yield a streamed response body chunk by chunk under a size cap
+    
+    The cap applies to decoded bytes, so compressed bodies cannot expand past
+    it. A body over the cap is yielded up to exactly max_bytes before the
+    error is raised. The response is closed when the iteration ends or is
+    abandoned.
+    
+    Args:
+        response (requests.Response): Response opened with stream=True
+        max_bytes (int): Body size cap (None for no cap)
+        chunk_size (int): Bytes per read
+    
+    Yields:
+        bytes: Body chunks
+    
+    Raises:
+        ResponseTooLarge: Once more than max_bytes have arrived
+    """
+    received = 0
+    try:
+        for chunk in response.iter_content(chunk_size):
+            received += len(chunk)
+            if max_bytes and received > max_bytes:
+                allowed = len(chunk) - (received - max_bytes)
+                if allowed > 0:
+                    yield chunk[:allowed]
+                raise ResponseTooLarge(f"{response.url} exceeded the {max_bytes} byte cap", response=response)
+            yield chunk
+    finally:
+        response.close()
+
+def read_body(response, max_bytes=config.STREAM_MAX_BYTES, chunk_size=config.STREAM_CHUNK_SIZE):
+    """
+    Read a streamed body under a size cap and keep it on the response
+    
+    Afterwards response.content works as for a non-streamed request.
+    
+    Args:
+        response (requests.Response): Response opened with stream=True
+        max_bytes (int): Body size cap (None for no cap)
+        chunk_size (int): Bytes per read
+    
+    Returns:
+        bytes: Body
+    """
+    body = b''.join(iter_body(response, max_bytes, chunk_size))
+    response._content = body
+    response._content_consumed = True
+    return body
+
+def iter_links(chunks, base_url, encoding=None):
+    """
+    Yield absolute link URLs from HTML chunks as soon as they are parsed
+    
+    Parsing is incremental, so links near the top of a page are available
+    before the rest has downloaded and the caller can stop at any point.
+    Uses lxml's pull parser when available (finished elements are dropped to
+    keep memory flat), otherwise the standard library parser.
+    
+    Args:
+        chunks (iterable): bytes chunks of an HTML document
+        base_url (str): URL the document was fetched from
+        encoding (str): Declared encoding (detected by the parser if None)
+    
+    Yields:
+        str: Absolute URLs in document order, duplicates included
+    """
+    if etree is not None:
+        yield from _iter_links_lxml(chunks, base_url, encoding)
+    else:
+        yield from _iter_links_stdlib(chunks, base_url, encoding)
+
+def _iter_links_lxml(chunks, base_url, encoding):
+    """
+    iter_links() with lxml's HTMLPullParser
+    """
+    parser = etree.HTMLPullParser(events=('end',), encoding=encoding)
+    base = [base_url]
+    
+    def drain():
+        for _, element in parser.read_events():
+            href = element.get('href')
+            if href:
+                if element.tag == 'a':
+                    yield urljoin(base[0], href.strip())
+                elif element.tag == 'base':
+                    base[0] = urljoin(base_url, href.strip())
+            element.clear(keep_tail=True)
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+    
+    for chunk in chunks:
+        parser.feed(chunk)
+        yield from drain()
+    parser.close()
+    yield from drain()
+
+class _LinkCollector(HTMLParser):
+    def __init__(self, base_url):
+        """
+        Standard library parser collecting link targets
+        """
+        super().__init__()
+        self.base_url = base_url
+        self.base = base_url
+        self.links = []
+    
+    def handle_starttag(self, tag, attrs):
+        if tag not in ('a', 'base'):
+            return
+        href = dict(attrs).get('href')
+        if not href:
+            return
+        if tag == 'a':
+            self.links.append(urljoin(self.base, href.strip()))
+        else:
+            self.base = urljoin(self.base_url, href.strip())
+
+def _iter_links_stdlib(chunks, base_url, encoding):
+    """
+    iter_links() with html.parser, for installs without lxml
+    """
+    collector = _LinkCollector(base_url)
+    decoder = codecs.getincrementaldecoder(encoding or 'utf-8')(errors='replace')
+    for chunk in chunks:
+        collector.feed(decoder.decode(chunk))
+        yield from collector.links
+        collector.links.clear()
+    collector.feed(decoder.decode(b'', final=True))
+    collector.close()
+    yield from collector.links
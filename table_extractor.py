@@ -0,0 +1,482 @@
+"""
+Typed columnar table extraction
+Expands rowspan/colspan, detects header rows, infers column types and
+parses each column in one pass (NumPy arrays when NumPy is installed)
+"""
+
+import csv
+import json
+import math
+import os
+import re
+from array import array
+from datetime import date, datetime
+
+try:
+    import numpy as np
+except ImportError:  # optional; columns fall back to array.array and lists
+    np = None
+
+MAX_SPAN = 1000  # cap for colspan/rowspan values taken from the page
+
+_NUMBER = r'(?:\d{1,3}(?:,\d{3})+|\d+)(?:\.\d+)?|\.\d+'
+_INTEGER = r'\d{1,3}(?:,\d{3})+|\d+'
+_SYMBOL = r'[$€£¥]'
+_CODE = r'(?:USD|EUR|GBP|JPY|CHF|CAD|AUD)'
+
+# Whole-cell patterns per type, tried in this order; a column gets the first
+# type every non-empty cell matches
+TYPE_PATTERNS = (
+    ('int', rf'[-+]?(?:{_INTEGER})|\((?:{_INTEGER})\)'),
+    ('float', rf'[-+]?(?:{_NUMBER})|\((?:{_NUMBER})\)'),
+    ('percent', rf'[-+]?(?:{_NUMBER}) ?%|\((?:{_NUMBER}) ?%\)'),
+    ('currency', rf'[-+]?{_SYMBOL} ?(?:{_NUMBER})|{_SYMBOL} ?[-+]?(?:{_NUMBER})|\({_SYMBOL} ?(?:{_NUMBER})\)'
+                 rf'|[-+]?(?:{_NUMBER}) ?{_CODE}|{_CODE} ?[-+]?(?:{_NUMBER})'),
+)
+
+# Date formats: (column pattern, strptime format), tried in order
+DATE_FORMATS = (
+    (r'\d{4}-\d{2}-\d{2}', '%Y-%m-%d'),
+    (r'\d{1,2}/\d{1,2}/\d{4}', '%m/%d/%Y'),
+    (r'\d{1,2}/\d{1,2}/\d{4}', '%d/%m/%Y'),
+    (r'\d{1,2}\.\d{1,2}\.\d{4}', '%d.%m.%Y'),
+    (r'[A-Za-z]{3,9}\.? \d{1,2}, \d{4}', '%b %d, %Y'),
+    (r'[A-Za-z]{3,9} \d{1,2}, \d{4}', '%B %d, %Y'),
+    (r'\d{1,2} [A-Za-z]{3,9} \d{4}', '%d %b %Y'),
+    (r'\d{1,2} [A-Za-z]{3,9} \d{4}', '%d %B %Y'),
+)
+
+def _column_regex(pattern):
+    """
+    Regex matching a whole column of cells joined with newlines
+    """
+    return re.compile(rf'(?:{pattern})(?:\n(?:{pattern}))*')
+
+_TYPE_REGEXES = tuple((name, _column_regex(pattern)) for name, pattern in TYPE_PATTERNS)
+_DATE_REGEXES = tuple((_column_regex(pattern), fmt) for pattern, fmt in DATE_FORMATS)
+_NEGATIVE = re.compile(r'\((.*?)\)')
+_NUMERIC_JUNK = re.compile(rf'[ ,%]|{_SYMBOL}|{_CODE}')
+_EMPTY_LINE = re.compile(r'^$', re.MULTILINE)
+_EPOCH = date(1970, 1, 1)
+
+def table_grid(table):
+    """
+    Expand a table into a rectangular grid of cell texts
+    
+    Cells spanning several rows or columns are repeated in every slot they
+    cover. Rows of nested tables are skipped.
+    
+    Args:
+        table (Tag): Table element
+    
+    Returns:
+        tuple: (rows, header_flags) where rows is a list of equal-length
+            lists of strings and header_flags marks rows inside <thead> or
+            made only of <th> cells
+    """
+    rows, flags = [], []
+    pending = {}  # column -> [rows left, text] for cells spanning down
+    for tr in _table_rows(table):
+        cells = [cell for cell in tr.children if cell.name in ('td', 'th')]
+        row = []
+        col = 0
+        
+        def fill_pending():
+            nonlocal col
+            while col in pending:
+                span = pending[col]
+                row.append(span[1])
+                span[0] -= 1
+                if not span[0]:
+                    del pending[col]
+                col += 1
+        
+        for cell in cells:
+            fill_pending()
+            text = cell.get_text(' ', strip=True)
+            colspan = _span(cell.get('colspan'))
+            rowspan = _span(cell.get('rowspan'))
+            for _ in range(colspan):
+                row.append(text)
+                if rowspan > 1:
+                    pending[col] = [rowspan - 1, text]
+                col += 1
+        # Cells spanning down from earlier rows past the end of this one
+        while pending and col <= max(pending):
+            if col in pending:
+                fill_pending()
+            else:
+                row.append('')
+                col += 1
+        if row:
+            rows.append(row)
+            in_head = tr.parent is not None and tr.parent.name == 'thead'
+            flags.append(in_head or all(cell.name == 'th' for cell in cells))
+    
+    width = max((len(row) for row in rows), default=0)
+    for row in rows:
+        row.extend([''] * (width - len(row)))
+    return rows, flags
+
+def _table_rows(table):
+    """
+    <tr> elements of a table itself, directly or in thead/tbody/tfoot
+    
+    Walking children instead of find_all() skips nested tables and is much
+    faster on large tables.
+    """
+    for child in table.children:
+        if child.name == 'tr':
+            yield child
+        elif child.name in ('thead', 'tbody', 'tfoot'):
+            for row in child.children:
+                if row.name == 'tr':
+                    yield row
+
+def _span(value):
+    """
+    Parse a colspan/rowspan attribute
+    """
+    try:
+        return min(max(int(value), 1), MAX_SPAN)
+    except (TypeError, ValueError):
+        return 1
+
+def infer_type(values):
+    """
+    Infer the type of a column
+    
+    Each candidate type is checked with one regex match over the whole
+    column rather than one per cell.
+    
+    Args:
+        values (list): Cell texts
+    
+    Returns:
+        str: 'int', 'float', 'percent', 'currency', 'date' or 'string'
+    """
+    present = '\n'.join(value for value in values if value)
+    if not present:
+        return 'string'
+    for name, regex in _TYPE_REGEXES:
+        if regex.fullmatch(present):
+            return name
+    if _date_format(values, present):
+        return 'date'
+    return 'string'
+
+def _date_format(values, present=None):
+    """
+    First strptime format that parses every non-empty cell, or None
+    """
+    if present is None:
+        present = '\n'.join(value for value in values if value)
+    for regex, fmt in _DATE_REGEXES:
+        if not regex.fullmatch(present):
+            continue
+        try:
+            for value in values:
+                if value:
+                    datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+        return fmt
+    return None
+
+def parse_column(values, kind):
+    """
+    Convert a column of cell texts to typed values
+    
+    Numeric columns are cleaned with a few regex passes over the joined
+    column and converted in bulk. Empty cells become NaN (an int column with
+    empty cells, or beyond 64 bits, is returned as float), NaT or None.
+    
+    Args:
+        values (list): Cell texts
+        kind (str): Type from infer_type()
+    
+    Returns:
+        numpy.ndarray, array.array or list: Parsed values; percentages are
+            fractions (12.5% -> 0.125)
+    """
+    if kind in ('int', 'float', 'percent', 'currency'):
+        joined = '\n'.join(values)
+        joined = _NUMERIC_JUNK.sub('', _NEGATIVE.sub(r'-\1', joined))
+        if kind == 'int' and '' not in values:
+            parts = joined.split('\n')
+            try:
+                return np.array(parts, dtype=np.int64) if np is not None else array('q', map(int, parts))
+            except (OverflowError, ValueError):
+                pass  # beyond int64; parsed as float below
+        parts = _EMPTY_LINE.sub('nan', joined).split('\n')
+        column = np.array(parts, dtype=np.float64) if np is not None else array('d', map(float, parts))
+        if kind == 'percent':
+            if np is not None:
+                column /= 100
+            else:
+                column = array('d', (value / 100 for value in column))
+        return column
+    if kind == 'date':
+        fmt = _date_format(values)
+        dates = [datetime.strptime(value, fmt).date() if value else None for value in values]
+        if np is not None:
+            return np.array([d.isoformat() if d else 'NaT' for d in dates], dtype='datetime64[D]')
+        return dates
+    return list(values)
+
+class ColumnarTable:
+    def __init__(self, names, types, columns, caption=None):
+        """
+        Table stored column by column
+        
+        Args:
+            names (list): Column names
+            types (list): Column types, see infer_type()
+            columns (list): Parsed columns, see parse_column()
+            caption (str): Table caption, if any
+        """
+        self.names = list(names)
+        self.types = list(types)
+        self.columns = list(columns)
+        self.caption = caption
+    
+    @property
+    def num_rows(self):
+        return len(self.columns[0]) if self.columns else 0
+    
+    def __len__(self):
+        return self.num_rows
+    
+    def column(self, name):
+        """
+        Get a column by name
+        
+        Args:
+            name (str): Column name
+        
+        Returns:
+            Parsed column values
+        """
+        return self.columns[self.names.index(name)]
+    
+    def _python_columns(self):
+        """
+        Columns as lists of plain Python values (None for missing values)
+        """
+        result = []
+        for kind, column in zip(self.types, self.columns):
+            if kind == 'date':
+                values = column.astype(object).tolist() if np is not None else list(column)
+            else:
+                values = column.tolist() if hasattr(column, 'tolist') else list(column)
+            if kind in ('float', 'percent', 'currency') or (kind == 'int' and values and isinstance(values[0], float)):
+                values = [None if isinstance(v, float) and math.isnan(v) else v for v in values]
+            result.append(values)
+        return result
+    
+    def to_rows(self):
+        """
+        Rows as dictionaries of plain Python values
+        
+        Returns:
+            list: One dict per row, keyed by column name
+        """
+        return [dict(zip(self.names, row)) for row in zip(*self._python_columns())]
+    
+    def to_dict(self):
+        """
+        JSON-friendly view
+        
+        Returns:
+            dict: caption, columns (name and type) and data as column lists
+        """
+        data = [[v.isoformat() if isinstance(v, date) else v for v in values]
+                for values in self._python_columns()]
+        return {
+            'caption': self.caption,
+            'columns': [{'name': n, 'type': t} for n, t in zip(self.names, self.types)],
+            'data': dict(zip(self.names, data)),
+        }
+    
+    def to_csv(self, filepath):
+        """
+        Write the table as CSV with a header row
+        
+        Args:
+            filepath (str): Output path
+        
+        Returns:
+            str: Path of the written file
+        """
+        columns = [['' if v is None else (v.isoformat() if isinstance(v, date) else v) for v in values]
+                   for values in self._python_columns()]
+        directory = os.path.dirname(filepath)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(filepath, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(self.names)
+            writer.writerows(zip(*columns))
+        return filepath
+    
+    def save(self, filepath):
+        """
+        Write the table in a compact binary columnar format
+        
+        A JSON header describes the columns; numeric columns follow as raw
+        little-endian int64/float64 values, dates as int32 days since
+        1970-01-01 (INT32_MIN for missing) and text as UTF-8 JSON.
+        
+        Args:
+            filepath (str): Output path
+        
+        Returns:
+            str: Path of the written file
+        """
+        blobs, layout = [], []
+        for kind, column in zip(self.types, self.columns):
+            blob, dtype = _encode_column(kind, column)
+            layout.append({'dtype': dtype, 'size': len(blob)})
+            blobs.append(blob)
+        header = json.dumps({
+            'caption': self.caption,
+            'rows': self.num_rows,
+            'columns': [dict(name=n, type=t, **l) for n, t, l in zip(self.names, self.types, layout)],
+        }).encode('utf-8')
+        with open(filepath, 'wb') as f:
+            f.write(len(header).to_bytes(4, 'little'))
+            f.write(header)
+            for blob in blobs:
+                f.write(blob)
+        return filepath
+    
+    @classmethod
+    def load(cls, filepath):
+        """
+        Read a table written by save()
+        
+        Args:
+            filepath (str): Input path
+        
+        Returns:
+            ColumnarTable: Restored table
+        """
+        with open(filepath, 'rb') as f:
+            header_size = int.from_bytes(f.read(4), 'little')
+            header = json.loads(f.read(header_size).decode('utf-8'))
+            columns = [_decode_column(spec['dtype'], f.read(spec['size'])) for spec in header['columns']]
+        return cls([spec['name'] for spec in header['columns']], [spec['type'] for spec in header['columns']],
+                   columns, header['caption'])
+
+_MISSING_DAY = -2 ** 31
+
+def _encode_column(kind, column):
+    """
+    Serialize one column for ColumnarTable.save()
+    
+    Returns:
+        tuple: (bytes, dtype name)
+    """
+    if kind == 'date':
+        if np is not None:
+            days = column.astype('datetime64[D]').astype(np.int64)
+            days[np.isnat(column)] = _MISSING_DAY
+            return days.astype('<i4').tobytes(), 'date32'
+        days = array('i', (_MISSING_DAY if d is None else (d - _EPOCH).days for d in column))
+        return _little_endian(days), 'date32'
+    if np is not None and isinstance(column, np.ndarray) and column.dtype.kind in 'if':
+        dtype = '<i8' if column.dtype.kind == 'i' else '<f8'
+        return column.astype(dtype).tobytes(), 'int64' if column.dtype.kind == 'i' else 'float64'
+    if isinstance(column, array):
+        return _little_endian(column), 'int64' if column.typecode == 'q' else 'float64'
+    return json.dumps(list(column), ensure_ascii=False).encode('utf-8'), 'utf8-json'
+
+def _decode_column(dtype, blob):
+    """
+    Inverse of _encode_column()
+    """
+    if dtype == 'utf8-json':
+        return json.loads(blob.decode('utf-8'))
+    typecode = {'int64': 'q', 'float64': 'd', 'date32': 'i'}[dtype]
+    if np is not None:
+        values = np.frombuffer(blob, dtype={'q': '<i8', 'd': '<f8', 'i': '<i4'}[typecode]).copy()
+        if dtype != 'date32':
+            return values
+        missing = values == _MISSING_DAY
+        dates = values.astype('datetime64[D]')
+        dates[missing] = np.datetime64('NaT')
+        return dates
+    values = array(typecode)
+    values.frombytes(blob)
+    if _big_endian():
+        values.byteswap()
+    if dtype == 'date32':
+        return [None if d == _MISSING_DAY else date.fromordinal(_EPOCH.toordinal() + d) for d in values]
+    return values
+
+def _big_endian():
+    return array('H', [1]).tobytes()[0] == 0
+
+def _little_endian(values):
+    """
+    Bytes of an array.array in little-endian order
+    """
+    if _big_endian():
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+def extract_table(table):
+    """
+    Extract one table as a typed ColumnarTable
+    
+    Header rows are the leading rows inside <thead> or made only of <th>
+    cells; failing that, a first row of text above typed (numeric or date)
+    columns. Multi-row headers are joined per column with ' / '.
+    
+    Args:
+        table (Tag): Table element
+    
+    Returns:
+        ColumnarTable: Parsed table, or None if the table has no cells
+    """
+    rows, flags = table_grid(table)
+    if not rows:
+        return None
+    num_header = 0
+    while num_header < len(rows) - 1 and flags[num_header]:
+        num_header += 1
+    body_columns = [list(column) for column in zip(*rows[num_header:])]
+    types = [infer_type(column) for column in body_columns]
+    
+    if not num_header and len(rows) > 2 and all(infer_type([cell]) == 'string' for cell in rows[0]) \
+            and all(rows[0]):
+        below = [column[1:] for column in body_columns]
+        below_types = [infer_type(column) for column in below]
+        if any(kind != 'string' for kind in below_types):
+            num_header = 1
+            body_columns, types = below, below_types
+    
+    names = _header_names(rows[:num_header], len(body_columns))
+    columns = [parse_column(column, kind) for column, kind in zip(body_columns, types)]
+    caption = table.find('caption')
+    return ColumnarTable(names, types, columns, caption.get_text(' ', strip=True) if caption else None)
+
+def _header_names(header_rows, width):
+    """
+    Unique column names from the header rows
+    """
+    names, seen = [], {}
+    for index in range(width):
+        parts = []
+        for row in header_rows:
+            if row[index] and row[index] not in parts:
+                parts.append(row[index])
+        name = ' / '.join(parts) or f"column_{index + 1}"
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}_{seen[name]}"
+        else:
+            seen[name] = 1
+        names.append(name)
+    return names
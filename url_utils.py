@@ -0,0 +1,54 @@
+"""
+URL normalization helpers shared by the scraper components
+"""
+
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+def normalize_url(url):
+    """
+    Normalize a URL so equivalent spellings map to the same key
+    
+    Lowercases the scheme and host, drops default ports and the fragment,
+    sorts query parameters and uses '/' for an empty path.
+    
+    Args:
+        url (str): Absolute URL
+    
+    Returns:
+        str: Normalized URL
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = normalize_netloc(parts, scheme)
+    path = parts.path or '/'
+    query = parts.query
+    if query:
+        query = urlencode(sorted(parse_qsl(query, keep_blank_values=True)))
+    return urlunsplit((scheme, netloc, path, query, ''))
+
+def normalize_netloc(parts, scheme):
+    """
+    Build a lowercased netloc without the scheme's default port
+    
+    Args:
+        parts (SplitResult): Parsed URL
+        scheme (str): Lowercased scheme
+    
+    Returns:
+        str: Normalized netloc
+    """
+    host = (parts.hostname or '').rstrip('.')
+    if ':' in host:
+        host = f"[{host}]"  # IPv6 literal
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    if port is not None and port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{port}"
+    userinfo = parts.netloc.rpartition('@')[0]
+    if userinfo:
+        host = f"{userinfo}@{host}"
+    return host
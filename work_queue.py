@@ -0,0 +1,498 @@
+"""
+Shared work queue for running a crawl across several worker processes
+URLs are partitioned by a stable hash of their host and each partition is
+leased to one worker at a time, so per-host politeness holds without any
+coordination between workers. Leases expire unless renewed, which hands a
+crashed worker's partitions and URLs to the survivors.
+
+Usage:
+    python work_queue.py seed urls.txt
+    python work_queue.py work --processes 4 --follow-links
+    python work_queue.py stats
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import math
+import multiprocessing
+import os
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+import config
+from data_handler import DataHandler
+from metrics import use_registry
+from politeness import HostScheduler
+from retry import CircuitOpenError
+from url_utils import normalize_url
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS urls (
+    url TEXT PRIMARY KEY,
+    host TEXT NOT NULL,
+    partition INTEGER NOT NULL,
+    depth INTEGER NOT NULL DEFAULT 0,
+    state TEXT NOT NULL DEFAULT 'queued',
+    lease_owner TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    updated REAL
+);
+CREATE INDEX IF NOT EXISTS urls_partition_state ON urls (partition, state, depth);
+CREATE INDEX IF NOT EXISTS urls_owner ON urls (lease_owner);
+CREATE TABLE IF NOT EXISTS partitions (
+    partition INTEGER PRIMARY KEY,
+    owner TEXT,
+    lease_expires REAL NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS workers (
+    worker_id TEXT PRIMARY KEY,
+    lease_expires REAL NOT NULL
+);
+"""
+
+STATES = ('queued', 'leased', 'done', 'failed')
+
+def default_worker_id():
+    """
+    Worker identifier unique across processes and machines
+    
+    Returns:
+        str: hostname-pid
+    """
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+class WorkQueue:
+    def __init__(self, path=config.QUEUE_DB_PATH, num_partitions=config.QUEUE_PARTITIONS,
+                 visibility_timeout=config.QUEUE_VISIBILITY_TIMEOUT, max_attempts=config.QUEUE_MAX_ATTEMPTS):
+        """
+        Open (or create) a shared work queue
+        
+        Every process opens its own WorkQueue on the same SQLite file. The
+        file must be on a local disk: SQLite locking is not reliable over
+        network filesystems.
+        
+        Args:
+            path (str): SQLite database path
+            num_partitions (int): Host-hash partitions; fixed when the queue
+                is created, later values are ignored
+            visibility_timeout (float): Seconds a lease lasts unless renewed
+            max_attempts (int): Leases per URL before it is marked failed
+        """
+        self.path = path
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.executescript(SCHEMA)
+        with self._transaction() as db:
+            count, = db.execute("SELECT COUNT(*) FROM partitions").fetchone()
+            if not count:
+                db.executemany("INSERT INTO partitions (partition) VALUES (?)",
+                               [(partition,) for partition in range(num_partitions)])
+            self.num_partitions, = db.execute("SELECT COUNT(*) FROM partitions").fetchone()
+    
+    @contextmanager
+    def _transaction(self):
+        """
+        Run statements in one write transaction, taking the write lock up front
+        """
+        with self._lock:
+            self._db.execute('BEGIN IMMEDIATE')
+            try:
+                yield self._db
+            except BaseException:
+                self._db.execute('ROLLBACK')
+                raise
+            self._db.execute('COMMIT')
+    
+    def partition(self, url):
+        """
+        Partition a URL's host hashes to
+        
+        Uses a cryptographic hash rather than hash(), which is salted per
+        process.
+        
+        Args:
+            url (str): URL or bare host name
+        
+        Returns:
+            int: Partition number
+        """
+        host = HostScheduler.host_key(url)
+        digest = hashlib.blake2b(host.encode('utf-8'), digest_size=8).digest()
+        return int.from_bytes(digest, 'big') % self.num_partitions
+    
+    def put(self, url, depth=0):
+        """
+        Add a URL unless it was ever queued before
+        
+        Args:
+            url (str): Absolute URL
+            depth (int): Link depth from the seeds
+        
+        Returns:
+            bool: True if the URL was added
+        """
+        return self.put_many([url], depth) == 1
+    
+    def put_many(self, urls, depth=0):
+        """
+        Add URLs, skipping any that were ever queued before
+        
+        Args:
+            urls (iterable): Absolute URLs
+            depth (int): Link depth from the seeds
+        
+        Returns:
+            int: Number of URLs added
+        """
+        now = time.time()
+        rows = []
+        for url in urls:
+            key = normalize_url(url)
+            rows.append((key, HostScheduler.host_key(key), self.partition(key), depth, now))
+        if not rows:
+            return 0
+        with self._transaction() as db:
+            before = db.total_changes
+            db.executemany("INSERT OR IGNORE INTO urls (url, host, partition, depth, updated)"
+                           " VALUES (?, ?, ?, ?, ?)", rows)
+            return db.total_changes - before
+    
+    def claim_partitions(self, worker_id, timeout=None):
+        """
+        Register a worker and renew or claim its share of the partitions
+        
+        Each live worker aims for an equal share. Partitions over the share
+        are given back once the worker holds no URL leases in them; free and
+        expired partitions are claimed up to the share.
+        
+        Args:
+            worker_id (str): Worker identifier
+            timeout (float): Lease length (defaults to visibility_timeout)
+        
+        Returns:
+            list: Partition numbers now owned by the worker
+        """
+        now = time.time()
+        expires = now + (timeout or self.visibility_timeout)
+        with self._transaction() as db:
+            db.execute("INSERT INTO workers (worker_id, lease_expires) VALUES (?, ?)"
+                       " ON CONFLICT(worker_id) DO UPDATE SET lease_expires = excluded.lease_expires",
+                       (worker_id, expires))
+            db.execute("DELETE FROM workers WHERE lease_expires <= ?", (now,))
+            live, = db.execute("SELECT COUNT(*) FROM workers").fetchone()
+            share = math.ceil(self.num_partitions / live)
+            
+            owned = [row[0] for row in db.execute(
+                "SELECT partition FROM partitions WHERE owner = ? AND lease_expires > ? ORDER BY partition",
+                (worker_id, now))]
+            if len(owned) > share:
+                busy = {row[0] for row in db.execute(
+                    "SELECT DISTINCT partition FROM urls WHERE state = 'leased' AND lease_owner = ?",
+                    (worker_id,))}
+                idle = [partition for partition in reversed(owned) if partition not in busy]
+                surplus = idle[:len(owned) - share]
+                db.executemany("UPDATE partitions SET owner = NULL, lease_expires = 0 WHERE partition = ?",
+                               [(partition,) for partition in surplus])
+                owned = [partition for partition in owned if partition not in surplus]
+            elif len(owned) < share:
+                free = [row[0] for row in db.execute(
+                    "SELECT partition FROM partitions WHERE lease_expires <= ? ORDER BY partition LIMIT ?",
+                    (now, share - len(owned)))]
+                owned.extend(free)
+            db.executemany("UPDATE partitions SET owner = ?, lease_expires = ? WHERE partition = ?",
+                           [(worker_id, expires, partition) for partition in owned])
+        return sorted(owned)
+    
+    def lease(self, worker_id, limit=100, timeout=None):
+        """
+        Lease queued URLs from the worker's partitions, shallowest first
+        
+        URLs whose lease expired (their worker died or stalled) are leased
+        again, unless they already used max_attempts, in which case they are
+        marked failed.
+        
+        Args:
+            worker_id (str): Worker identifier; call claim_partitions() first
+            limit (int): Max URLs to lease
+            timeout (float): Lease length (defaults to visibility_timeout)
+        
+        Returns:
+            list: (url, depth) tuples
+        """
+        now = time.time()
+        expires = now + (timeout or self.visibility_timeout)
+        owned = "partition IN (SELECT partition FROM partitions WHERE owner = ? AND lease_expires > ?)"
+        with self._transaction() as db:
+            db.execute(f"UPDATE urls SET state = 'failed', lease_owner = NULL, error = 'lease expired', updated = ?"
+                       f" WHERE state = 'leased' AND lease_expires <= ? AND attempts >= ? AND {owned}",
+                       (now, now, self.max_attempts, worker_id, now))
+            rows = db.execute(
+                f"SELECT url, depth FROM urls WHERE {owned} AND (state = 'queued'"
+                " OR (state = 'leased' AND lease_expires <= ?)) ORDER BY depth LIMIT ?",
+                (worker_id, now, now, limit)).fetchall()
+            db.executemany("UPDATE urls SET state = 'leased', lease_owner = ?, lease_expires = ?,"
+                           " attempts = attempts + 1, updated = ? WHERE url = ?",
+                           [(worker_id, expires, now, url) for url, _ in rows])
+        return rows
+    
+    def heartbeat(self, worker_id, timeout=None):
+        """
+        Renew every lease a worker holds
+        
+        Workers processing a long batch call this well within the
+        visibility timeout.
+        
+        Args:
+            worker_id (str): Worker identifier
+            timeout (float): New lease length (defaults to visibility_timeout)
+        
+        Returns:
+            int: URL leases renewed
+        """
+        expires = time.time() + (timeout or self.visibility_timeout)
+        with self._transaction() as db:
+            db.execute("UPDATE workers SET lease_expires = ? WHERE worker_id = ?", (expires, worker_id))
+            db.execute("UPDATE partitions SET lease_expires = ? WHERE owner = ?", (expires, worker_id))
+            cursor = db.execute("UPDATE urls SET lease_expires = ? WHERE state = 'leased' AND lease_owner = ?",
+                                (expires, worker_id))
+            return cursor.rowcount
+    
+    def ack(self, url, worker_id):
+        """
+        Mark a leased URL as done
+        
+        Args:
+            url (str): URL returned by lease()
+            worker_id (str): Worker holding the lease
+        
+        Returns:
+            bool: False if the lease was lost to another worker meanwhile
+        """
+        with self._transaction() as db:
+            cursor = db.execute("UPDATE urls SET state = 'done', lease_owner = NULL, lease_expires = NULL,"
+                                " error = NULL, updated = ? WHERE url = ? AND state = 'leased' AND lease_owner = ?",
+                                (time.time(), url, worker_id))
+            return cursor.rowcount == 1
+    
+    def fail(self, url, worker_id, error=None, retry=True):
+        """
+        Give back a leased URL after an error
+        
+        The URL is queued again while it has attempts left and retry is
+        True, otherwise it is marked failed.
+        
+        Args:
+            url (str): URL returned by lease()
+            worker_id (str): Worker holding the lease
+            error (Exception): Error to record
+            retry (bool): Whether the error is worth another attempt
+        
+        Returns:
+            bool: False if the lease was lost to another worker meanwhile
+        """
+        with self._transaction() as db:
+            cursor = db.execute(
+                "UPDATE urls SET state = CASE WHEN ? AND attempts < ? THEN 'queued' ELSE 'failed' END,"
+                " lease_owner = NULL, lease_expires = NULL, error = ?, updated = ?"
+                " WHERE url = ? AND state = 'leased' AND lease_owner = ?",
+                (retry, self.max_attempts, str(error) if error else None, time.time(), url, worker_id))
+            return cursor.rowcount == 1
+    
+    def release(self, worker_id):
+        """
+        Give back everything a worker holds, for a clean shutdown
+        
+        Leased URLs are queued again without using up an attempt.
+        
+        Args:
+            worker_id (str): Worker identifier
+        """
+        with self._transaction() as db:
+            db.execute("UPDATE urls SET state = 'queued', lease_owner = NULL, lease_expires = NULL,"
+                       " attempts = attempts - 1 WHERE state = 'leased' AND lease_owner = ?", (worker_id,))
+            db.execute("UPDATE partitions SET owner = NULL, lease_expires = 0 WHERE owner = ?", (worker_id,))
+            db.execute("DELETE FROM workers WHERE worker_id = ?", (worker_id,))
+    
+    def remaining(self):
+        """
+        Number of URLs queued or leased
+        
+        Returns:
+            int: URLs not yet done or failed
+        """
+        with self._lock:
+            count, = self._db.execute("SELECT COUNT(*) FROM urls WHERE state IN ('queued', 'leased')").fetchone()
+        return count
+    
+    def stats(self):
+        """
+        Summary counters
+        
+        Returns:
+            dict: URL counts per state, live workers and partitions
+        """
+        now = time.time()
+        with self._lock:
+            counts = dict(self._db.execute("SELECT state, COUNT(*) FROM urls GROUP BY state"))
+            workers, = self._db.execute("SELECT COUNT(*) FROM workers WHERE lease_expires > ?", (now,)).fetchone()
+            owned, = self._db.execute("SELECT COUNT(*) FROM partitions WHERE lease_expires > ?", (now,)).fetchone()
+        stats = {state: counts.get(state, 0) for state in STATES}
+        stats.update({'workers': workers, 'partitions': self.num_partitions, 'partitions_owned': owned})
+        return stats
+    
+    def close(self):
+        """
+        Close the database
+        """
+        with self._lock:
+            self._db.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+def run_worker(queue, scraper=None, handler=None, worker_id=None, extract=None, follow_links=False,
+               filter_pattern=None, max_depth=config.DEFAULT_MAX_DEPTH, batch_size=None,
+               idle_timeout=config.QUEUE_IDLE_TIMEOUT, poll_interval=1.0):
+    """
+    Process URLs from a shared queue until it is drained
+    
+    Records are written as JSON Lines to <worker_id>.jsonl in the handler's
+    output directory. URLs are acknowledged once their batch's records are
+    flushed to disk, so a worker that dies in between leaves duplicate
+    records rather than lost ones (a killed worker's file stays at its
+    temporary .part name).
+    
+    Args:
+        queue (WorkQueue): Queue opened by this process
+        scraper (WebScraper): Scraper to fetch with (a default one if None)
+        handler (DataHandler): Output handler (a default one if None)
+        worker_id (str): Worker identifier (hostname-pid if None)
+        extract (callable): extract(scraper, url, soup) -> record (defaults
+            to pipeline.summary_record)
+        follow_links (bool): Queue the links of each page
+        filter_pattern (str): Only follow links containing this pattern
+        max_depth (int): Deepest link depth queued
+        batch_size (int): URLs leased at a time (defaults to 4x the scraper's workers)
+        idle_timeout (float): Seconds to wait for work while other workers
+            still hold leases
+        poll_interval (float): Seconds between lease attempts when idle
+    
+    Returns:
+        dict: worker_id, pages, errors and the output path
+    """
+    from pipeline import summary_record
+    from scraper import WebScraper
+    
+    scraper = scraper or WebScraper()
+    handler = handler or DataHandler()
+    worker_id = worker_id or default_worker_id()
+    extract = extract or summary_record
+    batch_size = batch_size or scraper.max_workers * 4
+    logger = logging.getLogger(__name__)
+    pages = errors = 0
+    
+    writer = handler.open_jsonl(f"{worker_id}.jsonl")
+    try:
+        idle_since = time.monotonic()
+        while True:
+            queue.claim_partitions(worker_id)
+            batch = dict(queue.lease(worker_id, batch_size))
+            if not batch:
+                if not queue.remaining() or time.monotonic() - idle_since > idle_timeout:
+                    break
+                time.sleep(poll_interval)
+                continue
+            
+            last_heartbeat = time.monotonic()
+            written = []
+            for url, soup in scraper.get_pages(batch):
+                if isinstance(soup, Exception):
+                    retry = isinstance(soup, CircuitOpenError) or scraper.retry_policy.is_transient(soup)
+                    queue.fail(url, worker_id, soup, retry)
+                    errors += 1
+                else:
+                    with use_registry(scraper.metrics):
+                        record = extract(scraper, url, soup)
+                    writer.write(record)
+                    if follow_links and batch[url] < max_depth:
+                        queue.put_many(scraper.extract_links(soup, url, filter_pattern), batch[url] + 1)
+                    written.append(url)
+                    pages += 1
+                if time.monotonic() - last_heartbeat > queue.visibility_timeout / 3:
+                    queue.heartbeat(worker_id)
+                    last_heartbeat = time.monotonic()
+            writer.flush()
+            for url in written:
+                queue.ack(url, worker_id)
+            idle_since = time.monotonic()
+    finally:
+        writer.close()
+        queue.release(worker_id)
+    
+    logger.info(f"Worker {worker_id} finished: {pages} pages, {errors} errors")
+    return {'worker_id': worker_id, 'pages': pages, 'errors': errors, 'path': writer.filepath}
+
+def _worker_process(path, output_dir, follow_links, filter_pattern, max_depth):
+    """
+    multiprocessing target: one queue connection and scraper per process
+    """
+    from scraper import WebScraper
+    
+    with WorkQueue(path) as queue:
+        return run_worker(queue, WebScraper(), DataHandler(output_dir), follow_links=follow_links,
+                          filter_pattern=filter_pattern, max_depth=max_depth)
+
+def main(argv=None):
+    """
+    Command line entry point
+    """
+    parser = argparse.ArgumentParser(description=__doc__.strip(), formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', default=config.QUEUE_DB_PATH, help='queue database path')
+    commands = parser.add_subparsers(dest='command', required=True)
+    seed = commands.add_parser('seed', help='queue URLs from a file (one per line) or the command line')
+    seed.add_argument('sources', nargs='+', help='URL list files or URLs')
+    work = commands.add_parser('work', help='run workers until the queue is drained')
+    work.add_argument('--processes', type=int, default=1, help='worker processes to start')
+    work.add_argument('--output-dir', default=config.OUTPUT_DIRECTORY, help='directory for the JSONL output')
+    work.add_argument('--follow-links', action='store_true', help='queue the links of each page')
+    work.add_argument('--filter', help='only follow links containing this pattern')
+    work.add_argument('--max-depth', type=int, default=config.DEFAULT_MAX_DEPTH, help='deepest link depth queued')
+    commands.add_parser('stats', help='print queue counters')
+    args = parser.parse_args(argv)
+    
+    if args.command == 'seed':
+        with WorkQueue(args.db) as queue:
+            added = 0
+            for source in args.sources:
+                if '://' in source:
+                    added += queue.put_many([source])
+                else:
+                    with open(source, 'r', encoding='utf-8') as f:
+                        added += queue.put_many(line.strip() for line in f if line.strip())
+            print(f"Queued {added} URLs")
+    elif args.command == 'work':
+        worker_args = (args.db, args.output_dir, args.follow_links, args.filter, args.max_depth)
+        WorkQueue(args.db).close()  # create the schema before the workers race for it
+        with multiprocessing.Pool(args.processes) as pool:
+            results = pool.starmap(_worker_process, [worker_args] * args.processes)
+        print(json.dumps(results, indent=2))
+    else:
+        with WorkQueue(args.db) as queue:
+            print(json.dumps(queue.stats(), indent=2))
+
+if __name__ == "__main__":
+    main()